@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Attachment Store
+================
+
+Content-addressed storage for files saved into the vault (email
+attachments). A file is stored once, named after the SHA-256 of its
+content, at ``<vault>/Attachments/<aa>/<sha256><ext>``: the same PDF sent
+to five threads is written once and every action file links to that copy.
+
+Content is streamed to a temp file in chunks while it is hashed, so a
+large attachment is never held in memory, then hard-linked into place
+(never clobbering an existing blob). The size limit is enforced while
+streaming.
+
+Usage:
+    store = AttachmentStore(vault / 'Attachments', max_bytes=25 * 1024 * 1024)
+    blob = store.put(chunks, 'invoice.pdf')
+    print(blob['path'], blob['sha256'], blob['deduplicated'])
+"""
+
+import os
+import re
+import uuid
+import hashlib
+import logging
+from pathlib import Path
+from typing import Dict, Iterable
+
+logger = logging.getLogger('AttachmentStore')
+
+_SAFE_SUFFIX = re.compile(r'^\.[a-z0-9]{1,10}$')
+
+
+class AttachmentTooLarge(Exception):
+    """Raised when streamed content exceeds the store's size limit."""
+
+
+def blob_suffix(filename: str) -> str:
+    """File extension kept on the stored blob ('' if odd or missing)."""
+    suffix = Path(filename).suffix.lower()
+    return suffix if _SAFE_SUFFIX.match(suffix) else ''
+
+
+class AttachmentStore:
+    """SHA-256 content-addressed blobs under one vault folder."""
+
+    def __init__(self, root: Path, max_bytes: int = None):
+        """
+        Args:
+            root: Folder holding the blobs (e.g. ``<vault>/Attachments``)
+            max_bytes: Largest blob accepted (None = no limit)
+        """
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._tmp = self.root / '.tmp'
+        self._tmp.mkdir(parents=True, exist_ok=True)
+
+    def path_for(self, sha256: str, filename: str = '') -> Path:
+        return self.root / sha256[:2] / f'{sha256}{blob_suffix(filename)}'
+
+    def put(self, chunks: Iterable[bytes], filename: str = '') -> Dict:
+        """
+        Stream content into the store.
+
+        Args:
+            chunks: Content, a piece at a time
+            filename: Original name (only its extension is kept)
+
+        Returns:
+            Dict with path, sha256, size and deduplicated (True if the
+            content was already stored)
+
+        Raises:
+            AttachmentTooLarge: Content exceeded ``max_bytes`` (nothing is kept)
+        """
+        digest = hashlib.sha256()
+        size = 0
+        tmp_path = self._tmp / f'{uuid.uuid4().hex}.part'
+        try:
+            with open(tmp_path, 'wb') as f:
+                for chunk in chunks:
+                    size += len(chunk)
+                    if self.max_bytes is not None and size > self.max_bytes:
+                        raise AttachmentTooLarge(f'{filename or "attachment"} exceeds {self.max_bytes} bytes')
+                    digest.update(chunk)
+                    f.write(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+
+            sha256 = digest.hexdigest()
+            dest = self.path_for(sha256, filename)
+            dest.parent.mkdir(exist_ok=True)
+            return {'path': dest, 'sha256': sha256, 'size': size,
+                    'deduplicated': not self._publish(tmp_path, dest)}
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+    @staticmethod
+    def _publish(tmp_path: Path, dest: Path) -> bool:
+        """Move the temp file to ``dest`` unless it exists; False if it did."""
+        try:
+            os.link(tmp_path, dest)
+            return True
+        except FileExistsError:
+            return False
+        except (AttributeError, NotImplementedError, OSError):
+            # Filesystems without hard links: best-effort check-then-rename
+            if dest.exists():
+                return False
+            os.replace(tmp_path, dest)
+            return True
@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+"""
+Audit Log Engine
+================
+
+Append-only, segmented audit log shared by every watcher.
+
+Entries are written as JSON lines to ``Logs/audit/YYYY-MM-DD.NNN.jsonl``.
+A segment rolls over at the UTC day boundary or once it grows past
+``max_segment_bytes``. Writes go through a background thread that batches
+queued entries into a single append and fsyncs at most every
+``fsync_interval`` seconds. Appends are guarded by an inter-process lock
+file, so several watcher processes can share one vault safely.
+
+The legacy daily JSON array (``Logs/YYYY-MM-DD.json``) is still available
+through ``AuditLogReader.export_daily_json``.
+
+Usage:
+    python audit_log.py --vault ./AI_Employee_Vault --export 2026-02-17
+    python audit_log.py --vault ./AI_Employee_Vault --tail 20
+"""
+
+import os
+import sys
+import json
+import queue
+import atexit
+import logging
+import argparse
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger('AuditLog')
+
+SEGMENT_SUFFIX = '.jsonl'
+LOCK_FILENAME = '.audit.lock'
+
+
+class _InterProcessLock:
+    """Exclusive advisory lock on a lock file (flock on POSIX, msvcrt on Windows)."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._fd = None
+        self._thread_lock = threading.Lock()
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        try:
+            if self._fd is None:
+                self._fd = os.open(str(self.path), os.O_RDWR | os.O_CREAT, 0o644)
+            if fcntl:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            else:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_LOCK, 1)
+        except Exception:
+            self._thread_lock.release()
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if fcntl:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            self._thread_lock.release()
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+def _utc_day(timestamp: str = None) -> str:
+    """Return the YYYY-MM-DD day an ISO timestamp belongs to (or today)."""
+    if timestamp and len(timestamp) >= 10:
+        return timestamp[:10]
+    return datetime.utcnow().strftime('%Y-%m-%d')
+
+
+def _segment_name(day: str, index: int) -> str:
+    return f'{day}.{index:03d}{SEGMENT_SUFFIX}'
+
+
+def _segment_index(path: Path) -> int:
+    try:
+        return int(path.name[:-len(SEGMENT_SUFFIX)].rsplit('.', 1)[1])
+    except (IndexError, ValueError):
+        return -1
+
+
+class AuditLog:
+    """
+    Append-only JSON-lines audit log with background batching.
+
+    Provides:
+    - O(1) appends (no read-modify-write of the day's log)
+    - Segment rotation by UTC day and by size
+    - A background writer that batches entries and fsyncs on an interval
+    - Inter-process safe appends via a lock file
+    """
+
+    def __init__(self, log_dir: Path, max_segment_bytes: int = 8 * 1024 * 1024,
+                 fsync_interval: float = 1.0, batch_size: int = 500,
+                 background: bool = True, max_queue: int = 10000):
+        """
+        Initialize the audit log.
+
+        Args:
+            log_dir: Vault ``Logs`` folder; segments go to ``<log_dir>/audit``
+            max_segment_bytes: Roll to a new segment once this size is reached
+            fsync_interval: Maximum seconds between fsyncs (0 = fsync every batch)
+            batch_size: Maximum entries written per append
+            background: Write on a background thread (False = write inline)
+            max_queue: Bound on queued entries before ``append`` blocks
+        """
+        self.log_dir = Path(log_dir)
+        self.segment_dir = self.log_dir / 'audit'
+        self.segment_dir.mkdir(parents=True, exist_ok=True)
+        self.max_segment_bytes = max_segment_bytes
+        self.fsync_interval = fsync_interval
+        self.batch_size = batch_size
+        self.background = background
+
+        self._lock = _InterProcessLock(self.segment_dir / LOCK_FILENAME)
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._closed = False
+        self._last_fsync = time.monotonic()
+        self._dirty_fds = {}
+        self._open_fds = {}
+        self._segment_indexes = {}
+        self._thread = None
+
+        if background:
+            self._thread = threading.Thread(
+                target=self._writer_loop, name='AuditLogWriter', daemon=True
+            )
+            self._thread.start()
+            atexit.register(self.close)
+
+    # ------------------------------------------------------------------ writes
+
+    def append(self, entry: Dict):
+        """Queue one entry for writing (written immediately if not in background mode)."""
+        if self._closed:
+            raise RuntimeError('Audit log is closed')
+        entry = dict(entry)
+        entry.setdefault('timestamp', datetime.utcnow().isoformat() + 'Z')
+        if self.background:
+            self._queue.put(entry)
+        else:
+            self._write_batch([entry])
+            self._fsync_dirty(force=self.fsync_interval <= 0)
+
+    def flush(self, timeout: float = None):
+        """Block until every queued entry is written and fsynced."""
+        if not self.background:
+            self._fsync_dirty(force=True)
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    def close(self):
+        """Flush pending entries and stop the writer thread."""
+        if self._closed:
+            return
+        if self.background and self._thread and self._thread.is_alive():
+            self.flush()
+            self._queue.put(None)
+            self._thread.join()
+        self._closed = True
+        with self._lock:
+            for path in list(self._open_fds):
+                self._close_fd(self._open_fds.pop(path))
+        self._lock.close()
+
+    def _writer_loop(self):
+        """Drain the queue in batches until a ``None`` sentinel arrives."""
+        while True:
+            try:
+                item = self._queue.get(timeout=self.fsync_interval or None)
+            except queue.Empty:
+                self._fsync_dirty()
+                continue
+
+            batch, waiters, stop = [], [], False
+            while True:
+                if item is None:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    batch.append(item)
+                if stop or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            if batch:
+                try:
+                    self._write_batch(batch)
+                except Exception as e:
+                    logger.error(f'Failed to write {len(batch)} audit entries: {e}')
+            self._fsync_dirty(force=bool(waiters) or stop or self.fsync_interval <= 0)
+            for waiter in waiters:
+                waiter.set()
+            if stop:
+                return
+
+    def _write_batch(self, batch: List[Dict]):
+        """Append a batch, grouped by day, under the inter-process lock."""
+        by_day = {}
+        for entry in batch:
+            line = json.dumps(entry, ensure_ascii=False, default=str) + '\n'
+            by_day.setdefault(_utc_day(entry.get('timestamp')), []).append(line.encode('utf-8'))
+
+        with self._lock:
+            for day, lines in by_day.items():
+                payload = b''.join(lines)
+                fd = self._segment_fd(day, len(payload))
+                os.write(fd, payload)
+                self._dirty_fds[fd] = True
+
+    def _segment_fd(self, day: str, incoming: int) -> int:
+        """Return an fd for the active segment of ``day``, rolling over if full. Caller holds the lock."""
+        index = self._segment_indexes.get(day)
+        if index is None:
+            segments = sorted(self.segment_dir.glob(f'{day}.*{SEGMENT_SUFFIX}'), key=_segment_index)
+            index = max(_segment_index(segments[-1]), 0) if segments else 0
+        # Another process may already have rolled over
+        while (self.segment_dir / _segment_name(day, index + 1)).exists():
+            index += 1
+
+        path = self.segment_dir / _segment_name(day, index)
+        try:
+            size = path.stat().st_size
+        except FileNotFoundError:
+            size = 0
+        if size and size + incoming > self.max_segment_bytes:
+            index += 1
+            path = self.segment_dir / _segment_name(day, index)
+        self._segment_indexes[day] = index
+
+        fd = self._open_fds.get(path)
+        if fd is None:
+            for stale in list(self._open_fds):
+                self._close_fd(self._open_fds.pop(stale))
+            flags = os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, 'O_BINARY', 0)
+            fd = os.open(str(path), flags, 0o644)
+            self._open_fds[path] = fd
+        return fd
+
+    def _close_fd(self, fd: int):
+        """Fsync (if dirty) and close a segment fd."""
+        try:
+            if self._dirty_fds.pop(fd, False):
+                os.fsync(fd)
+        except OSError as e:
+            logger.warning(f'fsync failed on audit segment: {e}')
+        finally:
+            os.close(fd)
+
+    def _fsync_dirty(self, force: bool = False):
+        """Fsync segments written since the last fsync, if the interval elapsed."""
+        if not self._dirty_fds:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_fsync < self.fsync_interval:
+            return
+        for fd in list(self._dirty_fds):
+            try:
+                os.fsync(fd)
+            except OSError as e:
+                logger.warning(f'fsync failed on audit segment: {e}')
+        self._dirty_fds.clear()
+        self._last_fsync = now
+
+
+class AuditLogReader:
+    """Read audit entries back from segments (and legacy daily JSON arrays)."""
+
+    def __init__(self, log_dir: Path):
+        self.log_dir = Path(log_dir)
+        self.segment_dir = self.log_dir / 'audit'
+
+    def days(self) -> List[str]:
+        """List the days that have audit segments."""
+        if not self.segment_dir.exists():
+            return []
+        return sorted({p.name.split('.', 1)[0] for p in self.segment_dir.glob(f'*{SEGMENT_SUFFIX}')})
+
+    def segments(self, day: str) -> List[Path]:
+        """Segments for ``day`` in write order."""
+        return sorted(self.segment_dir.glob(f'{day}.*{SEGMENT_SUFFIX}'), key=_segment_index)
+
+    def iter_entries(self, day: str, include_legacy: bool = True) -> Iterator[Dict]:
+        """
+        Yield every entry logged on ``day``.
+
+        Args:
+            day: Day in YYYY-MM-DD format
+            include_legacy: Also yield entries from the pre-segment ``Logs/<day>.json`` array
+
+        Torn trailing lines (from a crash mid-write) are skipped.
+        """
+        legacy = self._legacy_source(day)
+        if include_legacy and legacy:
+            try:
+                with open(legacy, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if isinstance(data, list):
+                    yield from data
+            except (OSError, ValueError) as e:
+                logger.warning(f'Skipping unreadable legacy log {legacy.name}: {e}')
+
+        for segment in self.segments(day):
+            with open(segment, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        logger.warning(f'Skipping corrupt line in {segment.name}')
+
+    def tail(self, count: int = 20, day: str = None) -> List[Dict]:
+        """Return the last ``count`` entries for ``day`` (default: today)."""
+        entries = list(self.iter_entries(day or _utc_day(), include_legacy=False))
+        return entries[-count:]
+
+    def export_daily_json(self, day: str, dest: Path = None) -> Path:
+        """
+        Write the legacy ``Logs/YYYY-MM-DD.json`` array for a day.
+
+        A pre-existing hand-written array is preserved as
+        ``audit/YYYY-MM-DD.legacy.json`` the first time the day is exported, so
+        re-exporting never duplicates entries. The export is written to a temp
+        file and renamed into place so readers never see a partial array.
+
+        Returns:
+            Path to the exported file
+        """
+        dest = Path(dest) if dest else self.log_dir / f'{day}.json'
+        preserved = self.segment_dir / f'{day}.legacy.json'
+        original = self.log_dir / f'{day}.json'
+        if not preserved.exists():
+            self.segment_dir.mkdir(parents=True, exist_ok=True)
+            if original.exists():
+                os.replace(original, preserved)
+            else:
+                preserved.write_text('[]', encoding='utf-8')
+
+        entries = list(self.iter_entries(day, include_legacy=True))
+        tmp = dest.with_name(f'.{dest.name}.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, indent=2, ensure_ascii=False, default=str)
+        os.replace(tmp, dest)
+        return dest
+
+    def _legacy_source(self, day: str) -> Optional[Path]:
+        """Pre-segment entries for ``day``: the preserved copy once exported, else the original array."""
+        preserved = self.segment_dir / f'{day}.legacy.json'
+        if preserved.exists():
+            return preserved
+        original = self.log_dir / f'{day}.json'
+        return original if original.exists() else None
+
+
+_shared_logs: Dict[str, AuditLog] = {}
+_shared_lock = threading.Lock()
+
+
+def get_audit_log(log_dir: Path, **kwargs) -> AuditLog:
+    """Return the process-wide AuditLog for ``log_dir``, creating it on first use."""
+    key = str(Path(log_dir).resolve())
+    with _shared_lock:
+        audit_log = _shared_logs.get(key)
+        if audit_log is None or audit_log._closed:
+            audit_log = AuditLog(log_dir, **kwargs)
+            _shared_logs[key] = audit_log
+        return audit_log
+
+
+def main():
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(description='Inspect and export the AI Employee audit log')
+    parser.add_argument('--vault', required=True, help='Path to Obsidian vault')
+    parser.add_argument('--export', metavar='DAY', help='Write legacy Logs/DAY.json array')
+    parser.add_argument('--tail', type=int, metavar='N', help='Print the last N entries for today')
+    parser.add_argument('--days', action='store_true', help='List days with audit segments')
+
+    args = parser.parse_args()
+    reader = AuditLogReader(Path(args.vault) / 'Logs')
+
+    if args.export:
+        path = reader.export_daily_json(args.export)
+        print(f'✅ Exported {args.export} to {path}')
+    elif args.tail:
+        for entry in reader.tail(args.tail):
+            print(json.dumps(entry, ensure_ascii=False))
+    elif args.days:
+        for day in reader.days():
+            print(day)
+    else:
+        parser.print_help()
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -17,23 +17,51 @@ Usage:
             pass
 """
 
+import os
 import time
 import logging
-import json
+import threading
 from pathlib import Path
 from abc import ABC, abstractmethod
+from concurrent.futures import Executor
 from datetime import datetime
 
+from audit_log import get_audit_log
+from scheduling import SchedulePolicy, FixedInterval
+from dedup_store import DedupStore
+from sync_state import SyncState
+from vault_writer import VaultWriter
+from vault_index import VaultIndex, get_vault_index
+from frontmatter import render_note
+from metrics import WatcherMetrics
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('watcher.log'),
-        logging.StreamHandler()
-    ]
-)
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+def configure_logging(log_file: str = 'watcher.log', level: int = logging.INFO):
+    """
+    Log to ``log_file`` and the console.
+
+    Called from each script's ``main()`` (not at import time), so importing
+    a watcher as a library leaves logging configuration to the caller.
+    """
+    logging.basicConfig(
+        level=level,
+        format=LOG_FORMAT,
+        handlers=[
+            logging.FileHandler(log_file),
+            logging.StreamHandler()
+        ]
+    )
+
+
+def load_environment() -> bool:
+    """Load ``.env`` into os.environ if python-dotenv is installed."""
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        return False
+    return load_dotenv()
 
 
 class BaseWatcher(ABC):
@@ -45,9 +73,16 @@ class BaseWatcher(ABC):
     - Error handling and retry logic
     - Logging infrastructure
     - File creation utilities
+    - Blocking (run) and asyncio (run_async) main loops
     """
 
-    def __init__(self, vault_path: str, check_interval: int = 60, watcher_name: str = None):
+    # Set True when the watcher's client must always be driven from the same
+    # OS thread (e.g. Playwright's sync API); the supervisor then gives it a
+    # dedicated single-thread executor instead of the shared pool.
+    thread_affine = False
+
+    def __init__(self, vault_path: str, check_interval: int = 60, watcher_name: str = None,
+                 schedule: SchedulePolicy = None, dry_run: bool = False):
         """
         Initialize the watcher.
 
@@ -55,10 +90,30 @@ class BaseWatcher(ABC):
             vault_path: Path to Obsidian vault
             check_interval: Seconds between checks (default: 60)
             watcher_name: Name for logging (defaults to class name)
+            schedule: Polling policy (default: FixedInterval(check_interval))
+            dry_run: Read the vault's state but persist nothing: dedup IDs and
+                sync cursors stay in memory, and action files and audit
+                entries are only logged (``--demo`` / ``--test``)
         """
         self.vault_path = Path(vault_path)
+        self.dry_run = dry_run
         self.check_interval = check_interval
         self.watcher_name = watcher_name or self.__class__.__name__
+        self.schedule = schedule or FixedInterval(check_interval)
+
+        # Stats for the most recent poll cycle (see _finish_cycle)
+        self.last_cycle = {}
+        self.metrics = WatcherMetrics(self.watcher_name)
+
+        # Early wake-ups (e.g. push notifications): request_poll() cuts the
+        # wait between cycles short; requests arriving within
+        # coalesce_seconds of the first share one cycle
+        self.coalesce_seconds = 0.0
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._async_wake = None  # (loop, asyncio.Event) while run_async is active
+        self.wakeups = self.metrics.counter('watcher_wakeups_total',
+                                            'Early poll requests (push notifications)')
 
         # Standard vault folders
         self.needs_action = self.vault_path / 'Needs_Action'
@@ -77,6 +132,51 @@ class BaseWatcher(ABC):
         # Track processed items to avoid duplicates
         self.processed_ids = set()
 
+        # Shared append-only audit log for this vault
+        self.audit_log = get_audit_log(self.logs)
+
+        # Atomic vault writes; VAULT_BACKGROUND_WRITES=true moves disk I/O
+        # off the polling thread
+        self.vault_writer = VaultWriter(
+            background=os.getenv('VAULT_BACKGROUND_WRITES', 'false').lower() == 'true'
+        )
+
+    @property
+    def vault_index(self) -> VaultIndex:
+        """Shared metadata index of the vault's notes (see vault_index.py)."""
+        return get_vault_index(self.vault_path)
+
+    def open_dedup_store(self, namespace: str, legacy_file: str = None, **kwargs) -> DedupStore:
+        """
+        Open the persistent dedup store for this watcher.
+
+        Args:
+            namespace: Store name; records live in ``<vault>/.dedup/<namespace>.idx``
+            legacy_file: Old JSON list of processed IDs (relative to the vault)
+                to import the first time the store is opened
+            **kwargs: Passed to DedupStore (ttl_seconds, recent_capacity, ...)
+
+        Returns:
+            Set-like DedupStore
+        """
+        store = DedupStore(self.vault_path / '.dedup' / f'{namespace}.idx', read_only=self.dry_run, **kwargs)
+        if legacy_file:
+            store.import_legacy_json(self.vault_path / legacy_file)
+        self.logger.info(f'Dedup store "{namespace}": {len(store)} known IDs')
+        return store
+
+    def open_sync_state(self, namespace: str) -> SyncState:
+        """
+        Open this watcher's persistent sync cursors.
+
+        Args:
+            namespace: State name; stored in ``<vault>/.state/<namespace>.json``
+
+        Returns:
+            SyncState (saved atomically on every update, unless a dry run)
+        """
+        return SyncState(self.vault_path / '.state' / f'{namespace}.json', persist=not self.dry_run)
+
     def _ensure_folders(self):
         """Ensure all required vault folders exist."""
         for folder in [self.needs_action, self.plans, self.done,
@@ -118,94 +218,247 @@ class BaseWatcher(ABC):
         Returns:
             Path to created file
         """
-        file_path = self.needs_action / f'{filename}.md'
-
-        # Build YAML frontmatter
-        yaml_content = '---\n'
-        for key, value in frontmatter.items():
-            if isinstance(value, str):
-                yaml_content += f'{key}: {value}\n'
-            elif isinstance(value, bool):
-                yaml_content += f'{key}: {str(value).lower()}\n'
-            else:
-                yaml_content += f'{key}: {value}\n'
-        yaml_content += '---\n\n'
-
-        # Combine and write
-        full_content = yaml_content + content
-        file_path.write_text(full_content, encoding='utf-8')
+        # Quoted/escaped YAML frontmatter + body
+        full_content = render_note(frontmatter, content)
+        file_path = self.write_action_file(f'{filename}.md', full_content)
 
         self.logger.info(f'Created action file: {file_path}')
         return file_path
 
-    def log_action(self, action_type: str, description: str, status: str = 'pending',
+    def write_action_file(self, filename: str, content: str, folder: Path = None) -> Path:
+        """
+        Write a vault file atomically through the shared vault writer.
+
+        All watchers go through this instead of writing files directly, so
+        readers never see partial notes and existing notes are never clobbered.
+
+        Args:
+            filename: File name including extension
+            content: Full file content
+            folder: Target folder (default: Needs_Action)
+
+        Returns:
+            Path the file is (or, in background mode, will be) published at
+        """
+        if self.dry_run:
+            self.logger.info(f'Dry run: not writing {filename}')
+            return (folder or self.needs_action) / filename
+        return self.vault_writer.submit(folder or self.needs_action, filename, content)
+
+    def log_action(self, action_type, description: str = None, status: str = 'pending',
                    details: dict = None):
         """
         Log an action to the audit log.
 
+        Entries are appended to the vault's segmented JSON-lines audit log
+        (see audit_log.py) rather than rewriting the day's JSON array.
+
         Args:
-            action_type: Type of action (e.g., 'email_received')
+            action_type: Type of action (e.g., 'email_received'), or a dict
+                holding the whole entry; its 'action_type', 'description' and
+                'status' keys are lifted out and everything else goes to details
             description: Human-readable description
             status: Status of action (pending, approved, completed, failed)
             details: Additional details as dict
         """
+        if isinstance(action_type, dict):
+            fields = dict(action_type)
+            action_type = fields.pop('action_type', 'event')
+            description = fields.pop('description', description)
+            status = fields.pop('status', status)
+            details = {**fields, **(details or {})}
+
         log_entry = {
             'timestamp': datetime.utcnow().isoformat() + 'Z',
             'watcher': self.watcher_name,
             'action_type': action_type,
-            'description': description,
+            'description': description or action_type,
             'status': status,
             'details': details or {}
         }
 
-        # Append to daily log file
-        today = datetime.utcnow().strftime('%Y-%m-%d')
-        log_file = self.logs / f'{today}.json'
-
+        if self.dry_run:
+            self.logger.debug(f'Dry run: not logging {action_type}')
+            return
         try:
-            # Read existing logs
-            if log_file.exists():
-                with open(log_file, 'r') as f:
-                    logs = json.load(f)
-            else:
-                logs = []
-
-            # Append new log
-            logs.append(log_entry)
-
-            # Write back
-            with open(log_file, 'w') as f:
-                json.dump(logs, f, indent=2)
+            self.audit_log.append(log_entry)
         except Exception as e:
             self.logger.error(f'Failed to write log: {e}')
 
+    def setup(self) -> bool:
+        """
+        Connect to the watched source (authenticate, launch browser, ...).
+
+        Called once before polling starts, and again after a crash when
+        running under the supervisor.
+
+        Returns:
+            True if the watcher is ready to poll
+        """
+        return True
+
+    def close(self):
+        """Release any resources acquired in setup()."""
+        pass
+
+    def poll_once(self) -> int:
+        """
+        Run a single check/create cycle.
+
+        Returns:
+            Number of items found
+        """
+        with self.metrics.check_duration.time(watcher=self.watcher_name):
+            items = self.check_for_updates()
+
+        if items:
+            self.logger.info(f'Found {len(items)} new items')
+            self.metrics.items_found.inc(len(items), watcher=self.watcher_name)
+
+            # The cycle's notes are published together: one fsync pass
+            with self.vault_writer.batch():
+                for item in items:
+                    self._create_action_file_instrumented(item)
+
+        return len(items) if items else 0
+
+    def _create_action_file_instrumented(self, item) -> Path:
+        """create_action_file with timing, success and error metrics."""
+        try:
+            with self.metrics.create_duration.time(watcher=self.watcher_name):
+                path = self.create_action_file(item)
+        except Exception as e:
+            self.logger.error(f'Failed to create action file: {e}')
+            self.metrics.error('create_action_file')
+            return None
+        if path:
+            if self.note_created(item):
+                self.metrics.action_files.inc(watcher=self.watcher_name)
+        else:
+            self.metrics.error('create_action_file')
+        return path
+
+    def note_created(self, item) -> bool:
+        """
+        Whether the last create_action_file call made a new note for
+        ``item``. Watchers that add items to existing notes override this,
+        so watcher_action_files_total counts new notes only.
+        """
+        return True
+
+    def _run_cycle(self) -> float:
+        """
+        Poll once, record the cycle's stats and pick the next interval.
+
+        Returns:
+            Seconds to wait before the next cycle
+        """
+        started = time.monotonic()
+        items, error = 0, None
+        try:
+            items = self.poll_once()
+        except Exception as e:
+            error = e
+            self.logger.error(f'Error in main loop: {e}')
+            self.log_action('watcher_error', f'Error: {str(e)}', 'failed')
+        return self._finish_cycle(started, items, error)
+
+    def _finish_cycle(self, started: float, items: int, error: Exception = None) -> float:
+        """Ask the schedule for the next interval and publish it with the cycle stats."""
+        interval = self.schedule.next_interval(items, error=error is not None)
+        self.last_cycle = {
+            'timestamp': datetime.utcnow().isoformat() + 'Z',
+            'items_found': items,
+            'duration_seconds': round(time.monotonic() - started, 3),
+            'error': str(error) if error else None,
+            'interval_seconds': round(interval, 3),
+        }
+        self.logger.debug(f'Cycle: {self.last_cycle}')
+
+        labels = {'watcher': self.watcher_name}
+        self.metrics.cycles.inc(**labels)
+        self.metrics.cycle_duration.observe(self.last_cycle['duration_seconds'], **labels)
+        self.metrics.interval.set(interval, **labels)
+        if error:
+            self.metrics.error('cycle')
+        else:
+            self.metrics.last_success.set(time.time(), **labels)
+        return interval
+
+    def request_poll(self):
+        """Start the next cycle now instead of after the interval (thread-safe)."""
+        self.wakeups.inc()
+        self._wake.set()
+        waker = self._async_wake
+        if waker is not None:
+            loop, event = waker
+            loop.call_soon_threadsafe(event.set)
+
+    def stop(self):
+        """Make run() return after the current cycle (thread-safe)."""
+        self._stop.set()
+        self._wake.set()
+
+    def _wait_for_next_cycle(self, interval: float):
+        """Sleep ``interval`` unless woken; a wake-up waits out the coalescing window."""
+        if self._wake.wait(interval) and self.coalesce_seconds:
+            self._stop.wait(self.coalesce_seconds)
+        self._wake.clear()
+
     def run(self):
         """
         Main loop - continuously check for updates.
 
-        This is the core operation that runs indefinitely.
+        This is the core operation that runs until stop() is called. The wait
+        between checks comes from ``self.schedule`` and is cut short by
+        request_poll(). A stop() issued before run() starts makes it return
+        without polling.
         """
         self.logger.info(f'Starting {self.watcher_name}')
 
-        while True:
-            try:
-                items = self.check_for_updates()
+        while not self._stop.is_set():
+            interval = self._run_cycle()
 
-                if items:
-                    self.logger.info(f'Found {len(items)} new items')
+            # Wait before next check
+            self._wait_for_next_cycle(interval)
 
-                    for item in items:
-                        try:
-                            self.create_action_file(item)
-                        except Exception as e:
-                            self.logger.error(f'Failed to create action file: {e}')
+    async def run_async(self, stop_event: 'asyncio.Event', executor: Executor = None):
+        """
+        Async main loop used by the supervisor.
 
-            except Exception as e:
-                self.logger.error(f'Error in main loop: {e}')
-                self.log_action('watcher_error', f'Error: {str(e)}', 'failed')
+        Blocking SDK work (check_for_updates / create_action_file) runs on
+        ``executor`` so many watchers can share one event loop. Returns when
+        ``stop_event`` is set.
 
-            # Wait before next check
-            time.sleep(self.check_interval)
+        Args:
+            stop_event: Set by the supervisor to request shutdown
+            executor: Executor for blocking calls (default loop executor if None)
+        """
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        self.logger.info(f'Starting {self.watcher_name} (async)')
+        self.schedule.reset()
+        wake = asyncio.Event()
+        self._async_wake = (loop, wake)
+
+        try:
+            while not stop_event.is_set():
+                interval = await loop.run_in_executor(executor, self._run_cycle)
+
+                # Wait before next check, waking early on shutdown or request_poll()
+                waits = [asyncio.ensure_future(stop_event.wait()), asyncio.ensure_future(wake.wait())]
+                await asyncio.wait(waits, timeout=interval, return_when=asyncio.FIRST_COMPLETED)
+                for waiter in waits:
+                    waiter.cancel()
+                if wake.is_set() and self.coalesce_seconds and not stop_event.is_set():
+                    try:
+                        await asyncio.wait_for(stop_event.wait(), timeout=self.coalesce_seconds)
+                    except asyncio.TimeoutError:
+                        pass
+                wake.clear()
+        finally:
+            self._async_wake = None
 
 
 # Example implementation (for testing)
@@ -223,6 +476,8 @@ if __name__ == '__main__':
             # Dummy implementation
             return Path()
 
+    configure_logging()
+
     # Test
     if len(sys.argv) > 1:
         vault_path = sys.argv[1]
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Browser Profile Benchmark
+=========================
+
+Runs WhatsAppWatcher in Chromium against the chat-list fixture, served
+over local HTTP with the assets a real page loads (an avatar per chat, a
+web font, a video, an analytics script and beacons), once per profile:
+
+- ``baseline``: the launch the watcher used before browser_profile.py (the
+  two sandbox flags, nothing blocked, no cache cap); headless unless
+  ``--baseline-headful`` (needs a display, e.g. ``xvfb-run``)
+- ``lean``: ``BrowserProfile`` as configured by $BROWSER_*, with the
+  fixture's analytics host added to the block list
+
+For each it reports the proportional set size (PSS) of all Chromium
+processes (peak and at the end), their CPU seconds, and the requests and
+bytes the fixture server delivered. Linux only: processes are found and
+measured through /proc.
+
+Usage:
+    python benchmarks/bench_browser.py
+    python benchmarks/bench_browser.py --seconds 120 --chats 500 --arrival-ms 500
+    BROWSER_ARGS="--renderer-process-limit=1" python benchmarks/bench_browser.py --profiles lean
+"""
+
+import os
+import time
+import random
+import struct
+import zlib
+import argparse
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, List
+
+from harness import emit, quiet_logging, working_directory
+from browser_profile import BASE_FLAGS, BrowserProfile
+
+FIXTURES = Path(__file__).resolve().parent / 'fixtures'
+PROFILES = ('baseline', 'lean')
+ANALYTICS_HOST = 'analytics.localhost'  # Chromium resolves *.localhost to loopback
+
+
+def _png(size: int, seed: int) -> bytes:
+    """An RGB PNG of noise (incompressible, like a photo avatar)."""
+    rng = random.Random(seed)
+    rows = b''.join(b'\x00' + rng.randbytes(size * 3) for _ in range(size))
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', struct.pack('>IIBBBBB', size, size, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(rows, 1)) + chunk(b'IEND', b''))
+
+
+class FixtureServer:
+    """Serves the fixture page, its assets and an analytics endpoint; counts what it sent."""
+
+    def __init__(self, seed: int):
+        rng = random.Random(seed)
+        self.files = {
+            '/whatsapp_chat_list.html': ('text/html', (FIXTURES / 'whatsapp_chat_list.html').read_bytes()),
+            '/assets/avatar.png': ('image/png', _png(160, seed)),
+            '/assets/font.woff2': ('font/woff2', rng.randbytes(120 * 1024)),
+            '/assets/clip.webm': ('video/webm', rng.randbytes(4 * 1024 * 1024)),
+            '/collect.js': ('text/javascript', b'/* analytics */'),
+        }
+        self.requests: Dict[str, int] = {}
+        self.bytes_sent = 0
+        self._server = None
+        self.port = None
+
+    def reset(self):
+        self.requests, self.bytes_sent = {}, 0
+
+    def _handler(self):
+        from http.server import BaseHTTPRequestHandler
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _count(self, path: str, size: int):
+                kind = 'analytics' if path.startswith('/collect') else path.rsplit('/', 1)[-1]
+                server.requests[kind] = server.requests.get(kind, 0) + 1
+                server.bytes_sent += size
+
+            def do_GET(self):
+                path = self.path.split('?', 1)[0]
+                if path not in server.files:
+                    self.send_error(404)
+                    return
+                content_type, body = server.files[path]
+                self._count(path, len(body))
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('Cache-Control', 'max-age=3600')
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):  # sendBeacon
+                self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                self._count('/collect', 0)
+                self.send_response(204)
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> 'FixtureServer':
+        from http.server import ThreadingHTTPServer
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+# ---------------------------------------------------------------- /proc
+
+def _children() -> Dict[int, List[int]]:
+    children: Dict[int, List[int]] = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            stat = Path(f'/proc/{entry}/stat').read_text()
+        except OSError:
+            continue
+        ppid = int(stat.rsplit(')', 1)[1].split()[1])
+        children.setdefault(ppid, []).append(int(entry))
+    return children
+
+
+def browser_processes(session_path: Path) -> List[int]:
+    """The Chromium started on ``session_path`` and all its descendants."""
+    marker = f'--user-data-dir={session_path}'.encode()
+    roots = []
+    for entry in os.listdir('/proc'):
+        if entry.isdigit():
+            try:
+                cmdline = Path(f'/proc/{entry}/cmdline').read_bytes().split(b'\0')
+            except OSError:
+                continue
+            if marker in cmdline and not any(arg.startswith(b'--type=') for arg in cmdline):
+                roots.append(int(entry))
+    children, found = _children(), []
+    while roots:
+        pid = roots.pop()
+        found.append(pid)
+        roots.extend(children.get(pid, []))
+    return found
+
+
+def pss_mb(pids: List[int]) -> float:
+    """Summed PSS (shared pages split between the processes sharing them)."""
+    total_kb = 0
+    for pid in pids:
+        try:
+            for line in Path(f'/proc/{pid}/smaps_rollup').read_text().splitlines():
+                if line.startswith('Pss:'):
+                    total_kb += int(line.split()[1])
+                    break
+        except OSError:
+            continue
+    return round(total_kb / 1024, 1)
+
+
+def cpu_seconds(pids: List[int]) -> float:
+    """User + system CPU time of the processes still running."""
+    ticks = 0
+    for pid in pids:
+        try:
+            fields = Path(f'/proc/{pid}/stat').read_text().rsplit(')', 1)[1].split()
+        except OSError:
+            continue
+        ticks += int(fields[11]) + int(fields[12])  # utime, stime
+    return round(ticks / os.sysconf('SC_CLK_TCK'), 2)
+
+
+# ---------------------------------------------------------------- runs
+
+def run_profile(args, server: FixtureServer, workdir: Path, name: str) -> Dict:
+    from whatsapp_watcher import WhatsAppWatcher
+
+    session = workdir / f'{name}_session'
+    if name == 'baseline':
+        profile = BrowserProfile(session, headless=not args.baseline_headful, block='', viewport='',
+                                 cache_mb=0, flags=BASE_FLAGS, extra_args='')
+    else:
+        profile = BrowserProfile(session, headless=True,
+                                 block_hosts=os.getenv('BROWSER_BLOCK_HOSTS', '') + ',' + ANALYTICS_HOST)
+    base = f'http://127.0.0.1:{server.port}'
+    url = (f'{base}/whatsapp_chat_list.html?chats={args.chats}&unread={args.unread}'
+           f'&arrival_ms={args.arrival_ms}&assets=1&seed={args.seed}'
+           f'&analytics=http://{ANALYTICS_HOST}:{server.port}')
+    watcher = WhatsAppWatcher(str(workdir / f'{name}_vault'), str(session), args.poll_interval,
+                              url=url, profile=profile)
+
+    server.reset()
+    started = time.perf_counter()
+    try:
+        if not (watcher.setup_browser() and watcher.authenticate_whatsapp()):
+            raise SystemExit(f'{name}: Chromium did not load the fixture (python -m playwright install chromium)')
+        load_seconds = time.perf_counter() - started
+
+        samples, items = [], 0
+        while time.perf_counter() - started < args.seconds:
+            items += watcher.poll_once()
+            samples.append(pss_mb(browser_processes(session)))
+            watcher.page.wait_for_timeout(args.poll_interval * 1000)
+        pids = browser_processes(session)
+        result = {
+            'benchmark': 'browser',
+            'profile': name,
+            'headless': profile.resolve_headless(),
+            'seconds': args.seconds,
+            'load_seconds': round(load_seconds, 2),
+            'processes': len(pids),
+            'pss_mb': {'peak': max(samples, default=0.0), 'end': pss_mb(pids)},
+            'cpu_seconds': cpu_seconds(pids),
+            'requests_served': dict(server.requests),
+            'mb_served': round(server.bytes_sent / 1024 / 1024, 2),
+            'requests_blocked': profile.blocked,
+            'items': items,
+        }
+    finally:
+        watcher.close()
+        watcher.audit_log.close()  # before the temporary vault goes away
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark browser profiles against the WhatsApp fixture')
+    parser.add_argument('--profiles', nargs='+', choices=PROFILES, default=list(PROFILES))
+    parser.add_argument('--seconds', type=float, default=60, help='Watcher run time per profile')
+    parser.add_argument('--chats', type=int, default=200, help='Chats in the fixture list')
+    parser.add_argument('--unread', type=int, default=20, help='Chats unread at load')
+    parser.add_argument('--arrival-ms', type=int, default=1000, help='Mean gap between incoming messages')
+    parser.add_argument('--poll-interval', type=float, default=5, help='Seconds between watcher checks')
+    parser.add_argument('--baseline-headful', action='store_true',
+                        help='Run the baseline headful, as the watcher used to (needs a display)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=None, help='Append results to this JSONL file')
+    args = parser.parse_args()
+
+    quiet_logging()
+    server = FixtureServer(args.seed).start()
+    results = []
+    try:
+        with tempfile.TemporaryDirectory() as tmp, working_directory(Path(tmp)):
+            for name in args.profiles:
+                results.append(run_profile(args, server, Path(tmp), name))
+    finally:
+        server.stop()
+    emit(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
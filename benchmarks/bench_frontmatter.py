@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Frontmatter Microbenchmark
+==========================
+
+Compares the old ``content.split('---')`` approach (read the whole note,
+split it, substring-match the header) with ``frontmatter.read_frontmatter``
+(stream only the header block, typed parse) over a synthetic vault.
+
+Usage:
+    python benchmarks/bench_frontmatter.py --notes 10000 --body-kb 8
+"""
+
+import json
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+from vault_gen import write_notes
+from frontmatter import read_frontmatter
+
+
+def legacy_scan(folder: Path) -> int:
+    """The pre-frontmatter-module approach from LinkedInPoster.find_pending_posts."""
+    found = 0
+    for file in folder.glob('LINKEDIN_*.md'):
+        parts = file.read_text().split('---')
+        if len(parts) < 3:
+            continue
+        if 'type: linkedin_post' in parts[1]:
+            found += 1
+    return found
+
+
+def header_scan(folder: Path) -> int:
+    found = 0
+    for file in folder.glob('LINKEDIN_*.md'):
+        if read_frontmatter(file).get('type') == 'linkedin_post':
+            found += 1
+    return found
+
+
+def timed(fn, folder: Path, repeat: int) -> dict:
+    samples, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(folder)
+        samples.append(time.perf_counter() - start)
+    best = min(samples)
+    return {'matches': result, 'best_seconds': round(best, 4)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark frontmatter parsing over a synthetic vault')
+    parser.add_argument('--notes', type=int, default=10000, help='Number of notes')
+    parser.add_argument('--body-kb', type=int, default=8, help='Body size per note in KB')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per approach (best is reported)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = Path(tmp) / 'Pending_Approval'
+        write_notes(folder, args.notes, args.body_kb, prefix='LINKEDIN_')
+
+        legacy = timed(legacy_scan, folder, args.repeat)
+        header = timed(header_scan, folder, args.repeat)
+
+    for result in (legacy, header):
+        result['notes_per_second'] = round(args.notes / result['best_seconds'])
+    print(json.dumps({
+        'benchmark': 'frontmatter',
+        'notes': args.notes,
+        'body_kb': args.body_kb,
+        'split_based': legacy,
+        'header_only': header,
+        'speedup': round(legacy['best_seconds'] / header['best_seconds'], 2),
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+MIME Decoder Benchmark
+======================
+
+Compares decoding a whole Gmail body part (the old ``_extract_email_data``
+approach: ``urlsafe_b64decode`` the full part, then ``.decode('utf-8')``)
+with ``mime_decoder.extract_body``, which stops at the byte cap, on plain
+and HTML messages of increasing size. Reports time per message and the
+peak memory allocated while decoding (tracemalloc).
+
+Usage:
+    python benchmarks/bench_mime.py
+    python benchmarks/bench_mime.py --sizes-mb 1 5 20 --max-bytes 2000
+"""
+
+import time
+import base64
+import argparse
+import tracemalloc
+
+from harness import emit
+from mime_decoder import extract_body
+
+PARAGRAPH = 'Please review the attached quarterly figures before Friday. Thanks! '
+
+
+def make_payload(size_mb: float, html: bool) -> dict:
+    repeats = int(size_mb * 1024 * 1024 / (len(PARAGRAPH) + (30 if html else 1)))
+    if html:
+        text = ('<html><head><style>td{font-family:Arial}</style></head><body><table>'
+                + f'<tr><td style="padding:8px">{PARAGRAPH}</td></tr>' * repeats
+                + '</table></body></html>')
+        mime_type = 'text/html'
+    else:
+        text = (PARAGRAPH + '\n') * repeats
+        mime_type = 'text/plain'
+    data = base64.urlsafe_b64encode(text.encode('utf-8')).decode('ascii')
+    part = {'mimeType': mime_type,
+            'headers': [{'name': 'Content-Type', 'value': f'{mime_type}; charset="UTF-8"'}],
+            'body': {'size': len(text), 'data': data}}
+    return {'mimeType': 'multipart/mixed', 'parts': [{'mimeType': 'multipart/alternative',
+                                                     'parts': [part]}]}
+
+
+def full_decode(payload: dict, max_bytes: int) -> str:
+    """Decode the whole first text part, then keep the first max_bytes."""
+    part = payload['parts'][0]['parts'][0]
+    return base64.urlsafe_b64decode(part['body']['data']).decode('utf-8')[:max_bytes]
+
+
+def measure(fn, payload: dict, max_bytes: int, repeat: int) -> dict:
+    tracemalloc.start()
+    fn(payload, max_bytes)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(payload, max_bytes)
+        best = min(best, time.perf_counter() - start)
+    return {'best_ms': round(best * 1000, 3), 'peak_alloc_mb': round(peak / 1024 / 1024, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark capped MIME body decoding')
+    parser.add_argument('--sizes-mb', type=float, nargs='+', default=[0.1, 1, 20], help='Body sizes')
+    parser.add_argument('--max-bytes', type=int, default=500, help='Body text cap')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per approach (best is reported)')
+    parser.add_argument('--output', default=None, help='Append results to this JSONL file')
+    args = parser.parse_args()
+
+    results = []
+    for html in (False, True):
+        for size in args.sizes_mb:
+            payload = make_payload(size, html)
+            result = {
+                'benchmark': 'mime',
+                'part': 'text/html' if html else 'text/plain',
+                'size_mb': size,
+                'max_bytes': args.max_bytes,
+                'streaming': measure(extract_body, payload, args.max_bytes, args.repeat),
+            }
+            if not html:  # the old code never read HTML parts
+                result['full_decode'] = measure(full_decode, payload, args.max_bytes, args.repeat)
+            results.append(result)
+    emit(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
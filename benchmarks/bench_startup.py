@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Startup Benchmark
+=================
+
+Cold-start wall time of each entry point (``--help``, the offline
+``--demo`` and watcher construction), plus a ``python -X importtime``
+breakdown of the slowest top-level imports. Heavy dependencies (Google API
+client, Playwright, dotenv, http.server, asyncio) should only show up in
+modes that need them.
+
+Usage:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --runs 20 --target-ms 150 --output bench_results.jsonl
+"""
+
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+from pathlib import Path
+
+from harness import REPO_ROOT, emit
+
+DEFAULT_TARGET_MS = 150
+
+
+def scenarios(tmp: Path):
+    """(name, argv) pairs; argv runs under a fresh interpreter from REPO_ROOT."""
+    vault, watch = tmp / 'vault', tmp / 'drop'
+    watch.mkdir(parents=True, exist_ok=True)
+    construct = ('import sys; sys.path.insert(0, {root!r}); import {module}; '
+                 '{module}.{cls}({args})')
+    return [
+        ('python (baseline)', ['-c', 'pass']),
+        ('gmail_watcher --help', ['gmail_watcher.py', '--help']),
+        ('whatsapp_watcher --help', ['whatsapp_watcher.py', '--help']),
+        ('filesystem_watcher --help', ['filesystem_watcher.py', '--help']),
+        ('linkedin_poster --help', ['linkedin_poster.py', '--help']),
+        ('supervisor --help', ['supervisor.py', '--help']),
+        ('filesystem_watcher --demo', ['filesystem_watcher.py', '--demo',
+                                       '--vault', str(vault), '--watch', str(watch)]),
+        ('GmailWatcher()', ['-c', construct.format(
+            root=str(REPO_ROOT), module='gmail_watcher', cls='GmailWatcher',
+            args=f'{str(vault)!r}, "credentials.json"')]),
+        ('WhatsAppWatcher()', ['-c', construct.format(
+            root=str(REPO_ROOT), module='whatsapp_watcher', cls='WhatsAppWatcher',
+            args=f'{str(vault)!r}, {str(tmp / "session")!r}')]),
+    ]
+
+
+def wall_times(argv, runs: int, cwd: Path):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + argv, cwd=cwd, stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL, check=False)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def import_breakdown(argv, cwd: Path, top: int):
+    """Top-level modules by cumulative import time (ms) from -X importtime."""
+    completed = subprocess.run([sys.executable, '-X', 'importtime'] + argv, cwd=cwd,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    modules = []
+    for line in completed.stderr.splitlines():
+        parts = line.split('|')
+        if not line.startswith('import time:') or len(parts) != 3 or 'cumulative' in line:
+            continue
+        cumulative, name = parts[1], parts[2]
+        if name.startswith('  '):  # nested import, already counted by its parent
+            continue
+        modules.append((name.strip(), int(cumulative) / 1000))
+    total = sum(ms for _, ms in modules)
+    modules.sort(key=lambda item: item[1], reverse=True)
+    return round(total, 1), [{'module': m, 'ms': round(ms, 1)} for m, ms in modules[:top]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark cold start of the watcher entry points')
+    parser.add_argument('--runs', type=int, default=10, help='Cold starts per entry point')
+    parser.add_argument('--top', type=int, default=5, help='Slowest imports to list')
+    parser.add_argument('--target-ms', type=float, default=DEFAULT_TARGET_MS, help='Startup budget')
+    parser.add_argument('--output', default=None, help='Append results to this JSONL file')
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix='bench_startup_') as tmp:
+        tmp = Path(tmp)
+        for name, argv in scenarios(tmp):
+            argv = [str(REPO_ROOT / argv[0])] + argv[1:] if argv[0].endswith('.py') else argv
+            samples = wall_times(argv, args.runs, tmp)
+            import_ms, top = import_breakdown(argv, tmp, args.top)
+            best = min(samples)
+            results.append({
+                'benchmark': 'startup',
+                'command': name,
+                'runs': args.runs,
+                'wall_ms': {'best': round(best, 1), 'median': round(statistics.median(samples), 1)},
+                'import_ms': import_ms,
+                'top_imports': top,
+                'target_ms': args.target_ms,
+                'within_target': best <= args.target_ms,
+            })
+    emit(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
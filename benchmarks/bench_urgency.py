@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Urgency Matcher Benchmark
+=========================
+
+Scores a synthetic corpus of chat/email messages (default one million)
+three ways and reports messages per second:
+
+- ``substring``: the old watcher check, ``any(kw in text.lower())`` over
+  the built-in keywords (no weights; ``help`` matches ``helpful``)
+- ``per_rule``: every rule compiled as its own word-bounded regex and
+  searched in turn, the straightforward way to get weighted scores
+- ``compiled``: ``urgency.UrgencyMatcher``, all keywords and phrases in one
+  regex (regex rules searched one by one)
+
+``per_rule`` and ``compiled`` must agree on every score; the run fails if
+they don't. ``per_rule`` only runs over the first ``--baseline-messages``
+(it takes minutes per 100k messages with a few hundred rules).
+``--extra-keywords`` adds synthetic keyword rules to show how each
+approach scales with the size of the rule set.
+
+Usage:
+    python benchmarks/bench_urgency.py
+    python benchmarks/bench_urgency.py --messages 100000 --extra-keywords 0 100 1000 --baseline-messages 10000
+"""
+
+import re
+import time
+import random
+import string
+import argparse
+from typing import Callable, List
+
+from harness import emit, REPO_ROOT
+from fakes import PHRASES, SUBJECTS
+from urgency import DEFAULT_KEYWORDS, UrgencyMatcher, UrgencyRule, load_matcher
+
+FILLER = ('thanks', 'meeting', 'tomorrow', 'report', 'helpful', 'update', 'review', 'draft',
+          'schedule', 'call', 'budget', 'team', 'client', 'follow', 'up', 'on', 'the', 'for',
+          'please', 'sent', 'attached', 'version', 'quarter', 'today', 'deadline', 'numbers')
+AMOUNTS = ('$45', '$120.50', '$1,250', '$980', '$12,400.00', '$3000')
+
+
+def make_corpus(count: int, extra: List[str], seed: int) -> List[str]:
+    """Messages of 8-40 words: a subject or phrase, filler, sometimes an amount or extra keyword."""
+    rng = random.Random(seed)
+    corpus = []
+    for n in range(count):
+        words = [rng.choice(FILLER) for _ in range(rng.randint(6, 36))]
+        words.insert(rng.randrange(len(words)), rng.choice(SUBJECTS).format(n=n))
+        if rng.random() < 0.5:
+            words.append(rng.choice(PHRASES))
+        if rng.random() < 0.1:
+            words.insert(rng.randrange(len(words)), rng.choice(AMOUNTS))
+        if extra and rng.random() < 0.1:
+            words.insert(rng.randrange(len(words)), rng.choice(extra))
+        corpus.append(' '.join(words))
+    return corpus
+
+
+def synthetic_keywords(count: int, seed: int) -> List[str]:
+    rng = random.Random(seed + 1)
+    return [''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 10)))
+            for _ in range(count)]
+
+
+def per_rule_scorer(matcher: UrgencyMatcher) -> Callable[[str], float]:
+    """Same semantics as the matcher, one regex search per rule."""
+    compiled = []
+    for rule in matcher.rules:
+        if rule.kind == 'regex':
+            pattern = rule.pattern
+        else:
+            pattern = r'(?<!\w)' + r'\s+'.join(re.escape(w) for w in rule.pattern.split()) + r'(?!\w)'
+        compiled.append((re.compile(pattern, re.IGNORECASE), rule.label, rule.weight))
+
+    def score(text: str) -> float:
+        matched = {}
+        for regex, label, weight in compiled:
+            if label not in matched and regex.search(text):
+                matched[label] = weight
+        return sum(matched.values())
+    return score
+
+
+def timed(fn: Callable[[str], object], corpus: List[str]) -> dict:
+    start = time.perf_counter()
+    results = [fn(text) for text in corpus]
+    seconds = time.perf_counter() - start
+    return {'results': results, 'seconds': round(seconds, 3),
+            'messages_per_second': round(len(corpus) / seconds),
+            'us_per_message': round(seconds / len(corpus) * 1e6, 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark urgency rule matching over a message corpus')
+    parser.add_argument('--messages', type=int, default=1_000_000, help='Messages in the corpus')
+    parser.add_argument('--extra-keywords', type=int, nargs='+', default=[0, 200],
+                        help='Synthetic keyword rules added to the handbook rules (one run each)')
+    parser.add_argument('--baseline-messages', type=int, default=100_000,
+                        help='Messages scored by the per_rule baseline')
+    parser.add_argument('--seed', type=int, default=42, help='Corpus RNG seed')
+    parser.add_argument('--output', default=None, help='Append results to this JSONL file')
+    args = parser.parse_args()
+
+    handbook = load_matcher(str(REPO_ROOT / 'AI_Employee_Vault'))
+    extra_all = synthetic_keywords(max(args.extra_keywords), args.seed)
+    corpus = make_corpus(args.messages, extra_all, args.seed)
+
+    lowered = [kw.lower() for kw in DEFAULT_KEYWORDS]
+    substring = timed(lambda text: any(kw in text.lower() for kw in lowered), corpus)
+    baseline = UrgencyMatcher([UrgencyRule(kw) for kw in DEFAULT_KEYWORDS])
+    word_bounded = [baseline.is_urgent(text) for text in corpus]
+    substring_only = sum(a and not b for a, b in zip(substring.pop('results'), word_bounded))
+
+    results = []
+    for extra in args.extra_keywords:
+        matcher = UrgencyMatcher(handbook.rules + [UrgencyRule(kw) for kw in extra_all[:extra]],
+                                 handbook.threshold)
+        sample = corpus[:args.baseline_messages]
+        per_rule = dict(timed(per_rule_scorer(matcher), sample), messages=len(sample))
+        compiled = timed(matcher.score, corpus)
+        scores = [result['score'] for result in compiled.pop('results')]
+        mismatches = sum(a != b for a, b in zip(per_rule.pop('results'), scores))
+        if mismatches:
+            raise SystemExit(f'per_rule and compiled disagree on {mismatches} messages')
+        results.append({
+            'benchmark': 'urgency',
+            'messages': len(corpus),
+            'rules': len(matcher.rules),
+            'threshold': matcher.threshold,
+            'high_priority': sum(score >= matcher.threshold for score in scores),
+            'substring': dict(substring, urgent_only_by_substring=substring_only),
+            'per_rule': per_rule,
+            'compiled': compiled,
+            'speedup_vs_per_rule': round(per_rule['us_per_message'] / compiled['us_per_message'], 2),
+        })
+    emit(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,604 @@
+#!/usr/bin/env python3
+"""
+Watcher Benchmarks
+==================
+
+Reproducible throughput numbers for the watchers and the LinkedIn poster,
+without live Gmail, WhatsApp Web or LinkedIn:
+
+- ``gmail``    GmailWatcher.poll_once against FakeGmailService; new mail
+               is delivered before every cycle (``--quota-units`` makes the
+               fake enforce a per-second quota, ``--limiter-units`` sets the
+               watcher's own quota limiter)
+- ``gmail_push`` delivery-to-action-file latency of GmailWatcher in push
+               mode (notifications posted to its local receiver) vs polling,
+               and API calls made while the mailbox is idle
+- ``gmail_accounts`` several mailboxes in one process (``account_watchers``),
+               each with its own FakeGmailService, polled on a shared
+               thread pool vs one after another; the first mailbox starts
+               with a backlog to drain
+- ``whatsapp`` WhatsAppWatcher.poll_once against FakeWhatsAppPage; a few
+               chats receive a message before every cycle, then
+               ``--idle-cycles`` polls see no new messages. Runs the bulk
+               chat-list extraction (one page.evaluate) and the
+               per-element path side by side
+- ``whatsapp_push`` arrival-to-action-file latency of WhatsAppWatcher in
+               push mode (MutationObserver binding) vs polling, and DOM
+               calls made while the chat list is idle; ``--browser`` runs
+               it in headless Chromium against
+               ``fixtures/whatsapp_chat_list.html`` instead of the fake
+- ``linkedin`` LinkedInPoster.find_pending_posts over a generated vault
+               (cold = first call incl. index build, then warm calls)
+
+Each scenario runs in its own process so ``peak_rss_mb`` is per scenario.
+Results are printed as JSON; ``--output`` appends them to a JSONL file for
+comparison across commits.
+
+Usage:
+    python benchmarks/bench_watchers.py
+    python benchmarks/bench_watchers.py --scenario gmail --messages 5000 --latency-ms 20
+    python benchmarks/bench_watchers.py --output bench_results.jsonl
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+import tempfile
+import subprocess
+from pathlib import Path
+
+from harness import Timer, emit, latency_summary, quiet_logging, working_directory
+from fakes import FakeGmailService, FakeWhatsAppPage
+from vault_gen import generate_vault
+
+FIXTURES = Path(__file__).resolve().parent / 'fixtures'
+SCENARIOS = ('gmail', 'gmail_push', 'gmail_accounts', 'whatsapp', 'whatsapp_push', 'linkedin')
+
+
+def bench_gmail(args, workdir: Path) -> dict:
+    from gmail_watcher import GmailWatcher
+    quiet_logging()
+
+    service = FakeGmailService(mailbox_size=args.backlog, latency=args.latency_ms / 1000,
+                               body_kb=args.body_kb, seed=args.seed, error_rate=args.error_rate,
+                               attachment_ratio=args.attachment_ratio, attachment_kb=args.attachment_kb,
+                               quota_units_per_second=args.quota_units, thread_size=args.thread_size)
+    watcher = GmailWatcher(str(workdir / 'vault'), str(workdir / 'credentials.json'),
+                           sync_mode=args.sync, batch_size=args.batch_size, drain=args.drain,
+                           cycle_messages=args.cycle_messages, cycle_bytes=args.cycle_bytes,
+                           fetch_mode=args.fetch, skip_labels=args.skip_labels,
+                           attachments=args.attachment_ratio > 0,
+                           attachment_workers=args.attachment_workers,
+                           quota_units_per_second=args.limiter_units, note_mode=args.note_mode)
+    watcher.service = service
+
+    timer = Timer()
+    remaining = args.messages
+    while remaining > 0:
+        batch = min(args.per_cycle, remaining)
+        service.deliver(batch)
+        remaining -= batch
+        with timer.measure():
+            timer.items += watcher.poll_once()
+    # Keep polling until the budgeted backlog is drained
+    delivery_cycles = len(timer.samples)
+    while watcher.backlog_remaining.value() and len(timer.samples) < delivery_cycles + args.max_drain_cycles:
+        with timer.measure():
+            timer.items += watcher.poll_once()
+    watcher.vault_writer.flush()
+
+    return timer.summary(
+        'gmail',
+        sync=args.sync,
+        batch_size=watcher.batch_size,
+        error_rate=args.error_rate,
+        cycles=len(timer.samples),
+        drain_cycles=len(timer.samples) - delivery_cycles,
+        backlog_left=int(watcher.backlog_remaining.value()),
+        cycle_budget={'messages': watcher.cycle_messages, 'bytes': watcher.cycle_bytes},
+        fetch=watcher.fetch_mode,
+        skipped=int(watcher.skipped.value()),
+        downloaded_bytes={
+            'metadata': int(watcher.metadata_bytes.value()),
+            'payload': int(watcher.payload_bytes.value()),
+            'per_cycle': round((watcher.metadata_bytes.value() + watcher.payload_bytes.value())
+                               / len(timer.samples)),
+        },
+        per_cycle=args.per_cycle,
+        api_latency_ms=args.latency_ms,
+        attachments={
+            'workers': watcher.attachment_workers,
+            'stored': int(watcher.attachments_stored.value()),
+            'deduplicated': int(watcher.attachments_deduplicated.value()),
+            'rejected': int(watcher.attachments_rejected.value()),
+            'bytes': int(watcher.attachment_bytes.value()),
+            'files': sum(1 for _ in (workdir / 'vault' / 'Attachments').glob('??/*')),
+        },
+        transport={
+            'server_quota_units': args.quota_units,
+            'limiter_units': args.limiter_units,
+            'throttled': int(watcher.transport.throttled.value()),
+            'throttle_wait_s': round(watcher.transport.throttle_wait.value(), 3),
+            'rate_limited': int(watcher.transport.rate_limited.value()),
+            'retried': int(watcher.transport.retried.value()),
+            'circuit_opens': int(watcher.transport.circuit_opens.value()),
+        },
+        api_calls=dict(service.calls),
+        api_calls_per_item=round(sum(service.calls.values()) / timer.items, 2) if timer.items else None,
+        notes={
+            'mode': watcher.note_mode,
+            'thread_size': args.thread_size,
+            'thread_appends': int(watcher.thread_appends.value()),
+            'bytes': sum(p.stat().st_size for p in watcher.needs_action.glob('EMAIL_*.md')),
+        },
+        action_files=len(list(watcher.needs_action.glob('EMAIL_*.md'))),
+    )
+
+
+def _gmail_push_run(args, vault: Path, push: bool) -> dict:
+    """Deliver mail at random times to a running watcher; time each action file."""
+    from gmail_watcher import GmailWatcher
+    from gmail_push import publish
+    from scheduling import FixedInterval
+
+    service = FakeGmailService(latency=args.latency_ms / 1000, body_kb=args.body_kb, seed=args.seed)
+    watcher = GmailWatcher(str(vault), str(vault.parent / 'credentials.json'), skip_labels='')
+    watcher.service = service
+    watcher.check_for_updates()  # first resync stores the history cursor
+
+    # Both runs share the process-wide metrics registry: report deltas
+    def counters():
+        return (watcher.metrics.cycles.value(watcher=watcher.watcher_name),
+                watcher.push_notifications.value(), watcher.push_ignored.value())
+    baseline = counters()
+
+    receiver = None
+    if push:
+        receiver = watcher.start_push(port=0, safety_interval=args.safety_interval,
+                                      coalesce_seconds=args.push_coalesce_ms / 1000)
+    else:
+        watcher.schedule = FixedInterval(args.poll_interval)
+
+    delivered, created = {}, {}
+    create_action_file = watcher.create_action_file
+
+    def timed_create(message):
+        path = create_action_file(message)
+        created[message['id']] = time.perf_counter()
+        return path
+
+    watcher.create_action_file = timed_create
+    thread = threading.Thread(target=watcher.run, daemon=True)
+    thread.start()
+
+    rng = random.Random(args.seed)
+    for _ in range(args.push_messages):
+        time.sleep(rng.expovariate(1000 / args.arrival_ms))
+        msg_id = service.deliver(1)[0]
+        delivered[msg_id] = time.perf_counter()
+        if receiver:
+            publish(receiver.url, 'me@example.com', service.history_id)
+
+    deadline = time.perf_counter() + args.poll_interval * 2 + 5
+    while len(created) < len(delivered) and time.perf_counter() < deadline:
+        time.sleep(0.01)
+
+    # Idle mailbox: count the calls each mode makes while nothing arrives
+    busy_calls = sum(service.calls.values())
+    time.sleep(args.idle_seconds)
+    idle_calls = sum(service.calls.values()) - busy_calls
+
+    watcher.stop()
+    thread.join()
+    if receiver:
+        receiver.stop()
+    watcher.vault_writer.flush()
+
+    latencies = [created[i] - delivered[i] for i in delivered if i in created]
+    cycles, notifications, ignored = (int(b - a) for a, b in zip(baseline, counters()))
+    return {
+        'latency_ms': latency_summary(latencies),
+        'action_files': len(created),
+        'cycles': cycles,
+        'notifications': notifications,
+        'notifications_ignored': ignored,
+        'api_calls': dict(service.calls),
+        'idle_api_calls': idle_calls,
+    }
+
+
+def bench_gmail_push(args, workdir: Path) -> dict:
+    quiet_logging()
+    push = _gmail_push_run(args, workdir / 'push' / 'vault', push=True)
+    poll = _gmail_push_run(args, workdir / 'poll' / 'vault', push=False)
+    return {
+        'benchmark': 'gmail_push',
+        'messages': args.push_messages,
+        'mean_arrival_ms': args.arrival_ms,
+        'poll_interval': args.poll_interval,
+        'push_coalesce_ms': args.push_coalesce_ms,
+        'idle_seconds': args.idle_seconds,
+        'push': push,
+        'poll': poll,
+    }
+
+
+def _gmail_accounts_run(args, vault: Path, workers: int) -> dict:
+    """Poll every account once per cycle on a pool of ``workers`` threads."""
+    from concurrent.futures import ThreadPoolExecutor
+    from gmail_watcher import account_watchers
+
+    names = [f'acct{i}' for i in range(args.accounts)]
+    watchers = account_watchers(str(vault), str(vault.parent / 'credentials.json'), names,
+                                drain=True, skip_labels='', quota_units_per_second=args.limiter_units)
+    services = []
+    for i, watcher in enumerate(watchers):
+        watcher.service = FakeGmailService(mailbox_size=args.account_backlog if i == 0 else 0,
+                                           latency=args.latency_ms / 1000, body_kb=args.body_kb,
+                                           seed=args.seed + i)
+        services.append(watcher.service)
+
+    timer = Timer()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for _ in range(args.account_cycles):
+            for service in services:
+                service.deliver(args.per_cycle)
+            with timer.measure():
+                timer.items += sum(pool.map(lambda w: w.poll_once(), watchers))
+    for watcher in watchers:
+        watcher.vault_writer.flush()
+
+    files = list(watchers[0].needs_action.glob('EMAIL_*.md'))
+    tagged = {name: 0 for name in names}
+    for path in files:
+        for line in path.read_text(encoding='utf-8').splitlines():
+            if line.startswith('account:'):
+                tagged[line.split(':', 1)[1].strip()] += 1
+                break
+    return timer.summary(
+        'gmail_accounts',
+        workers=workers,
+        cycle_messages_per_account=watchers[0].cycle_messages,
+        action_files_by_account=tagged,
+        backlog_left=int(watchers[0].backlog_remaining.value()),
+        api_calls=sum(sum(s.calls.values()) for s in services),
+    )
+
+
+def bench_gmail_accounts(args, workdir: Path) -> dict:
+    quiet_logging()
+    workers = args.account_workers or args.accounts
+    return {
+        'benchmark': 'gmail_accounts',
+        'accounts': args.accounts,
+        'per_cycle': args.per_cycle,
+        'api_latency_ms': args.latency_ms,
+        'shared_pool': _gmail_accounts_run(args, workdir / 'pool' / 'vault', workers),
+        'one_at_a_time': _gmail_accounts_run(args, workdir / 'serial' / 'vault', 1),
+    }
+
+
+def _whatsapp_run(args, vault: Path, extraction: str) -> dict:
+    """Poll a fake chat list that receives a few messages before every cycle."""
+    from whatsapp_watcher import WhatsAppWatcher
+
+    page = FakeWhatsAppPage(chats=args.chats, unread_ratio=args.unread_ratio,
+                            latency=args.dom_latency_ms / 1000, seed=args.seed)
+    watcher = WhatsAppWatcher(str(vault), str(vault.parent / 'session'), extraction=extraction)
+    watcher.page = page
+
+    timer = Timer()
+    for _ in range(args.cycles):
+        for _ in range(args.arrivals):
+            page.receive(page.rng.randrange(len(page.chats)))
+        with timer.measure():
+            timer.items += watcher.poll_once()
+    watcher.vault_writer.flush()
+    files_after_delivery = len(list(watcher.needs_action.glob('WHATSAPP_*.md')))
+
+    # Idle chat list (chats still unread, nothing new): no new action files expected
+    idle_items = 0
+    for _ in range(args.idle_cycles):
+        idle_items += watcher.poll_once()
+    watcher.vault_writer.flush()
+
+    return timer.summary(
+        'whatsapp',
+        extraction=extraction,
+        idle_cycles=args.idle_cycles,
+        idle_items=idle_items,
+        action_files_after_delivery=files_after_delivery,
+        unread_chats=sum(1 for chat in page.chats if chat['unread']),
+        dom_calls=dict(page.calls),
+        dom_calls_per_cycle=round(sum(page.calls.values()) / args.cycles, 1),
+        action_files=len(list(watcher.needs_action.glob('WHATSAPP_*.md'))),
+    )
+
+
+def bench_whatsapp(args, workdir: Path) -> dict:
+    quiet_logging()
+    modes = [args.extraction] if args.extraction else ['bulk', 'elements']
+    result = {
+        'benchmark': 'whatsapp',
+        'cycles': args.cycles,
+        'chats': args.chats,
+        'dom_latency_ms': args.dom_latency_ms,
+    }
+    for mode in modes:
+        result[mode] = _whatsapp_run(args, workdir / mode / 'vault', mode)
+    return result
+
+
+def _first_after(arrivals, created) -> list:
+    """Seconds from each (time, chat) arrival to the chat's next action file."""
+    latencies = []
+    for arrived_at, chat in arrivals:
+        later = [at for name, at in created if name == chat and at >= arrived_at]
+        if later:
+            latencies.append(min(later) - arrived_at)
+    return latencies
+
+
+def _whatsapp_watcher(args, vault: Path, push: bool):
+    from whatsapp_watcher import WhatsAppWatcher
+    from scheduling import FixedInterval
+
+    watcher = WhatsAppWatcher(str(vault), str(vault.parent / 'session'), push=push,
+                              safety_interval=args.wa_safety_interval,
+                              push_coalesce=args.wa_coalesce_ms / 1000)
+    if not push:
+        watcher.schedule = FixedInterval(args.wa_poll_interval)
+    created = []
+    create_action_file = watcher.create_action_file
+
+    def timed_create(message):
+        path = create_action_file(message)
+        created.append((message['from'], time.perf_counter()))
+        return path
+
+    watcher.create_action_file = timed_create
+    return watcher, created
+
+
+def _whatsapp_push_run(args, vault: Path, push: bool) -> dict:
+    """Messages land in the fake chat list at random times while the watcher runs."""
+    page = FakeWhatsAppPage(chats=args.chats, unread_ratio=0, latency=args.dom_latency_ms / 1000,
+                            seed=args.seed)
+    rng = random.Random(args.seed)
+    arrivals, at = [], 0.0
+    for _ in range(args.wa_messages):
+        at += rng.expovariate(1000 / args.arrival_ms)
+        arrivals.append((at, rng.randrange(args.chats), f'URGENT: message {len(arrivals)}'))
+    watcher, created = _whatsapp_watcher(args, vault, push)
+    watcher.page = page
+    # Both runs share the process-wide metrics registry: report deltas
+    cycles_before = watcher.metrics.cycles.value(watcher=watcher.watcher_name)
+    mutations_before = watcher.mutations.value()
+
+    thread = threading.Thread(target=watcher.run, daemon=True)
+    page.schedule_arrivals(arrivals)
+    thread.start()
+    deadline = time.perf_counter() + at + args.wa_poll_interval * 2 + 5
+    while time.perf_counter() < deadline and (
+            len(page.arrived) < len(arrivals) or len(_first_after(page.arrived, created)) < len(arrivals)):
+        time.sleep(0.01)
+
+    # Idle chat list: count the DOM calls each mode makes while nothing changes
+    busy_calls = sum(n for method, n in page.calls.items() if method != 'dom.wait_for_timeout')
+    time.sleep(args.idle_seconds)
+    idle_calls = sum(n for method, n in page.calls.items() if method != 'dom.wait_for_timeout') - busy_calls
+
+    watcher.stop()
+    thread.join()
+    watcher.vault_writer.flush()
+    return {
+        'latency_ms': latency_summary(_first_after(page.arrived, created)),
+        'messages': len(arrivals),
+        'cycles': int(watcher.metrics.cycles.value(watcher=watcher.watcher_name) - cycles_before),
+        'mutations_reported': int(watcher.mutations.value() - mutations_before),
+        'dom_calls': dict(page.calls),
+        'idle_dom_calls': idle_calls,
+    }
+
+
+def _whatsapp_browser_run(args, vault: Path, push: bool) -> dict:
+    """The same, in headless Chromium against the fixture page (its own timer delivers messages)."""
+    from playwright.sync_api import sync_playwright
+
+    watcher, created = _whatsapp_watcher(args, vault, push)
+    fixture = (f"{(FIXTURES / 'whatsapp_chat_list.html').as_uri()}"
+               f"?chats={args.chats}&arrival_ms={args.arrival_ms}&urgent=1&seed={args.seed}")
+    result = {}
+
+    def drive():
+        # Playwright's sync API stays on the thread that started it
+        with sync_playwright() as playwright:
+            browser = playwright.chromium.launch(headless=True)
+            watcher.page = browser.new_page()
+            watcher.page.goto(fixture)
+            started = time.time()
+            watcher.run()
+            log = watcher.page.evaluate('window.fixture.log')
+            browser.close()
+        # Fixture times are epoch ms; line them up with the perf_counter stamps
+        offset = time.perf_counter() - time.time()
+        arrivals = [(entry['at'] / 1000 + offset, entry['chat']) for entry in log
+                    if entry['at'] / 1000 >= started]
+        result.update(latency_ms=latency_summary(_first_after(arrivals, created)),
+                      messages=len(arrivals), mutations_reported=int(watcher.mutations.value()))
+
+    thread = threading.Thread(target=drive, daemon=True)
+    thread.start()
+    time.sleep(args.wa_messages * args.arrival_ms / 1000 + 1)
+    watcher.stop()
+    thread.join()
+    return result
+
+
+def bench_whatsapp_push(args, workdir: Path) -> dict:
+    quiet_logging()
+    run = _whatsapp_browser_run if args.browser else _whatsapp_push_run
+    return {
+        'benchmark': 'whatsapp_push',
+        'page': 'chromium fixture' if args.browser else 'fake',
+        'chats': args.chats,
+        'mean_arrival_ms': args.arrival_ms,
+        'coalesce_ms': args.wa_coalesce_ms,
+        'push': run(args, workdir / 'push' / 'vault', push=True),
+        'poll': dict(run(args, workdir / 'poll' / 'vault', push=False), interval_s=args.wa_poll_interval),
+    }
+
+
+def bench_linkedin(args, workdir: Path) -> dict:
+    vault = workdir / 'vault'
+    generate_vault(vault, args.notes, args.body_kb, args.pending_posts, seed=args.seed)
+
+    from linkedin_poster import LinkedInPoster
+    quiet_logging()
+
+    cold = Timer()
+    with cold.measure():
+        poster = LinkedInPoster(str(vault))
+        cold.items = len(poster.find_pending_posts())
+
+    timer = Timer()
+    for _ in range(args.repeat):
+        with timer.measure():
+            timer.items += len(poster.find_pending_posts())
+
+    return timer.summary(
+        'linkedin_find_pending_posts',
+        notes=args.notes,
+        pending_posts=cold.items,
+        calls=args.repeat,
+        cold_seconds=round(cold.elapsed, 4),
+    )
+
+
+RUNNERS = {'gmail': bench_gmail, 'gmail_push': bench_gmail_push, 'gmail_accounts': bench_gmail_accounts,
+           'whatsapp': bench_whatsapp, 'whatsapp_push': bench_whatsapp_push, 'linkedin': bench_linkedin}
+
+
+def run_scenario(args) -> dict:
+    with tempfile.TemporaryDirectory(prefix=f'bench_{args.scenario}_') as tmp:
+        workdir = Path(tmp)
+        with working_directory(workdir):
+            return RUNNERS[args.scenario](args, workdir)
+
+
+def run_isolated(scenario: str, argv) -> dict:
+    """Run one scenario in a fresh interpreter and parse its JSON result."""
+    cmd = [sys.executable, __file__, '--scenario', scenario, '--raw'] + list(argv)
+    completed = subprocess.run(cmd, capture_output=True, text=True)
+    if completed.returncode != 0:
+        return {'benchmark': scenario, 'error': completed.stderr.strip().splitlines()[-1:]}
+    return json.loads(completed.stdout)
+
+
+def _strip_options(argv, *options):
+    """Drop ``--opt value`` / ``--opt=value`` pairs from argv."""
+    kept, skip = [], False
+    for arg in argv:
+        if skip:
+            skip = False
+        elif arg in options:
+            skip = True
+        elif not arg.startswith(tuple(f'{o}=' for o in options)):
+            kept.append(arg)
+    return kept
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the watchers against in-process fakes')
+    parser.add_argument('--scenario', choices=SCENARIOS + ('all',), default='all', help='What to run')
+    parser.add_argument('--output', default=None, help='Append results to this JSONL file')
+    parser.add_argument('--seed', type=int, default=42, help='RNG seed')
+    parser.add_argument('--raw', action='store_true', help=argparse.SUPPRESS)
+
+    gmail = parser.add_argument_group('gmail')
+    gmail.add_argument('--messages', type=int, default=2000, help='New messages delivered in total')
+    gmail.add_argument('--per-cycle', type=int, default=10, help='Messages delivered before each poll')
+    gmail.add_argument('--backlog', type=int, default=0, help='Unread messages already in the mailbox')
+    gmail.add_argument('--latency-ms', type=float, default=0.0, help='Simulated API latency per call')
+    gmail.add_argument('--sync', choices=('history', 'list'), default='history', help='GmailWatcher sync mode')
+    gmail.add_argument('--batch-size', type=int, default=50, help='Messages per batch request (1 = serial)')
+    gmail.add_argument('--error-rate', type=float, default=0.0, help='Fraction of messages.get calls that fail')
+    gmail.add_argument('--drain', action='store_true', help='Resync pages through the whole backlog')
+    gmail.add_argument('--cycle-messages', type=int, default=None, help='Per-cycle message budget')
+    gmail.add_argument('--cycle-bytes', type=int, default=None, help='Per-cycle byte budget (0 = none)')
+    gmail.add_argument('--fetch', choices=('two-phase', 'full'), default='two-phase',
+                       help='Metadata first, or the full payload for every message')
+    gmail.add_argument('--skip-labels', default=None, help='Labels the relevance check drops')
+    gmail.add_argument('--attachment-ratio', type=float, default=0.0,
+                       help='Fraction of messages with an attachment (> 0 turns downloads on)')
+    gmail.add_argument('--attachment-kb', type=int, default=256, help='Attachment size')
+    gmail.add_argument('--attachment-workers', type=int, default=4, help='Parallel attachment downloads')
+    gmail.add_argument('--quota-units', type=float, default=0,
+                       help='Quota units per second the fake accepts before answering 429 (0 = unlimited)')
+    gmail.add_argument('--limiter-units', type=float, default=250,
+                       help="Watcher's quota limiter in units per second (0 = off)")
+    gmail.add_argument('--note-mode', choices=('thread', 'message'), default='thread',
+                       help='One action file per conversation, or one per email')
+    gmail.add_argument('--thread-size', type=int, default=3, help='Messages per conversation in the fake mailbox')
+    gmail.add_argument('--max-drain-cycles', type=int, default=1000, help='Extra polls allowed to drain the backlog')
+
+    gmail_push = parser.add_argument_group('gmail_push')
+    gmail_push.add_argument('--push-messages', type=int, default=100, help='Messages delivered')
+    gmail_push.add_argument('--arrival-ms', type=float, default=50, help='Mean gap between arrivals')
+    gmail_push.add_argument('--poll-interval', type=float, default=2.0, help='Interval of the polling run')
+    gmail_push.add_argument('--push-coalesce-ms', type=float, default=50, help='Notification coalescing window')
+    gmail_push.add_argument('--safety-interval', type=float, default=60, help='Safety-net poll in push mode')
+    gmail_push.add_argument('--idle-seconds', type=float, default=5, help='Idle time measured after delivery')
+
+    gmail_accounts = parser.add_argument_group('gmail_accounts')
+    gmail_accounts.add_argument('--accounts', type=int, default=4, help='Mailboxes watched')
+    gmail_accounts.add_argument('--account-workers', type=int, default=None,
+                                help='Shared pool size (default: one per account)')
+    gmail_accounts.add_argument('--account-cycles', type=int, default=20, help='Poll cycles')
+    gmail_accounts.add_argument('--account-backlog', type=int, default=1000,
+                                help='Unread mail waiting in the first mailbox')
+
+    whatsapp = parser.add_argument_group('whatsapp')
+    whatsapp.add_argument('--chats', type=int, default=200, help='Chats in the list')
+    whatsapp.add_argument('--unread-ratio', type=float, default=0.3, help='Chats unread at start')
+    whatsapp.add_argument('--cycles', type=int, default=50, help='Poll cycles')
+    whatsapp.add_argument('--arrivals', type=int, default=3, help='Messages arriving before each poll')
+    whatsapp.add_argument('--dom-latency-ms', type=float, default=0.5, help='Simulated CDP round trip')
+    whatsapp.add_argument('--idle-cycles', type=int, default=10,
+                          help='Polls after the last arrival, with nothing new')
+    whatsapp.add_argument('--extraction', choices=('bulk', 'elements'), default=None,
+                          help='Chat-list extraction path (default: run both)')
+
+    whatsapp_push = parser.add_argument_group('whatsapp_push (also --chats, --arrival-ms, --idle-seconds)')
+    whatsapp_push.add_argument('--wa-messages', type=int, default=50, help='Messages arriving')
+    whatsapp_push.add_argument('--wa-poll-interval', type=float, default=5.0, help='Interval of the polling run')
+    whatsapp_push.add_argument('--wa-coalesce-ms', type=float, default=250, help='Change coalescing window')
+    whatsapp_push.add_argument('--wa-safety-interval', type=float, default=60, help='Safety-net poll in push mode')
+    whatsapp_push.add_argument('--browser', action='store_true',
+                               help='Headless Chromium on the fixture page (needs playwright install chromium)')
+
+    linkedin = parser.add_argument_group('linkedin')
+    linkedin.add_argument('--notes', type=int, default=10000, help='Notes in the generated vault')
+    linkedin.add_argument('--pending-posts', type=int, default=None, help='Posts in Pending_Approval')
+    linkedin.add_argument('--repeat', type=int, default=20, help='Warm find_pending_posts calls')
+
+    parser.add_argument('--body-kb', type=int, default=2, help='Email/note body size in KB')
+    args = parser.parse_args()
+
+    if args.scenario != 'all':
+        result = run_scenario(args)
+        if args.raw:
+            print(json.dumps(result))
+        else:
+            emit(result, args.output)
+        return
+
+    passthrough = _strip_options(sys.argv[1:], '--scenario', '--output')
+    emit([run_isolated(name, passthrough) for name in SCENARIOS], args.output)
+
+
+if __name__ == '__main__':
+    main()
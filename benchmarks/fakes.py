@@ -0,0 +1,806 @@
+"""
+Benchmark Fakes
+===============
+
+In-process stand-ins for the external services the watchers talk to, so
+throughput can be measured without Gmail, WhatsApp Web or a browser.
+
+- ``FakeGmailService`` mimics ``build('gmail', 'v1', ...)``: the
+  ``users().messages().list/get``, ``users().messages().attachments().get``,
+  ``users().history().list``, ``users().watch`` and
+  ``users().getProfile`` calls and ``new_batch_http_request()``, with a
+  synthetic mailbox of configurable size (spread over Gmail's category
+  tabs), a history log with configurable retention, per-call latency, an
+  injectable error rate, a per-second quota answered with 429 +
+  ``Retry-After`` (as Gmail enforces its per-user limit), outages and
+  ``fields`` partial responses
+- ``FakeWhatsAppPage`` mimics the Playwright ``Page`` / ``ElementHandle``
+  calls ``WhatsAppWatcher`` makes against the chat-list DOM (element by
+  element, or one ``page.evaluate`` of its chat-list script), with a
+  per-round-trip latency standing in for the CDP hop. Messages can be
+  scheduled to arrive while the watcher runs, and the push-mode observer
+  binding is called the way Playwright calls it: only while the watcher
+  is inside a page call
+
+Both count every call in ``.calls`` so benchmarks can report API/DOM calls
+per item.
+"""
+
+import re
+import time
+import heapq
+import base64
+import random
+import threading
+from collections import Counter, deque
+from typing import Dict, List, Optional
+
+from harness import REPO_ROOT  # noqa: F401  (puts the repo on sys.path)
+from gmail_transport import QUOTA_UNITS, DEFAULT_QUOTA_UNITS
+
+SENDERS = [
+    ('Alice Johnson', 'alice@example.com'),
+    ('Bob Smith', 'bob@client.example'),
+    ('Carol White', 'carol@vendor.example'),
+    ('Dan Brown', 'dan@example.org'),
+    ('Billing', 'billing@saas.example'),
+]
+
+SUBJECTS = [
+    'Invoice #{n} due',
+    'Re: project update {n}',
+    'URGENT: payment failed ({n})',
+    'Meeting notes {n}',
+    'Quick question about order {n}',
+    'Newsletter issue {n}',
+]
+
+PHRASES = [
+    'Can you take a look at this when you have a moment?',
+    'Please send the invoice asap.',
+    'Thanks for the update, looks good.',
+    'Payment is overdue, this is urgent.',
+    'Lunch tomorrow?',
+    'Need help with the deployment.',
+    'See attached for details.',
+]
+
+
+# Gmail category tabs with their share of the mailbox; promotions and
+# social mail carry heavy HTML like real newsletters
+CATEGORIES = [
+    ('CATEGORY_PERSONAL', 0.55),
+    ('CATEGORY_UPDATES', 0.15),
+    ('CATEGORY_PROMOTIONS', 0.2),
+    ('CATEGORY_SOCIAL', 0.1),
+]
+BULK_CATEGORIES = {'CATEGORY_PROMOTIONS', 'CATEGORY_SOCIAL'}
+
+
+def _b64(text: str) -> str:
+    return base64.urlsafe_b64encode(text.encode('utf-8')).decode('ascii')
+
+
+def _split_fields(fields: str) -> List[str]:
+    """Split a fields mask on top-level commas."""
+    items, depth, start = [], 0, 0
+    for i, ch in enumerate(fields):
+        if ch == '(':
+            depth += 1
+        elif ch == ')':
+            depth -= 1
+        elif ch == ',' and depth == 0:
+            items.append(fields[start:i])
+            start = i + 1
+    items.append(fields[start:])
+    return [item.strip() for item in items if item.strip()]
+
+
+def select_fields(resource, fields: Optional[str]):
+    """Apply a partial-response ``fields`` mask (``a,b/c,d(e,f)``) like the API does."""
+    if not fields:
+        return resource
+    if isinstance(resource, list):
+        return [select_fields(item, fields) for item in resource]
+    if not isinstance(resource, dict):
+        return resource
+    result = {}
+    for item in _split_fields(fields):
+        if '(' in item and (item.find('/') < 0 or item.index('(') < item.index('/')):
+            name, sub = item[:item.index('(')], item[item.index('(') + 1:-1]
+        elif '/' in item:
+            name, sub = item.split('/', 1)
+        else:
+            name, sub = item, None
+        if name in resource:
+            value = resource[name] if sub is None else select_fields(resource[name], sub)
+            if name in result and isinstance(value, dict):
+                result[name].update(value)
+            else:
+                result[name] = value
+    return result
+
+
+class FakeHttpError(Exception):
+    """Shaped like ``googleapiclient.errors.HttpError`` (``resp.status``)."""
+
+    class _Resp(dict):
+        def __init__(self, status: int, retry_after: float = None):
+            super().__init__()
+            self.status = status
+            if retry_after is not None:
+                self['retry-after'] = str(retry_after)
+
+    def __init__(self, status: int, reason: str = '', retry_after: float = None):
+        super().__init__(f'HTTP {status}: {reason}')
+        self.resp = self._Resp(status, retry_after)
+        self.status_code = status
+        self.reason = reason
+
+
+class _Request:
+    """Deferred call; ``execute()`` applies the latency and returns the response."""
+
+    def __init__(self, service: 'FakeGmailService', method: str, handler, kwargs: Dict):
+        self._service = service
+        self._method = method
+        self._handler = handler
+        self._kwargs = kwargs
+
+    def execute(self, http=None, num_retries: int = 0):
+        with self._service.lock:
+            self._service.calls[self._method] += 1
+        self._service.sleep()
+        with self._service.lock:
+            self._service.admit(self._method)
+            return self._handler(**self._kwargs)
+
+
+class _Batch:
+    """``BatchHttpRequest``: many calls, one round trip, one callback per call."""
+
+    def __init__(self, service: 'FakeGmailService', callback=None):
+        self._service = service
+        self._callback = callback
+        self._requests = []
+
+    def add(self, request: _Request, callback=None, request_id: str = None):
+        if len(self._requests) >= FakeGmailService.MAX_BATCH_SIZE:
+            raise ValueError(f'Exceeded the maximum calls({FakeGmailService.MAX_BATCH_SIZE}) '
+                             'in a single batch request.')
+        self._requests.append((request_id or str(len(self._requests) + 1), request, callback))
+
+    def execute(self, http=None):
+        with self._service.lock:
+            self._service.calls['batch'] += 1
+            self._service.admit('batch', units=0)
+        self._service.sleep()
+        for request_id, request, callback in self._requests:
+            try:
+                with self._service.lock:
+                    self._service.calls[request._method] += 1
+                    self._service.admit(request._method)
+                    response, exception = request._handler(**request._kwargs), None
+            except FakeHttpError as e:
+                response, exception = None, e
+            (callback or self._callback)(request_id, response, exception)
+
+
+class _Messages:
+    def __init__(self, service: 'FakeGmailService'):
+        self._service = service
+
+    def list(self, **kwargs) -> _Request:
+        return _Request(self._service, 'messages.list', self._service.handle_list, kwargs)
+
+    def get(self, **kwargs) -> _Request:
+        return _Request(self._service, 'messages.get', self._service.handle_get, kwargs)
+
+    def attachments(self) -> '_Attachments':
+        return _Attachments(self._service)
+
+
+class _Attachments:
+    def __init__(self, service: 'FakeGmailService'):
+        self._service = service
+
+    def get(self, **kwargs) -> _Request:
+        return _Request(self._service, 'attachments.get', self._service.handle_attachment_get, kwargs)
+
+
+class _History:
+    def __init__(self, service: 'FakeGmailService'):
+        self._service = service
+
+    def list(self, **kwargs) -> _Request:
+        return _Request(self._service, 'history.list', self._service.handle_history_list, kwargs)
+
+
+class _Users:
+    def __init__(self, service: 'FakeGmailService'):
+        self._service = service
+
+    def messages(self) -> _Messages:
+        return _Messages(self._service)
+
+    def history(self) -> _History:
+        return _History(self._service)
+
+    def getProfile(self, **kwargs) -> _Request:
+        return _Request(self._service, 'getProfile', self._service.handle_get_profile, kwargs)
+
+    def watch(self, **kwargs) -> _Request:
+        return _Request(self._service, 'watch', self._service.handle_watch, kwargs)
+
+
+class FakeGmailService:
+    """
+    Synthetic Gmail API resource.
+
+    Messages are generated deterministically from ``seed``; ``deliver(n)``
+    adds new unread mail at the top of the inbox, as the real API would show
+    it between polls. Every change is also appended to a history log served
+    by ``history().list``; records older than ``history_retention`` (or all
+    of them, after ``expire_history()``) answer 404 like an expired
+    ``startHistoryId``.
+    """
+
+    MAX_BATCH_SIZE = 100
+
+    def __init__(self, mailbox_size: int = 0, latency: float = 0.0, jitter: float = 0.0,
+                 body_kb: int = 2, seed: int = 42, history_retention: int = 10000,
+                 error_rate: float = 0.0, attachment_ratio: float = 0.0,
+                 attachment_kb: int = 256, distinct_attachments: int = 20,
+                 quota_units_per_second: float = 0, thread_size: int = 3):
+        """
+        Args:
+            mailbox_size: Unread messages present at start
+            latency: Seconds added to every ``execute()``
+            jitter: Extra uniform random latency, up to this many seconds
+            body_kb: Approximate text/plain body size per message
+            seed: RNG seed (same seed, same mailbox)
+            history_retention: History records kept before the oldest expire
+            error_rate: Fraction of messages.get calls failing with 429/503
+            attachment_ratio: Fraction of messages carrying an attachment
+            attachment_kb: Size of each attachment
+            distinct_attachments: Size of the pool attachments are drawn
+                from (the same file reaches several messages)
+            quota_units_per_second: Quota units accepted per sliding second
+                (0 = unlimited); calls beyond it get 429 with Retry-After
+            thread_size: Consecutive messages sharing one threadId
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.body_kb = body_kb
+        self.thread_size = max(1, thread_size)
+        self.rng = random.Random(seed)
+        self.error_rate = error_rate
+        self.fault_rng = random.Random(seed + 1)
+        self.calls = Counter()
+        self.lock = threading.Lock()
+        self.quota_units_per_second = quota_units_per_second
+        self.rate_limited = 0
+        self._quota_window = deque()  # (time, units) admitted in the last second
+        self._quota_used = 0
+        self.outage_until = 0.0
+        self.attachment_ratio = attachment_ratio
+        self.attachment_kb = attachment_kb
+        self.distinct_attachments = distinct_attachments
+        self.attachments: Dict[str, bytes] = {}
+        self._blobs: Dict[int, bytes] = {}
+        self.watch_topic = None
+        self.history_id = 1000
+        self.history: List[Dict] = []
+        self.history_retention = history_retention
+        self.history_floor = self.history_id  # oldest startHistoryId still answerable
+        self.messages: Dict[str, Dict] = {}
+        self.order: List[str] = []  # oldest first
+        self._next = 0
+        self.deliver(mailbox_size)
+
+    # ------------------------------------------------------------- resource
+
+    def users(self) -> _Users:
+        return _Users(self)
+
+    def new_batch_http_request(self, callback=None) -> _Batch:
+        return _Batch(self, callback)
+
+    def admit(self, method: str, units: float = None):
+        """Apply outages and the per-second quota to one call (caller holds the lock)."""
+        now = time.monotonic()
+        if now < self.outage_until:
+            raise FakeHttpError(503, 'Backend Error')
+        if not self.quota_units_per_second:
+            return
+        if units is None:
+            units = QUOTA_UNITS.get(method, DEFAULT_QUOTA_UNITS)
+        while self._quota_window and now - self._quota_window[0][0] >= 1.0:
+            self._quota_used -= self._quota_window.popleft()[1]
+        if self._quota_used + units > self.quota_units_per_second:
+            self.rate_limited += 1
+            retry_in = 1.0 - (now - self._quota_window[0][0]) if self._quota_window else 1.0
+            raise FakeHttpError(429, 'Rate Limit Exceeded', retry_after=round(retry_in, 3))
+        self._quota_window.append((now, units))
+        self._quota_used += units
+
+    def outage(self, seconds: float):
+        """Answer every call with 503 for the next ``seconds``."""
+        with self.lock:
+            self.outage_until = time.monotonic() + seconds
+
+    def sleep(self):
+        delay = self.latency + (self.rng.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+
+    # -------------------------------------------------------------- mailbox
+
+    def deliver(self, count: int) -> List[str]:
+        """Add ``count`` new unread messages; returns their IDs (thread-safe)."""
+        with self.lock:
+            return [self._deliver_one() for _ in range(count)]
+
+    def _deliver_one(self) -> str:
+        message = self._make_message(self._next)
+        self._next += 1
+        self.messages[message['id']] = message
+        self.order.append(message['id'])
+        self._record('messagesAdded', message)
+        return message['id']
+
+    def mark_read(self, message_ids):
+        for msg_id in message_ids:
+            message = self.messages[msg_id]
+            if 'UNREAD' in message['labelIds']:
+                message['labelIds'].remove('UNREAD')
+                self._record('labelsRemoved', message, ['UNREAD'])
+
+    def expire_history(self):
+        """Drop the whole history log (every stored historyId now 404s)."""
+        self.history.clear()
+        self.history_floor = self.history_id + 1
+
+    def _record(self, kind: str, message: Dict, label_ids: List[str] = None):
+        self.history_id += 1
+        message['historyId'] = str(self.history_id)
+        change = {'message': {'id': message['id'], 'threadId': message['threadId'],
+                              'labelIds': list(message['labelIds'])}}
+        if label_ids:
+            change['labelIds'] = list(label_ids)
+        self.history.append({'id': str(self.history_id), 'messages': [change['message']],
+                             kind: [change]})
+        if len(self.history) > self.history_retention:
+            dropped = self.history.pop(0)
+            self.history_floor = int(dropped['id'])
+
+    def _make_message(self, n: int) -> Dict:
+        rng = self.rng
+        name, address = rng.choice(SENDERS)
+        subject = rng.choice(SUBJECTS).format(n=n)
+        sentences = []
+        size = 0
+        while size < self.body_kb * 1024:
+            phrase = rng.choice(PHRASES)
+            sentences.append(phrase)
+            size += len(phrase) + 1
+        text = ' '.join(sentences)
+        category = rng.choices([c for c, _ in CATEGORIES], [w for _, w in CATEGORIES])[0]
+        if category in BULK_CATEGORIES:
+            styled = ''.join(f'<td style="font-family:Arial,sans-serif;font-size:14px;'
+                             f'color:#333333;padding:8px">{s}</td>' for s in sentences)
+            html = f'<html><body><table width="100%"><tr>{styled}</tr></table></body></html>'
+        else:
+            html = f'<html><body><p>{text}</p></body></html>'
+        msg_id = f'{0x18d0000000 + n:x}'
+        message = {
+            'id': msg_id,
+            'threadId': f'{0x18d0000000 + n - n % self.thread_size:x}',
+            'labelIds': ['INBOX', 'UNREAD', category],
+            'snippet': text[:100],
+            'historyId': str(self.history_id + 1),
+            'internalDate': str(1767225600000 + n * 60000),
+            'sizeEstimate': len(text) + len(html) + 800,
+            'payload': {
+                'mimeType': 'multipart/alternative',
+                'headers': [
+                    {'name': 'From', 'value': f'{name} <{address}>'},
+                    {'name': 'To', 'value': 'me@example.com'},
+                    {'name': 'Subject', 'value': subject},
+                    {'name': 'Date', 'value': f'Thu, 1 Jan 2026 {n // 60 % 24:02d}:{n % 60:02d}:00 +0000'},
+                    {'name': 'Message-ID', 'value': f'<{msg_id}@mail.example>'},
+                ],
+                'body': {'size': 0},
+                'parts': [
+                    {'partId': '0', 'mimeType': 'text/plain',
+                     'headers': [{'name': 'Content-Type', 'value': 'text/plain; charset="UTF-8"'}],
+                     'body': {'size': len(text), 'data': _b64(text)}},
+                    {'partId': '1', 'mimeType': 'text/html',
+                     'headers': [{'name': 'Content-Type', 'value': 'text/html; charset="UTF-8"'}],
+                     'body': {'size': len(html), 'data': _b64(html)}},
+                ],
+            },
+        }
+        if self.attachment_ratio and rng.random() < self.attachment_ratio:
+            self._attach(message, rng.randrange(self.distinct_attachments))
+        return message
+
+    def _attach(self, message: Dict, k: int):
+        """Wrap the body in multipart/mixed with attachment ``k`` of the shared pool."""
+        # Every 10th blob is an archive, which the default type allowlist rejects
+        filename, mime_type = ((f'bundle-{k}.zip', 'application/zip') if k % 10 == 9
+                               else (f'invoice-{k}.pdf', 'application/pdf'))
+        data = self._blob(k)
+        attachment_id = f'ANGjdJ_{message["id"]}_{k}'
+        self.attachments[attachment_id] = data
+        payload = message['payload']
+        alternative = {'partId': '0', 'mimeType': 'multipart/alternative', 'headers': [],
+                       'body': {'size': 0}, 'parts': payload['parts']}
+        for i, part in enumerate(alternative['parts']):
+            part['partId'] = f'0.{i}'
+        attachment = {'partId': '1', 'mimeType': mime_type, 'filename': filename,
+                      'headers': [{'name': 'Content-Disposition',
+                                   'value': f'attachment; filename="{filename}"'}],
+                      'body': {'attachmentId': attachment_id, 'size': len(data)}}
+        payload.update(mimeType='multipart/mixed', parts=[alternative, attachment])
+        message['sizeEstimate'] += len(data) * 4 // 3
+
+    def _blob(self, k: int) -> bytes:
+        blob = self._blobs.get(k)
+        if blob is None:
+            rng = random.Random(f'attachment-{k}')
+            blob = b'%PDF-1.4\n' + rng.randbytes(self.attachment_kb * 1024)
+            self._blobs[k] = blob
+        return blob
+
+    # ------------------------------------------------------------- handlers
+
+    def _matches(self, message: Dict, q: str = None, label_ids: List[str] = None) -> bool:
+        labels = message['labelIds']
+        if label_ids and not all(label in labels for label in label_ids):
+            return False
+        if q and 'is:unread' in q and 'UNREAD' not in labels:
+            return False
+        return True
+
+    def handle_list(self, userId: str = 'me', q: str = None, labelIds: List[str] = None,
+                    maxResults: int = 100, pageToken: str = None, **_) -> Dict:
+        start = int(pageToken) if pageToken else 0
+        matching = [msg_id for msg_id in reversed(self.order)
+                    if self._matches(self.messages[msg_id], q, labelIds)]
+        page = matching[start:start + maxResults]
+        response = {'resultSizeEstimate': len(matching)}
+        if page:
+            response['messages'] = [{'id': msg_id, 'threadId': self.messages[msg_id]['threadId']}
+                                    for msg_id in page]
+        if start + maxResults < len(matching):
+            response['nextPageToken'] = str(start + maxResults)
+        return response
+
+    def handle_get(self, userId: str = 'me', id: str = None, format: str = 'full',
+                   metadataHeaders: List[str] = None, fields: str = None, **_) -> Dict:
+        if self.error_rate and self.fault_rng.random() < self.error_rate:
+            status = self.fault_rng.choice([429, 503])
+            raise FakeHttpError(status, 'Rate Limit Exceeded' if status == 429 else 'Backend Error')
+        message = self.messages.get(id)
+        if message is None:
+            raise FakeHttpError(404, 'Requested entity was not found.')
+        if format == 'full':
+            return select_fields(message, fields)
+        result = {k: v for k, v in message.items() if k != 'payload'}
+        if format == 'metadata':
+            headers = message['payload']['headers']
+            if metadataHeaders:
+                wanted = {h.lower() for h in metadataHeaders}
+                headers = [h for h in headers if h['name'].lower() in wanted]
+            result['payload'] = {'mimeType': message['payload']['mimeType'], 'headers': headers}
+        return select_fields(result, fields)
+
+    def handle_attachment_get(self, userId: str = 'me', messageId: str = None,
+                              id: str = None, **_) -> Dict:
+        data = self.attachments.get(id)
+        if data is None or messageId not in self.messages:
+            raise FakeHttpError(404, 'Requested entity was not found.')
+        return {'attachmentId': id, 'size': len(data),
+                'data': base64.urlsafe_b64encode(data).decode('ascii')}
+
+    def handle_watch(self, userId: str = 'me', body: Dict = None, **_) -> Dict:
+        self.watch_topic = (body or {}).get('topicName')
+        return {'historyId': str(self.history_id),
+                'expiration': str(int(time.time() * 1000) + 7 * 24 * 3600 * 1000)}
+
+    def handle_get_profile(self, userId: str = 'me', **_) -> Dict:
+        return {'emailAddress': 'me@example.com', 'messagesTotal': len(self.messages),
+                'threadsTotal': len({m['threadId'] for m in self.messages.values()}),
+                'historyId': str(self.history_id)}
+
+    _HISTORY_KEYS = {'messageAdded': 'messagesAdded', 'messageDeleted': 'messagesDeleted',
+                     'labelAdded': 'labelsAdded', 'labelRemoved': 'labelsRemoved'}
+
+    def handle_history_list(self, userId: str = 'me', startHistoryId: str = None,
+                            historyTypes: List[str] = None, maxResults: int = 100,
+                            pageToken: str = None, **_) -> Dict:
+        start = int(startHistoryId)
+        if start < self.history_floor:
+            raise FakeHttpError(404, 'Requested entity was not found.')
+        wanted = {self._HISTORY_KEYS[t] for t in historyTypes} if historyTypes else None
+        records = []
+        for record in self.history:
+            if int(record['id']) <= start:
+                continue
+            if wanted is not None:
+                record = {k: v for k, v in record.items() if k in ('id', 'messages') or k in wanted}
+                if len(record) == 2:
+                    continue
+            records.append(record)
+        offset = int(pageToken) if pageToken else 0
+        response = {'historyId': str(self.history_id)}
+        page = records[offset:offset + maxResults]
+        if page:
+            response['history'] = page
+        if offset + maxResults < len(records):
+            response['nextPageToken'] = str(offset + maxResults)
+        return response
+
+
+# ------------------------------------------------------------------ WhatsApp
+
+_TESTID = re.compile(r'''\[data-testid=["']?([\w-]+)["']?\]''')
+
+
+def _clock(epoch: int) -> str:
+    """Chat-list time label (WhatsApp shows HH:MM for today)."""
+    return time.strftime('%H:%M', time.gmtime(epoch))
+
+
+class FakeElement:
+    """Minimal ``ElementHandle``: a node with a ``data-testid``, text, attributes and children."""
+
+    def __init__(self, page: 'FakeWhatsAppPage', testid: str, text: str = '',
+                 children: List['FakeElement'] = None):
+        self.page = page
+        self.testid = testid
+        self.text = text
+        self.attributes: Dict[str, str] = {}
+        self.parent: Optional[FakeElement] = None
+        self.children: List[FakeElement] = []
+        for child in children or []:
+            self.append(child)
+
+    def append(self, child: 'FakeElement'):
+        child.parent = self
+        self.children.append(child)
+
+    def remove(self, child: 'FakeElement'):
+        self.children.remove(child)
+        child.parent = None
+
+    def _descendants(self):
+        stack = list(reversed(self.children))
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node.children))
+
+    def _find_all(self, selector: str) -> List['FakeElement']:
+        match = _TESTID.search(selector)
+        if not match:
+            return []
+        testid = match.group(1)
+        return [node for node in self._descendants() if node.testid == testid]
+
+    # -------------------------------------------------- Playwright-style API
+
+    def query_selector_all(self, selector: str) -> List['FakeElement']:
+        self.page.round_trip('query_selector_all')
+        return self._find_all(selector)
+
+    def query_selector(self, selector: str) -> Optional['FakeElement']:
+        self.page.round_trip('query_selector')
+        found = self._find_all(selector)
+        return found[0] if found else None
+
+    def text_content(self) -> str:
+        self.page.round_trip('text_content')
+        return self.text + ''.join(child.text for child in self._descendants())
+
+    def get_attribute(self, name: str) -> Optional[str]:
+        self.page.round_trip('get_attribute')
+        return self.attributes.get(name)
+
+    def evaluate_handle(self, expression: str) -> Optional['FakeElement']:
+        """Supports the ``el => el.closest("[data-testid=...]")`` form used by the watcher."""
+        self.page.round_trip('evaluate_handle')
+        match = _TESTID.search(expression)
+        if 'closest' not in expression or not match:
+            raise NotImplementedError(f'FakeElement cannot evaluate: {expression}')
+        node = self
+        while node is not None and node.testid != match.group(1):
+            node = node.parent
+        return node
+
+
+class FakeWhatsAppPage(FakeElement):
+    """
+    Synthetic WhatsApp Web chat list.
+
+    The DOM has the shape the watcher's selectors expect::
+
+        chat-list
+          chat-list-item-container
+            chat-name
+            cell-frame-primary-detail   (time of the last message)
+            conversation-message-preview
+            unread-badge        (only while the chat has unread messages)
+
+    ``evaluate`` runs the watcher's chat-list script (``CHAT_LIST_SCRIPT``)
+    as one round trip, applying the selectors it is given, and installs the
+    push-mode observer (``PUSH_OBSERVER_SCRIPT``). Once it is installed,
+    every change to the list is reported to the exposed binding, from
+    inside the next page call (Playwright's sync API behaves the same).
+
+    ``schedule_arrivals`` queues messages that land at set times. They are
+    applied from whichever thread is calling into the page, so the page
+    stays single-threaded, and recorded in ``arrived`` with their due time.
+    """
+
+    def __init__(self, chats: int = 200, unread_ratio: float = 0.3, urgent_ratio: float = 0.2,
+                 latency: float = 0.0005, seed: int = 42):
+        """
+        Args:
+            chats: Chats in the list
+            unread_ratio: Fraction of chats with an unread badge at start
+            urgent_ratio: Fraction of previews that contain an urgent keyword
+            latency: Seconds per DOM round trip (the CDP hop to the browser)
+            seed: RNG seed
+        """
+        self.calls = Counter()
+        self.latency = latency
+        self.rng = random.Random(seed)
+        self.urgent_ratio = urgent_ratio
+        super().__init__(self, 'root')
+        self.chat_list = FakeElement(self, 'chat-list')
+        self.append(self.chat_list)
+        self.chats: List[Dict] = []
+        self._arrivals: List = []  # heap of (due perf_counter, seq, chat index, text)
+        self.arrived: List = []    # (due perf_counter, chat name)
+        self._binding = None
+        self._observing = False
+        self._pending_mutations = 0
+        for i in range(chats):
+            self._add_chat(f'Contact {i:04d}', unread=self.rng.random() < unread_ratio)
+
+    def round_trip(self, method: str):
+        self.calls[f'dom.{method}'] += 1
+        self._service()
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+    def _service(self):
+        """Apply messages that are due and report changes to the observer binding."""
+        now = time.perf_counter()
+        while self._arrivals and self._arrivals[0][0] <= now:
+            due, _, index, text = heapq.heappop(self._arrivals)
+            self.receive(index, text)
+            self.arrived.append((due, self.chats[index]['name']))
+        if self._pending_mutations and self._binding is not None:
+            records, self._pending_mutations = self._pending_mutations, 0
+            self._binding({'page': self}, records)
+
+    def _preview_text(self) -> str:
+        phrase = self.rng.choice(PHRASES)
+        if self.rng.random() < self.urgent_ratio and not any(
+                kw in phrase.lower() for kw in ('urgent', 'asap', 'help')):
+            phrase = 'URGENT: ' + phrase
+        return phrase
+
+    def _add_chat(self, name: str, unread: bool):
+        last_ts = 1767225600 + len(self.chats)
+        container = FakeElement(self, 'chat-list-item-container', children=[
+            FakeElement(self, 'chat-name', name),
+            FakeElement(self, 'cell-frame-primary-detail', _clock(last_ts)),
+            FakeElement(self, 'conversation-message-preview', self._preview_text()),
+        ])
+        chat = {'name': name, 'container': container, 'badge': None, 'unread': 0,
+                'last_ts': last_ts}
+        self.chat_list.append(container)
+        self.chats.append(chat)
+        if unread:
+            self.receive(len(self.chats) - 1)
+
+    # ---------------------------------------------------------- simulation
+
+    def receive(self, index: int, text: str = None):
+        """A new message arrives in chat ``index``."""
+        chat = self.chats[index]
+        chat['container'].children[2].text = text if text is not None else self._preview_text()
+        chat['unread'] += 1
+        chat['last_ts'] += 60
+        chat['container'].children[1].text = _clock(chat['last_ts'])
+        self._mutated()
+        if chat['badge'] is None:
+            chat['badge'] = FakeElement(self, 'unread-badge')
+            chat['container'].append(chat['badge'])
+        chat['badge'].text = str(chat['unread'])
+
+    def read(self, index: int):
+        """The user opens chat ``index`` (badge disappears)."""
+        chat = self.chats[index]
+        if chat['badge'] is not None:
+            chat['container'].remove(chat['badge'])
+            chat['badge'] = None
+            self._mutated()
+        chat['unread'] = 0
+
+    def schedule_arrivals(self, arrivals: List):
+        """Queue ``(seconds from now, chat index, text)`` messages."""
+        start = time.perf_counter()
+        for delay, index, text in arrivals:
+            heapq.heappush(self._arrivals, (start + delay, len(self._arrivals) + len(self.arrived),
+                                            index, text))
+
+    def _mutated(self):
+        if self._observing:
+            self._pending_mutations += 1
+
+    # ----------------------------------------------------- Page-only methods
+
+    def evaluate(self, expression: str, arg=None):
+        """
+        The chat-list script (``arg`` carries its selectors and
+        ``unreadOnly``) or the push observer (True when newly installed).
+        """
+        self.round_trip('evaluate')
+        if 'MutationObserver' in expression:
+            installed = not self._observing
+            self._observing = True
+            return installed
+        if 'querySelectorAll' not in expression or not isinstance(arg, dict):
+            raise NotImplementedError(f'FakeWhatsAppPage cannot evaluate: {expression[:60]}')
+        rows = []
+        for item in self._find_all(arg['item']):
+            found, sent_at = {}, None
+            for field in ('name', 'preview', 'badge', 'time'):
+                nodes = item._find_all(arg[field])
+                found[field] = nodes[0].text + ''.join(c.text for c in nodes[0]._descendants()) if nodes else None
+                if nodes and field == 'time':
+                    sent_at = nodes[0].attributes.get('datetime')
+            if arg.get('unreadOnly') and found['badge'] is None:
+                continue
+            if found['name'] is None:
+                continue
+            badge = found['badge']
+            rows.append({
+                'chat': found['name'].strip(),
+                'preview': found['preview'],
+                'unread_count': (int(badge) if badge.strip().isdigit() else 1) if badge is not None else 0,
+                'last_ts': found['time'].strip() if found['time'] is not None else None,
+                'sent_at': sent_at,
+            })
+        return rows
+
+    def expose_binding(self, name: str, callback):
+        self.round_trip('expose_binding')
+        self._binding = callback
+
+    def wait_for_timeout(self, timeout: float):
+        """Idle inside the page for ``timeout`` ms, delivering arrivals and binding calls."""
+        self.calls['dom.wait_for_timeout'] += 1
+        deadline = time.perf_counter() + timeout / 1000
+        while True:
+            self._service()
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return
+            if self._arrivals:
+                remaining = min(remaining, max(0.0, self._arrivals[0][0] - time.perf_counter()))
+            time.sleep(remaining)
+
+    def goto(self, url: str, **_):
+        self.round_trip('goto')
+
+    def wait_for_selector(self, selector: str, **_) -> Optional[FakeElement]:
+        return self.query_selector(selector)
+
+    def close(self):
+        pass
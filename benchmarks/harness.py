@@ -0,0 +1,147 @@
+"""
+Benchmark Harness
+=================
+
+Shared timing and reporting helpers for the scripts in ``benchmarks/``.
+
+Every benchmark reports the same shape so runs can be diffed across
+commits:
+
+    {"benchmark": "gmail", "items": 2000, "seconds": 1.9,
+     "items_per_second": 1052.6,
+     "latency_ms": {"p50": 8.1, "p99": 14.0, "mean": 8.4, "max": 20.3},
+     "peak_rss_mb": 41.2, ...}
+
+``peak_rss_mb`` is the process high-water mark, so each scenario should
+run in its own process (``bench_watchers.py`` does this by default).
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import platform
+import subprocess
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MB (None where unsupported)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KB on Linux, bytes on macOS
+    divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return round(peak / divisor, 1)
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of ``samples`` (0 for an empty list)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def latency_summary(samples: List[float]) -> Dict[str, float]:
+    """p50/p99/mean/max of latency samples (seconds in, milliseconds out)."""
+    ms = [s * 1000 for s in samples]
+    return {
+        'p50': round(percentile(ms, 50), 3),
+        'p99': round(percentile(ms, 99), 3),
+        'mean': round(sum(ms) / len(ms), 3) if ms else 0.0,
+        'max': round(max(ms), 3) if ms else 0.0,
+    }
+
+
+class Timer:
+    """Collects per-operation latency samples and the total item count."""
+
+    def __init__(self):
+        self.samples: List[float] = []
+        self.items = 0
+        self.elapsed = 0.0
+
+    @contextmanager
+    def measure(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            self.samples.append(duration)
+            self.elapsed += duration
+
+    def summary(self, name: str, **extra) -> Dict:
+        """Build the standard result dict for this run."""
+        result = {
+            'benchmark': name,
+            'items': self.items,
+            'operations': len(self.samples),
+            'seconds': round(self.elapsed, 4),
+            'items_per_second': round(self.items / self.elapsed, 1) if self.elapsed else 0.0,
+            'latency_ms': latency_summary(self.samples),
+            'peak_rss_mb': peak_rss_mb(),
+        }
+        result.update(extra)
+        return result
+
+
+def run_info() -> Dict:
+    """Commit, interpreter and host details recorded alongside results."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                                capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+    }
+
+
+def emit(results, output: str = None):
+    """
+    Print results as JSON and optionally append them to a JSONL file.
+
+    Args:
+        results: One result dict or a list of them
+        output: Append ``{"run": ..., "results": ...}`` here for cross-commit comparison
+    """
+    document = {'run': run_info(), 'results': results if isinstance(results, list) else [results]}
+    print(json.dumps(document, indent=2))
+    if output:
+        with open(output, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(document) + '\n')
+
+
+def quiet_logging():
+    """Silence INFO logging from the watchers so it doesn't skew timings."""
+    logging.disable(logging.INFO)
+
+
+@contextmanager
+def working_directory(path: Path):
+    """Run with ``path`` as cwd (watchers drop log and token files in cwd)."""
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Synthetic Vault Generator
+=========================
+
+Builds an Obsidian vault with N notes spread across the workflow folders,
+using the same frontmatter the watchers write. Output is deterministic for
+a given seed, so benchmark runs on different commits see the same vault.
+
+Usage:
+    python benchmarks/vault_gen.py --out /tmp/bench_vault --notes 10000 --body-kb 4
+
+    from vault_gen import generate_vault
+    counts = generate_vault(Path(tmp), notes=10000)
+"""
+
+import random
+import argparse
+from pathlib import Path
+from typing import Dict, Sequence
+
+from harness import REPO_ROOT  # noqa: F401  (puts the repo on sys.path)
+from frontmatter import render_note
+
+# type -> (filename prefix, folder it starts in)
+NOTE_KINDS = {
+    'email': ('EMAIL_', 'Needs_Action'),
+    'whatsapp_message': ('WHATSAPP_', 'Needs_Action'),
+    'file_drop': ('FILE_', 'Needs_Action'),
+    'linkedin_post': ('LINKEDIN_', 'Pending_Approval'),
+}
+
+FOLDERS = ['Inbox', 'Needs_Action', 'Pending_Approval', 'Approved', 'Done', 'Logs']
+
+_FILLER = ('Lorem ipsum dolor sit amet, consectetur adipiscing elit. ' * 20)[:1000] + '\n'
+
+
+def note_fields(kind: str, rng: random.Random, n: int) -> Dict:
+    """Frontmatter for note ``n`` of type ``kind``."""
+    fields = {
+        'type': kind,
+        'status': rng.choice(['pending', 'pending_approval', 'posted', 'done']),
+        'priority': rng.choice(['low', 'normal', 'normal', 'high']),
+        'created': f'2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T10:00:00Z',
+    }
+    if kind == 'email':
+        fields.update({'from': f'Sender {n % 97} <sender{n % 97}@example.com>',
+                       'subject': f'Re: invoice #{n}', 'email_id': f'{n:016x}'})
+    elif kind == 'whatsapp_message':
+        fields.update({'from': f'Contact {n % 211}', 'urgent': rng.random() < 0.2})
+    elif kind == 'file_drop':
+        fields.update({'original_name': f'document_{n}.pdf', 'size': rng.randint(1_000, 5_000_000)})
+    elif kind == 'linkedin_post':
+        fields.update({'hashtags': '#ai #automation'})
+    return fields
+
+
+def write_notes(folder: Path, count: int, body_kb: int = 1, seed: int = 42,
+                kinds: Sequence[str] = ('linkedin_post', 'email'), prefix: str = None) -> int:
+    """
+    Write ``count`` notes into one folder, types drawn evenly from ``kinds``.
+
+    Args:
+        folder: Destination folder (created if missing)
+        count: Number of notes
+        body_kb: Body size per note in KB
+        seed: RNG seed
+        kinds: Note types to draw from
+        prefix: Filename prefix for every note (default: per type)
+
+    Returns:
+        Number of notes written
+    """
+    rng = random.Random(seed)
+    folder.mkdir(parents=True, exist_ok=True)
+    body = _FILLER * body_kb
+    for i in range(count):
+        kind = rng.choice(kinds)
+        name = f'{prefix or NOTE_KINDS[kind][0]}{i:06d}.md'
+        (folder / name).write_text(render_note(note_fields(kind, rng, i), body), encoding='utf-8')
+    return count
+
+
+def generate_vault(root: Path, notes: int, body_kb: int = 1, pending_posts: int = None,
+                   done_ratio: float = 0.5, seed: int = 42) -> Dict[str, int]:
+    """
+    Build a vault of ``notes`` notes.
+
+    ``pending_posts`` LinkedIn posts (default 5% of notes) go to
+    Pending_Approval; of the rest, ``done_ratio`` are in Done and the
+    remainder in the kind's starting folder.
+
+    Returns:
+        Note count per folder
+    """
+    rng = random.Random(seed)
+    root = Path(root)
+    for folder in FOLDERS:
+        (root / folder).mkdir(parents=True, exist_ok=True)
+    pending_posts = max(1, notes // 20) if pending_posts is None else pending_posts
+    body = _FILLER * body_kb
+    counts = {folder: 0 for folder in FOLDERS}
+    other_kinds = [k for k in NOTE_KINDS if k != 'linkedin_post']
+
+    for i in range(notes):
+        if i < pending_posts:
+            kind, folder = 'linkedin_post', 'Pending_Approval'
+        else:
+            kind = rng.choice(other_kinds)
+            folder = 'Done' if rng.random() < done_ratio else NOTE_KINDS[kind][1]
+        fields = note_fields(kind, rng, i)
+        if kind == 'linkedin_post':
+            fields['status'] = 'pending_approval'
+        name = f'{NOTE_KINDS[kind][0]}{i:06d}.md'
+        (root / folder / name).write_text(render_note(fields, body), encoding='utf-8')
+        counts[folder] += 1
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic AI Employee vault')
+    parser.add_argument('--out', required=True, help='Vault directory to create')
+    parser.add_argument('--notes', type=int, default=10000, help='Number of notes')
+    parser.add_argument('--body-kb', type=int, default=1, help='Body size per note in KB')
+    parser.add_argument('--pending-posts', type=int, default=None,
+                        help='LinkedIn posts in Pending_Approval (default: 5%% of notes)')
+    parser.add_argument('--seed', type=int, default=42, help='RNG seed')
+    args = parser.parse_args()
+
+    counts = generate_vault(Path(args.out), args.notes, args.body_kb, args.pending_posts, seed=args.seed)
+    for folder, count in counts.items():
+        if count:
+            print(f'   {folder:18} {count}')
+    print(f'✅ Wrote {args.notes} notes to {args.out}')
+
+
+if __name__ == '__main__':
+    main()
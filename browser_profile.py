@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Browser Profile
+===============
+
+Lean persistent Chromium for the browser-driven integrations
+(WhatsAppWatcher, LinkedInPoster). Compared with a plain headful launch:
+
+- Headless once the session directory holds a logged-in profile; the first
+  run (``--setup``: QR scan or login) stays headful
+- Images, media, fonts and requests to analytics hosts are aborted by a
+  context route before they leave the browser
+- Disk and media caches are capped, and the background services Chrome runs
+  for a desktop user (component updates, sync, extensions, GPU) are off
+- A fixed, configurable viewport; extra Chromium flags (e.g. throttling)
+  from $BROWSER_ARGS
+
+Playwright turns off the HTTP cache of a context while a route is
+installed; blocking still saves far more than the cache would
+(``BROWSER_BLOCK=`` turns routing off).
+
+Usage:
+    profile = BrowserProfile(session_path)
+    context = profile.launch(playwright.chromium)
+    page = context.pages[0]
+"""
+
+import os
+import shlex
+import logging
+from pathlib import Path
+from typing import List, Optional, Set, Union
+from urllib.parse import urlsplit
+
+logger = logging.getLogger('BrowserProfile')
+
+# Resource types (Playwright's request.resource_type) blocked by default;
+# 'analytics' stands for requests to ANALYTICS_HOSTS
+DEFAULT_BLOCK = 'image,media,font,analytics'
+ANALYTICS_HOSTS = (
+    'google-analytics.com', 'googletagmanager.com', 'doubleclick.net', 'connect.facebook.net',
+    'dit.whatsapp.net', 'px.ads.linkedin.com', 'snap.licdn.com', 'analytics.pointdrive.linkedin.com',
+)
+
+DEFAULT_VIEWPORT = '1280x800'
+DEFAULT_CACHE_MB = 32
+
+# The flags the integrations always launched with
+BASE_FLAGS = ['--no-sandbox', '--disable-setuid-sandbox']
+LEAN_FLAGS = BASE_FLAGS + [
+    '--disable-gpu',
+    '--disable-dev-shm-usage',
+    '--disable-extensions',
+    '--disable-component-update',
+    '--disable-background-networking',
+    '--disable-sync',
+    '--disable-default-apps',
+    '--no-first-run',
+    '--mute-audio',
+]
+
+# Files Chromium writes once a site has stored a login (cookies for
+# LinkedIn, IndexedDB/localStorage for WhatsApp Web). 'Local State' alone
+# only means the profile was opened once
+SESSION_MARKERS = ('Default/Network/Cookies', 'Default/Cookies', 'Default/IndexedDB', 'Default/Local Storage')
+
+
+def has_session(session_path: Path) -> bool:
+    """True if a browser profile at ``session_path`` holds site data from a login."""
+    return any((Path(session_path) / marker).exists() for marker in SESSION_MARKERS)
+
+
+def _split(value: str) -> List[str]:
+    return [item.strip().lower() for item in value.split(',') if item.strip()]
+
+
+class BrowserProfile:
+    """Launch settings for a lean persistent Chromium context."""
+
+    def __init__(self, session_path: Union[str, Path], headless: Union[bool, str] = None,
+                 block: str = None, block_hosts: str = None, viewport: str = None,
+                 cache_mb: int = None, flags: List[str] = None, extra_args: str = None):
+        """
+        Args:
+            session_path: Persistent profile directory (cookies, login)
+            headless: True, False or 'auto' (headless once has_session());
+                default $BROWSER_HEADLESS, else 'auto'
+            block: Comma-separated resource types to abort, plus 'analytics'
+                for ANALYTICS_HOSTS; '' blocks nothing; default
+                $BROWSER_BLOCK, else images, media, fonts and analytics
+            block_hosts: Comma-separated extra analytics hosts (subdomains
+                included); default $BROWSER_BLOCK_HOSTS
+            viewport: 'WIDTHxHEIGHT', '' for Playwright's default; default
+                $BROWSER_VIEWPORT, else 1280x800
+            cache_mb: Disk and media cache cap in MB, 0 = Chromium's own
+                sizing; default $BROWSER_CACHE_MB, else 32
+            flags: Chromium flags before extra_args (default LEAN_FLAGS)
+            extra_args: More Chromium flags, shell-quoted (e.g.
+                '--renderer-process-limit=1'); default $BROWSER_ARGS
+        """
+        self.session_path = Path(session_path)
+        if headless is None:
+            headless = os.getenv('BROWSER_HEADLESS', 'auto')
+        if isinstance(headless, str):
+            headless = {'true': True, '1': True, 'false': False, '0': False}.get(headless.lower(), 'auto')
+        self.headless = headless
+
+        block = os.getenv('BROWSER_BLOCK', DEFAULT_BLOCK) if block is None else block
+        self.block_types: Set[str] = set(_split(block))
+        self.block_hosts = ()
+        if 'analytics' in self.block_types:
+            self.block_types.discard('analytics')
+            extra_hosts = os.getenv('BROWSER_BLOCK_HOSTS', '') if block_hosts is None else block_hosts
+            self.block_hosts = ANALYTICS_HOSTS + tuple(_split(extra_hosts))
+
+        viewport = os.getenv('BROWSER_VIEWPORT', DEFAULT_VIEWPORT) if viewport is None else viewport
+        self.viewport = None
+        if viewport:
+            width, _, height = viewport.lower().partition('x')
+            self.viewport = {'width': int(width), 'height': int(height)}
+
+        if cache_mb is None:
+            cache_mb = int(os.getenv('BROWSER_CACHE_MB', DEFAULT_CACHE_MB))
+        self.cache_mb = max(0, cache_mb)
+        self.flags = list(LEAN_FLAGS if flags is None else flags)
+        extra_args = os.getenv('BROWSER_ARGS', '') if extra_args is None else extra_args
+        self.extra_args = shlex.split(extra_args)
+
+        self.blocked = 0
+        self._cdp_sessions = []
+
+    def resolve_headless(self, headless: Optional[bool] = None) -> bool:
+        """Headless for this launch: ``headless`` if given, else the configured mode."""
+        if headless is not None:
+            return headless
+        if self.headless == 'auto':
+            return has_session(self.session_path)
+        return self.headless
+
+    def args(self) -> List[str]:
+        """Chromium command-line flags."""
+        args = list(self.flags)
+        if self.cache_mb:
+            size = self.cache_mb * 1024 * 1024
+            args += [f'--disk-cache-size={size}', f'--media-cache-size={size}']
+        if 'image' in self.block_types:
+            # Stops image loads in the renderer, before a request is even made
+            args.append('--blink-settings=imagesEnabled=false')
+        return args + self.extra_args
+
+    def should_block(self, resource_type: str, url: str) -> bool:
+        if resource_type in self.block_types:
+            return True
+        if self.block_hosts:
+            host = (urlsplit(url).hostname or '').lower()
+            return any(host == blocked or host.endswith('.' + blocked) for blocked in self.block_hosts)
+        return False
+
+    def _route(self, route):
+        request = route.request
+        if self.should_block(request.resource_type, request.url):
+            self.blocked += 1
+            route.abort('blockedbyclient')
+        else:
+            route.continue_()
+
+    def _unmask_user_agent(self, page):
+        """
+        Report a regular Chrome user agent: sites such as WhatsApp Web
+        refuse ``HeadlessChrome``. Needs a CDP session per page, kept open.
+        """
+        try:
+            user_agent = page.evaluate('navigator.userAgent')
+            if 'HeadlessChrome' not in user_agent:
+                return
+            session = page.context.new_cdp_session(page)
+            session.send('Network.setUserAgentOverride',
+                         {'userAgent': user_agent.replace('HeadlessChrome', 'Chrome')})
+            self._cdp_sessions.append(session)
+        except Exception as e:
+            logger.warning(f'Could not set the user agent: {e}')
+
+    def launch(self, browser_type, headless: Optional[bool] = None):
+        """
+        Launch a persistent context with this profile.
+
+        Args:
+            browser_type: ``playwright.chromium``
+            headless: Override the configured mode for this launch (e.g.
+                False for an interactive login)
+
+        Returns:
+            The BrowserContext, with blocking installed and at least one page
+        """
+        headless = self.resolve_headless(headless)
+        options = {'headless': headless, 'args': self.args()}
+        if self.viewport:
+            options['viewport'] = self.viewport
+        context = browser_type.launch_persistent_context(str(self.session_path), **options)
+
+        if self.block_types or self.block_hosts:
+            context.route('**/*', self._route)
+        if headless:
+            context.on('page', self._unmask_user_agent)
+            for page in context.pages:
+                self._unmask_user_agent(page)
+        if not context.pages:
+            context.new_page()
+
+        logger.info(f"Browser profile: {'headless' if headless else 'headful'}, "
+                    f"blocking {', '.join(sorted(self.block_types)) or 'nothing'}"
+                    f"{' and analytics hosts' if self.block_hosts else ''}, "
+                    f"cache {f'{self.cache_mb} MB' if self.cache_mb else 'uncapped'}")
+        return context
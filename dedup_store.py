@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Dedup Store
+===========
+
+Bounded, persistent "have we already processed this ID?" store shared by
+the watchers (Gmail message IDs, WhatsApp message IDs, ...).
+
+Storage:
+- Every new ID is persisted with one fixed-width 12-byte append
+  (uint32 first-seen epoch seconds + uint64 BLAKE2b hash of the ID)
+- In memory, recent IDs live in an exact dict window; older ones are
+  merged into two sorted ``array`` columns (8 + 4 bytes per ID) and looked
+  up by bisection
+- Entries older than ``ttl_seconds`` are treated as unseen and dropped by
+  the background compactor, which also rewrites the log without them
+
+The legacy ``.processed_emails`` / ``.processed_whatsapp`` JSON lists can
+be imported once with ``import_legacy_json``.
+
+A ``read_only`` store loads the record file but keeps new IDs in memory
+only (dry runs such as ``--demo``).
+"""
+
+import os
+import json
+import time
+import atexit
+import struct
+import hashlib
+import logging
+import threading
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+from typing import Iterable
+
+logger = logging.getLogger('DedupStore')
+
+_RECORD = struct.Struct('<IQ')
+
+
+def _hash_id(item_id: str) -> int:
+    return int.from_bytes(hashlib.blake2b(str(item_id).encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+class DedupStore:
+    """
+    Set-like store of processed IDs with O(1) persistence and TTL expiry.
+
+    Supports ``item_id in store``, ``store.add(item_id)`` and ``len(store)``
+    so it can stand in for the ``set`` the watchers used before.
+    """
+
+    def __init__(self, path: Path, ttl_seconds: float = 180 * 86400,
+                 recent_capacity: int = 10000, compact_interval: float = 3600,
+                 read_only: bool = False):
+        """
+        Open (or create) a store.
+
+        Args:
+            path: Append-only record file
+            ttl_seconds: Forget IDs first seen longer ago than this (None = never)
+            recent_capacity: Size of the exact recent window before compaction
+            compact_interval: Seconds between background compactions (TTL sweep)
+            read_only: Never write the record file; IDs added are remembered
+                in memory until the store is dropped
+        """
+        self.path = Path(path)
+        self.read_only = read_only
+        self.ttl_seconds = ttl_seconds
+        self.recent_capacity = recent_capacity
+        self.compact_interval = compact_interval
+
+        self._lock = threading.Lock()
+        self._compact_lock = threading.Lock()  # one compaction at a time
+        self._recent = {}
+        self._hashes = array('Q')
+        self._times = array('I')
+        self._load()
+
+        self._closed = False
+        self._wake = threading.Event()
+        self._fd = self._compactor = None
+        if read_only:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fd = os.open(str(self.path), os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, 'O_BINARY', 0), 0o644)
+        self._compactor = threading.Thread(target=self._compact_loop, name=f'Dedup-{self.path.stem}',
+                                           daemon=True)
+        self._compactor.start()
+        atexit.register(self.close)
+
+    # ------------------------------------------------------------ set-like API
+
+    def __contains__(self, item_id: str) -> bool:
+        return self._lookup(_hash_id(item_id))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._hashes) + len(self._recent)
+
+    def add(self, item_id: str) -> bool:
+        """
+        Record an ID.
+
+        Returns:
+            True if the ID was new, False if it had already been seen
+        """
+        key = _hash_id(item_id)
+        now = int(time.time())
+        with self._lock:
+            if self._seen_locked(key, now):
+                return False
+            self._recent[key] = now
+            if self.read_only:
+                return True
+            os.write(self._fd, _RECORD.pack(now, key))
+            full = len(self._recent) >= self.recent_capacity
+        if full:
+            self._wake.set()
+        return True
+
+    def update(self, item_ids: Iterable[str]):
+        """Record several IDs."""
+        for item_id in item_ids:
+            self.add(item_id)
+
+    def flush(self):
+        """Fsync appended records to disk."""
+        with self._lock:
+            if self._fd is not None and not self._closed:
+                os.fsync(self._fd)
+
+    def close(self):
+        """Fsync and stop the background compactor."""
+        if getattr(self, '_closed', True):
+            return
+        self._closed = True
+        if self.read_only:
+            return
+        self._wake.set()
+        self._compactor.join(timeout=5)
+        with self._lock:
+            os.fsync(self._fd)
+            os.close(self._fd)
+
+    def import_legacy_json(self, legacy_path: Path) -> int:
+        """
+        Import a legacy JSON list of IDs once.
+
+        A ``<store>.imported`` marker records that the import happened so the
+        (possibly huge) JSON file is never parsed again.
+
+        Returns:
+            Number of IDs imported
+        """
+        legacy_path = Path(legacy_path)
+        marker = self.path.with_suffix(self.path.suffix + '.imported')
+        if marker.exists() or not legacy_path.exists():
+            return 0
+        try:
+            with open(legacy_path, 'r') as f:
+                ids = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f'Could not import {legacy_path.name}: {e}')
+            return 0
+
+        imported = sum(1 for item_id in ids if self.add(item_id))
+        if self.read_only:
+            return imported
+        self.flush()
+        marker.write_text(str(legacy_path.resolve()))
+        logger.info(f'Imported {imported} IDs from {legacy_path.name}')
+        return imported
+
+    # -------------------------------------------------------------- internals
+
+    def _expired(self, first_seen: int, now: float) -> bool:
+        return self.ttl_seconds is not None and now - first_seen > self.ttl_seconds
+
+    def _lookup(self, key: int) -> bool:
+        with self._lock:
+            return self._seen_locked(key, time.time())
+
+    def _seen_locked(self, key: int, now: float) -> bool:
+        first_seen = self._recent.get(key)
+        if first_seen is None:
+            i = bisect_left(self._hashes, key)
+            if i < len(self._hashes) and self._hashes[i] == key:
+                first_seen = self._times[i]
+        return first_seen is not None and not self._expired(first_seen, now)
+
+    def _load(self):
+        """Rebuild the sorted columns from the record file, dropping expired and torn records."""
+        if not self.path.exists():
+            return
+        data = self.path.read_bytes()
+        usable = len(data) - len(data) % _RECORD.size
+        now = time.time()
+        first_seen = {}
+        for ts, key in _RECORD.iter_unpack(data[:usable]):
+            if not self._expired(ts, now):
+                first_seen.setdefault(key, ts)
+        self._set_columns(first_seen)
+        if usable != len(data) and not self.read_only:
+            # Drop the torn record so later appends stay aligned
+            os.truncate(str(self.path), usable)
+            logger.warning(f'Dropped torn trailing record in {self.path.name}')
+
+    def _set_columns(self, first_seen: dict):
+        keys = sorted(first_seen)
+        self._hashes = array('Q', keys)
+        self._times = array('I', (first_seen[k] for k in keys))
+
+    def _compact_loop(self):
+        while not self._closed:
+            self._wake.wait(self.compact_interval)
+            self._wake.clear()
+            if self._closed:
+                return
+            try:
+                self.compact()
+            except Exception as e:
+                logger.error(f'Dedup compaction failed: {e}')
+
+    def compact(self):
+        """
+        Merge the recent window into the sorted columns, drop expired IDs and
+        rewrite the record file. Runs on the background thread; callable directly.
+
+        The merge and the rewrite run outside the lock, so lookups and adds
+        keep flowing; only the IDs added meanwhile are written while holding
+        it, just before the new file and columns are swapped in.
+        """
+        if self.read_only:
+            return
+        with self._compact_lock:
+            with self._lock:
+                snapshot = dict(self._recent)
+                hashes, times = self._hashes, self._times
+
+            now = time.time()
+            merged = {k: t for k, t in zip(hashes, times) if not self._expired(t, now)}
+            for key, ts in snapshot.items():
+                if not self._expired(ts, now):
+                    merged.setdefault(key, ts)
+            keys = sorted(merged)
+            new_hashes = array('Q', keys)
+            new_times = array('I', (merged[k] for k in keys))
+
+            tmp = self.path.with_name(self.path.name + '.tmp')
+            f = open(tmp, 'wb')
+            try:
+                f.write(b''.join(_RECORD.pack(t, k) for k, t in zip(new_hashes, new_times)))
+                f.flush()
+                os.fsync(f.fileno())
+                with self._lock:
+                    if self._closed:
+                        return
+                    # Keep anything added while we were merging
+                    self._recent = {k: t for k, t in self._recent.items() if k not in snapshot}
+                    if self._recent:
+                        f.write(b''.join(_RECORD.pack(t, k) for k, t in self._recent.items()))
+                        f.flush()
+                        os.fsync(f.fileno())
+                    f.close()
+                    os.close(self._fd)
+                    os.replace(tmp, self.path)
+                    self._fd = os.open(str(self.path), os.O_WRONLY | os.O_APPEND | getattr(os, 'O_BINARY', 0))
+                    self._hashes, self._times = new_hashes, new_times
+            finally:
+                if not f.closed:
+                    f.close()
+                    tmp.unlink(missing_ok=True)
+        logger.debug(f'Compacted {self.path.name}: {len(new_hashes)} IDs')
@@ -19,15 +19,14 @@ Usage:
 
 import sys
 import argparse
-import shutil
 from pathlib import Path
 from datetime import datetime
-from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 
 # Import base watcher
 sys.path.insert(0, str(Path(__file__).parent))
-from base_watcher import BaseWatcher
+from base_watcher import BaseWatcher, configure_logging, load_environment
+from metrics import start_metrics_export
 
 
 class FileDropHandler(BaseWatcher, FileSystemEventHandler):
@@ -137,9 +136,8 @@ File stored temporarily in: `{file_path}`
 
         # Copy the actual file to vault for reference
         try:
-            vault_file = self.needs_action / filename
-            if not vault_file.exists():
-                shutil.copy2(file_path, vault_file)
+            if not (self.needs_action / filename).exists():
+                vault_file = self.vault_writer.copy_file(file_path, self.needs_action, filename)
                 self.logger.info(f'Copied file to vault: {vault_file}')
         except Exception as e:
             self.logger.error(f'Failed to copy file: {e}')
@@ -171,7 +169,8 @@ File stored temporarily in: `{file_path}`
         time.sleep(0.5)
 
         if file_path.exists():
-            self.create_action_file(file_path)
+            self.metrics.items_found.inc(watcher=self.watcher_name)
+            self._create_action_file_instrumented(file_path)
 
     def on_modified(self, event):
         """Watchdog event: File modified."""
@@ -190,6 +189,8 @@ File stored temporarily in: `{file_path}`
 
         This is the recommended way to run the file watcher continuously.
         """
+        from watchdog.observers import Observer
+
         observer = Observer()
         observer.schedule(self, str(self.watch_folder), recursive=False)
 
@@ -205,6 +206,27 @@ File stored temporarily in: `{file_path}`
             self.logger.info('FileSystem Watcher stopped')
         observer.join()
 
+    async def run_async(self, stop_event, executor=None):
+        """
+        Supervisor entry point: run the watchdog observer until shutdown.
+
+        Watchdog delivers events on its own thread, so the event loop only
+        has to wait for ``stop_event``.
+        """
+        from watchdog.observers import Observer
+
+        observer = Observer()
+        observer.schedule(self, str(self.watch_folder), recursive=False)
+
+        self.logger.info(f'Starting FileSystem Watcher (async watchdog mode)')
+        observer.start()
+        try:
+            await stop_event.wait()
+        finally:
+            observer.stop()
+            observer.join()
+            self.logger.info('FileSystem Watcher stopped')
+
     @staticmethod
     def _format_size(bytes_size: int) -> str:
         """Format bytes to human-readable size."""
@@ -224,10 +246,15 @@ def main():
     parser.add_argument('--watch', required=True, help='Folder to monitor')
     parser.add_argument('--exclude', nargs='+', default=['.DS_Store', 'thumbs.db'],
                         help='File patterns to ignore')
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help='Serve Prometheus metrics on this port (default: $METRICS_PORT)')
     parser.add_argument('--demo', action='store_true', help='Run in demo mode (no watching)')
 
     args = parser.parse_args()
 
+    configure_logging()
+    load_environment()
+
     try:
         watcher = FileDropHandler(args.vault, args.watch, args.exclude)
 
@@ -251,6 +278,7 @@ def main():
             print(f'   Vault: {args.vault}')
             print(f'   Watch: {args.watch}')
             print(f'   Press Ctrl+C to stop')
+            start_metrics_export(watcher.logs, args.metrics_port)
             watcher.run_watchdog()
 
     except Exception as e:
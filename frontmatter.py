@@ -0,0 +1,463 @@
+#!/usr/bin/env python3
+"""
+Frontmatter
+===========
+
+One place for reading and writing the YAML frontmatter of vault notes.
+
+- ``read_frontmatter(path)`` streams only the header block; the note body
+  is never read
+- Values are parsed into typed Python values (str, int, float, bool, None,
+  lists) from the YAML subset the vault uses; floats round-trip, with
+  infinities and NaN written ``.inf`` / ``-.inf`` / ``.nan``
+- ``dumps`` / ``render_note`` quote and escape values so subjects like
+  ``Re: invoice #42`` produce valid YAML
+- ``update_fields(path, {...})`` rewrites the header in place and copies
+  the body across as raw bytes, without parsing it; ``append=`` adds text
+  after the body in the same write
+- ``append_note(path, text, {...})`` appends to the end of the file and,
+  if the header changes, overwrites it where it is, using the padding
+  (a ``#`` comment line) that ``render_note``/``update_fields`` reserve
+  with ``slack=``; the body is neither read nor copied
+
+Usage:
+    from frontmatter import read_frontmatter, render_note, update_fields
+
+    meta = read_frontmatter(note_path)
+    text = render_note({'type': 'email', 'subject': subject}, body)
+    update_fields(note_path, {'status': 'posted'})
+"""
+
+import os
+import re
+import json
+import math
+import shutil
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+DELIMITER = '---'
+
+_INT = re.compile(r'^[-+]?(0|[1-9][0-9]*)$')
+_FLOAT = re.compile(r'^[-+]?([0-9]+(\.[0-9]*)?|\.[0-9]+)([eE][-+]?[0-9]+)?$')
+# YAML spellings of the non-finite floats (compared lower-cased)
+_SPECIAL_FLOATS = {'.inf': math.inf, '+.inf': math.inf, '-.inf': -math.inf, '.nan': math.nan}
+_KEY_LINE = re.compile(r'^([^\s#:][^:]*?)\s*:(?:\s+(.*))?$')
+_PLAIN_UNSAFE_START = set('-?:,[]{}#&*!|>\'"%@`')
+_NUMBER_START = set('0123456789-+.')
+_RESERVED = {'true', 'false', 'yes', 'no', 'on', 'off', 'null', '~', 'y', 'n'}
+_PADDING_LINE = re.compile(r'^#[ ]*\r?\n?$')
+
+# Default room reserved in headers that append_note keeps rewriting
+HEADER_SLACK = 512
+
+
+# ------------------------------------------------------------------- parsing
+
+def parse_scalar(raw: str) -> Any:
+    """Convert one YAML scalar to a Python value."""
+    value = raw.strip()
+    if not value or value == '~':
+        return None
+    first = value[0]
+    if first == '"' and value[-1] == '"' and len(value) >= 2:
+        try:
+            return json.loads(value)
+        except ValueError:
+            return value[1:-1]
+    if first == "'" and value[-1] == "'" and len(value) >= 2:
+        return value[1:-1].replace("''", "'")
+    if first == '[' and value[-1] == ']':
+        return [parse_scalar(item) for item in _split_flow(value[1:-1])]
+    if first == '{' and value[-1] == '}':
+        # dump_scalar writes dicts as JSON
+        try:
+            return json.loads(value)
+        except ValueError:
+            return value
+    if first in _NUMBER_START:
+        if _INT.match(value):
+            return int(value)
+        if _FLOAT.match(value):
+            return float(value)
+        special = _SPECIAL_FLOATS.get(value.lower())
+        if special is not None:
+            return special
+    elif len(value) in (4, 5):
+        lowered = value.lower()
+        if lowered == 'true':
+            return True
+        if lowered == 'false':
+            return False
+        if lowered == 'null':
+            return None
+    return value
+
+
+def _split_flow(inner: str) -> List[str]:
+    """
+    Split the inside of a ``[a, "b, c"]`` flow list on top-level commas.
+
+    A quote only opens at the start of an item or value (after ``[``, ``{``,
+    ``,`` or ``:``), so apostrophes inside words are plain text; ``\\``
+    escapes inside double quotes and ``''`` inside single quotes are
+    honored, and commas inside nested lists and dicts do not split.
+    """
+    items, current, quote, depth = [], [], None, 0
+    previous = ''  # last non-space character outside quotes
+    i = 0
+    while i < len(inner):
+        ch = inner[i]
+        current.append(ch)
+        if quote:
+            if ch == '\\' and quote == '"' and i + 1 < len(inner):
+                current.append(inner[i + 1])
+                i += 1
+            elif ch == quote:
+                if quote == "'" and inner[i + 1:i + 2] == "'":
+                    current.append("'")
+                    i += 1
+                else:
+                    quote, previous = None, ch
+        elif ch in '"\'' and previous in ('', '[', '{', ',', ':'):
+            quote = ch
+        elif ch == ',' and depth == 0:
+            current.pop()
+            items.append(''.join(current))
+            current, previous = [], ''
+        else:
+            if ch in '[{':
+                depth += 1
+            elif ch in ']}':
+                depth = max(0, depth - 1)
+            if not ch.isspace():
+                previous = ch
+        i += 1
+    items.append(''.join(current))
+    return [item for item in items if item.strip()]
+
+
+def parse_header(lines: Iterable[str]) -> Dict[str, Any]:
+    """
+    Parse frontmatter lines (without the ``---`` delimiters).
+
+    Supports ``key: scalar``, flow lists ``key: [a, b]`` and block lists::
+
+        tags:
+          - a
+          - b
+    """
+    fields: Dict[str, Any] = {}
+    current_key = None
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if not line or line[0] == '#':
+            continue
+        if line[0] in ' \t-':
+            stripped = line.strip()
+            if current_key is not None and stripped.startswith('-'):
+                if not isinstance(fields.get(current_key), list):
+                    fields[current_key] = []
+                fields[current_key].append(parse_scalar(stripped[1:]))
+            continue
+        key, sep, value = line.partition(':')
+        if not sep or (value and value[0] not in ' \t'):
+            # Not a "key: value" line (e.g. "http://..." continuation)
+            current_key = None
+            continue
+        current_key = key.rstrip()
+        fields[current_key] = parse_scalar(value)
+    return fields
+
+
+_HEADER_CHUNK = 1024
+
+
+def _read_header_lines(f) -> Tuple[Optional[List[str]], int]:
+    """
+    Read raw header lines from an (ideally unbuffered) binary file at offset 0.
+
+    Reads in small chunks and stops as soon as the closing delimiter is seen,
+    so a note's body is never pulled off disk.
+
+    Returns:
+        (lines, body_offset); lines is None if the file has no frontmatter
+    """
+    data = f.read(_HEADER_CHUNK)
+    if not data.startswith(b'---'):
+        return None, 0
+    first_nl = data.find(b'\n')
+    while first_nl < 0:
+        chunk = f.read(_HEADER_CHUNK)
+        if not chunk:
+            return None, 0
+        data += chunk
+        first_nl = data.find(b'\n')
+    if data[:first_nl].strip() != b'---':
+        return None, 0
+
+    search_from = first_nl
+    while True:
+        end = data.find(b'\n---', search_from)
+        while end >= 0:
+            line_end = data.find(b'\n', end + 1)
+            if line_end < 0:
+                # Need more bytes to see the whole candidate line
+                break
+            if data[end + 1:line_end].strip() == b'---':
+                header = data[first_nl + 1:end + 1].decode('utf-8', errors='replace')
+                return header.splitlines(keepends=True), line_end + 1
+            end = data.find(b'\n---', end + 1)
+        chunk = f.read(_HEADER_CHUNK)
+        if not chunk:
+            if end >= 0 and data[end + 1:].strip() == b'---':
+                # Closing delimiter is the last line, without a trailing newline
+                header = data[first_nl + 1:end + 1].decode('utf-8', errors='replace')
+                return header.splitlines(keepends=True), len(data)
+            # Unterminated header: treat the file as having no frontmatter
+            return None, 0
+        search_from = end if end >= 0 else max(first_nl, len(data) - 4)
+        data += chunk
+
+
+def read_frontmatter(path: Path) -> Dict[str, Any]:
+    """Parse a note's frontmatter, reading only the header block from disk."""
+    with open(path, 'rb', buffering=0) as f:
+        lines, _ = _read_header_lines(f)
+    return parse_header(lines) if lines is not None else {}
+
+
+def split_note(text: str) -> Tuple[Dict[str, Any], str]:
+    """
+    Split full note text into (frontmatter, body).
+
+    The body has the blank line that usually follows the header removed.
+    """
+    if not text.startswith(DELIMITER):
+        return {}, text
+    first_nl = text.find('\n')
+    if first_nl < 0 or text[:first_nl].strip() != DELIMITER:
+        return {}, text
+    pos = first_nl + 1
+    header = []
+    while pos < len(text):
+        nl = text.find('\n', pos)
+        end = len(text) if nl < 0 else nl + 1
+        line = text[pos:end]
+        if line.strip() == DELIMITER:
+            return parse_header(header), text[end:].lstrip('\r\n')
+        header.append(line)
+        pos = end
+    return {}, text
+
+
+def read_note(path: Path) -> Tuple[Dict[str, Any], str]:
+    """Read a whole note and return (frontmatter, body)."""
+    return split_note(Path(path).read_text(encoding='utf-8'))
+
+
+# --------------------------------------------------------------- serializing
+
+def dump_scalar(value: Any) -> str:
+    """Serialize one value as a YAML scalar, quoting only when necessary."""
+    if value is None:
+        return 'null'
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, float) and not math.isfinite(value):
+        return '.nan' if math.isnan(value) else ('.inf' if value > 0 else '-.inf')
+    if isinstance(value, (int, float)):
+        return repr(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (list, tuple, set)):
+        return '[' + ', '.join(_dump_flow_item(v) for v in value) + ']'
+    if isinstance(value, dict):
+        return json.dumps(value, ensure_ascii=False, default=str)
+
+    text = str(value)
+    if _needs_quotes(text):
+        # JSON strings are valid YAML double-quoted scalars
+        return json.dumps(text, ensure_ascii=False)
+    return text
+
+
+def _dump_flow_item(value: Any) -> str:
+    text = dump_scalar(value)
+    if isinstance(value, str) and not text.startswith('"') and any(ch in text for ch in ',[]{}\'"'):
+        return json.dumps(value, ensure_ascii=False)
+    return text
+
+
+def _needs_quotes(text: str) -> bool:
+    if not text or text != text.strip():
+        return True
+    if text[0] in _PLAIN_UNSAFE_START:
+        return True
+    lowered = text.lower()
+    if lowered in _RESERVED or lowered in _SPECIAL_FLOATS or _INT.match(text) or _FLOAT.match(text):
+        return True
+    if ': ' in text or ' #' in text or text.endswith(':'):
+        return True
+    return any(ch in text for ch in '\n\r\t') or any(ord(ch) < 32 for ch in text)
+
+
+def dumps(fields: Dict[str, Any]) -> str:
+    """Serialize a frontmatter dict as ``key: value`` lines (no delimiters)."""
+    return ''.join(f'{key}: {dump_scalar(value)}\n' for key, value in fields.items())
+
+
+def _padding(size: int) -> str:
+    """A comment line of exactly ``size`` bytes (at least 2)."""
+    return '#' + ' ' * (size - 2) + '\n'
+
+
+def render_note(fields: Dict[str, Any], body: str, slack: int = 0) -> str:
+    """
+    Build full note text: delimited frontmatter, a blank line, then the body.
+
+    Args:
+        fields: Frontmatter
+        body: Note body
+        slack: Bytes of padding to reserve in the header for append_note
+    """
+    padding = _padding(max(2, slack)) if slack else ''
+    return f'{DELIMITER}\n{dumps(fields)}{padding}{DELIMITER}\n\n{body}'
+
+
+# ------------------------------------------------------------------ updating
+
+def _updated_header(lines: List[str], updates: Dict[str, Any], remove: Iterable[str]) -> List[str]:
+    """
+    Header lines with ``updates`` applied: existing keys rewritten in place
+    (keeping their order), new keys appended, keys in ``remove`` dropped.
+    """
+    remove = set(remove)
+    pending = dict(updates)
+    out_lines = []
+    skipping = False
+    for line in lines:
+        match = _KEY_LINE.match(line.rstrip('\r\n')) if line and not line[0].isspace() else None
+        if match:
+            key = match.group(1).strip()
+            skipping = False
+            if key in remove:
+                skipping = True
+                continue
+            if key in pending:
+                out_lines.append(f'{key}: {dump_scalar(pending.pop(key))}\n')
+                skipping = True  # drop any block-list continuation of the old value
+                continue
+        elif skipping and (line[:1].isspace() or line.lstrip().startswith('-')):
+            continue
+        out_lines.append(line if line.endswith('\n') else line + '\n')
+    out_lines.extend(f'{key}: {dump_scalar(value)}\n'
+                     for key, value in pending.items() if key not in remove)
+    return out_lines
+
+
+def update_fields(path: Path, updates: Dict[str, Any], remove: Iterable[str] = (),
+                  dest: Path = None, append: str = '', fsync: bool = False,
+                  slack: int = 0) -> Path:
+    """
+    Change frontmatter fields without parsing or re-encoding the body.
+
+    Existing keys are rewritten in place (keeping their order), new keys are
+    appended to the header, and keys in ``remove`` are dropped. The body is
+    copied across as raw bytes, followed by ``append`` if given. The result
+    is written to a temp file and renamed over ``dest`` (default: ``path``),
+    after an fsync of the temp file if ``fsync`` is set.
+
+    ``slack`` replaces the header's padding with room for append_note:
+    ``slack`` bytes, or the header's own size if larger, so rewrites get
+    rarer as a header grows.
+
+    Returns:
+        The path written
+    """
+    path = Path(path)
+    dest = Path(dest) if dest else path
+
+    with open(path, 'rb') as src:
+        lines, body_offset = _read_header_lines(src)
+        if lines is None:
+            lines, body_offset = [], 0
+            src.seek(0)
+            body_prefix = '\n'
+        else:
+            body_prefix = ''
+
+        out_lines = _updated_header(lines, updates, remove)
+        if slack:
+            out_lines = [line for line in out_lines if not _PADDING_LINE.match(line)]
+            header_size = len(''.join(out_lines).encode('utf-8'))
+            out_lines.append(_padding(max(2, slack, header_size)))
+
+        tmp = dest.with_name(f'.{dest.name}.tmp')
+        with open(tmp, 'wb') as out:
+            out.write(f'{DELIMITER}\n{"".join(out_lines)}{DELIMITER}\n{body_prefix}'.encode('utf-8'))
+            src.seek(body_offset)
+            shutil.copyfileobj(src, out)
+            if append:
+                out.write(append.encode('utf-8'))
+            if fsync:
+                out.flush()
+                os.fsync(out.fileno())
+    os.replace(tmp, dest)
+    return dest
+
+
+def _write_at(f, data: bytes, offset: int):
+    """Write ``data`` at ``offset`` with one system call where the OS has pwrite."""
+    if hasattr(os, 'pwrite'):
+        written = os.pwrite(f.fileno(), data, offset)
+    else:
+        f.seek(offset)
+        written = f.write(data)
+    if written != len(data):
+        raise OSError(f'Short write: {written} of {len(data)} bytes')
+
+
+def append_note(path: Path, text: str, updates: Dict[str, Any] = None, remove: Iterable[str] = (),
+                fsync: bool = False) -> bool:
+    """
+    Append ``text`` to a note and apply frontmatter changes without copying
+    the body: the text is appended (and fsynced), then the header is
+    overwritten where it stands, its padding line absorbing the change in
+    size. The new header goes out in one positional write of the whole
+    block (``os.pwrite``), the same size as the old one, so a reader sees
+    the old header or the new one, never a mix of partial writes.
+
+    Returns:
+        False, with the note untouched, if the note has no frontmatter or
+        the new header does not fit in the old one plus its padding (use
+        ``update_fields(..., append=text, slack=...)`` then)
+    """
+    with open(path, 'r+b', buffering=0) as f:
+        lines, body_offset = _read_header_lines(f)
+        if lines is None:
+            return False
+
+        block = None
+        if updates or remove:
+            kept = [line for line in _updated_header(lines, updates or {}, remove)
+                    if not _PADDING_LINE.match(line)]
+            header = f'{DELIMITER}\n{"".join(kept)}'.encode('utf-8')
+            closing = f'{DELIMITER}\n'.encode('utf-8')
+            spare = body_offset - len(header) - len(closing)
+            if spare < 0 or spare == 1:
+                return False
+            block = header + (_padding(spare).encode('utf-8') if spare else b'') + closing
+
+        # Body first: if the header write never happens the note still
+        # parses, with the old fields
+        f.seek(0, os.SEEK_END)
+        f.write(text.encode('utf-8'))
+        if fsync:
+            os.fsync(f.fileno())
+        if block is not None:
+            _write_at(f, block, 0)
+            if fsync:
+                os.fsync(f.fileno())
+    return True
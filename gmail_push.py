@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Gmail Push Receiver
+===================
+
+Local HTTP endpoint for Gmail push notifications, delivered the way Cloud
+Pub/Sub push subscriptions deliver them: a POST whose JSON envelope
+carries ``message.data``, the base64 encoding of
+``{"emailAddress": ..., "historyId": ...}``.
+
+The receiver only decodes and acknowledges; what to do with a notification
+is up to the callback (``GmailWatcher.on_push_notification`` wakes the
+watcher for an incremental fetch). Requests are acknowledged with 204 even
+when the callback ignores them, since Pub/Sub redelivers anything else.
+
+Run as a script it is a stand-in publisher that posts notifications to a
+receiver, for testing without Google Cloud:
+
+    python gmail_push.py --url http://127.0.0.1:8085/gmail/push \\
+        --email me@example.com --history-id 12345 --count 5
+
+Usage:
+    receiver = PushReceiver(watcher.on_push_notification, port=8085).start()
+    ...
+    receiver.stop()
+
+    # Several mailboxes behind one endpoint, routed by emailAddress
+    router = PushRouter()
+    router.add('me@example.com', work.on_push_notification)
+    router.add('me@gmail.com', personal.on_push_notification)
+    receiver = PushReceiver(router, port=8085).start()
+"""
+
+import json
+import time
+import base64
+import logging
+import argparse
+import threading
+from typing import Callable, Dict, Optional
+from urllib.parse import parse_qs, urlsplit
+
+logger = logging.getLogger('GmailPush')
+
+DEFAULT_PATH = '/gmail/push'
+
+# Pub/Sub push requests are small; refuse anything unreasonable
+MAX_BODY_BYTES = 64 * 1024
+
+
+def decode_push(body: bytes) -> Dict:
+    """
+    Decode a Pub/Sub push envelope.
+
+    Returns:
+        The notification (``emailAddress``, ``historyId``) plus
+        ``messageId`` and ``publishTime`` from the envelope
+
+    Raises:
+        ValueError: Not a Gmail push notification
+    """
+    envelope = json.loads(body)
+    message = envelope.get('message') if isinstance(envelope, dict) else None
+    if not isinstance(message, dict) or 'data' not in message:
+        raise ValueError('missing message.data')
+    data = message['data']
+    notification = json.loads(base64.b64decode(data + '=' * (-len(data) % 4), altchars=b'-_'))
+    if not isinstance(notification, dict) or 'historyId' not in notification:
+        raise ValueError('missing historyId')
+    notification['messageId'] = message.get('messageId') or message.get('message_id')
+    notification['publishTime'] = message.get('publishTime') or message.get('publish_time')
+    return notification
+
+
+def encode_push(email_address: str, history_id, message_id: str = None,
+                subscription: str = 'projects/local/subscriptions/gmail-push') -> bytes:
+    """Build the envelope Pub/Sub would POST for one Gmail notification."""
+    data = json.dumps({'emailAddress': email_address, 'historyId': int(history_id)})
+    return json.dumps({
+        'message': {
+            'data': base64.b64encode(data.encode('utf-8')).decode('ascii'),
+            'messageId': message_id or str(time.time_ns()),
+            'publishTime': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        },
+        'subscription': subscription,
+    }).encode('utf-8')
+
+
+def publish(url: str, email_address: str, history_id, timeout: float = 5.0) -> int:
+    """POST one notification to a receiver (the local stand-in publisher); returns the status."""
+    from urllib.request import Request, urlopen
+
+    request = Request(url, data=encode_push(email_address, history_id), method='POST',
+                      headers={'Content-Type': 'application/json'})
+    with urlopen(request, timeout=timeout) as response:
+        return response.status
+
+
+def _handler_class(receiver: 'PushReceiver'):
+    """Request handler for the push path; http.server is only imported when serving."""
+    from http.server import BaseHTTPRequestHandler
+
+    class _PushHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            url = urlsplit(self.path)
+            if url.path != receiver.path:
+                self.send_error(404)
+                return
+            if receiver.token and parse_qs(url.query).get('token', [None])[0] != receiver.token:
+                receiver.rejected += 1
+                self.send_error(403)
+                return
+            length = int(self.headers.get('Content-Length') or 0)
+            if length > MAX_BODY_BYTES:
+                receiver.rejected += 1
+                self.send_error(413)
+                return
+            try:
+                notification = decode_push(self.rfile.read(length))
+            except (ValueError, TypeError) as e:
+                receiver.rejected += 1
+                logger.warning(f'Rejected push request: {e}')
+                self.send_error(400)
+                return
+            receiver.received += 1
+            try:
+                receiver.callback(notification)
+            except Exception as e:
+                logger.error(f'Push callback failed: {e}')
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+    return _PushHandler
+
+
+class PushRouter:
+    """
+    Callback for one receiver serving several mailboxes: hands each
+    notification to the callback registered for its ``emailAddress``.
+    """
+
+    def __init__(self):
+        self.routes: Dict[str, Callable[[Dict], bool]] = {}
+        self.unrouted = 0
+
+    def add(self, email_address: str, callback: Callable[[Dict], bool]):
+        if not email_address:
+            raise ValueError('Push routing needs the mailbox address')
+        self.routes[email_address.lower()] = callback
+
+    def __call__(self, notification: Dict) -> bool:
+        callback = self.routes.get(str(notification.get('emailAddress', '')).lower())
+        if callback is None:
+            self.unrouted += 1
+            logger.warning(f"No mailbox for push notification to {notification.get('emailAddress')}")
+            return False
+        return callback(notification)
+
+
+class PushReceiver:
+    """Threaded HTTP server that hands decoded push notifications to a callback."""
+
+    def __init__(self, callback: Callable[[Dict], None], host: str = '127.0.0.1',
+                 port: int = 8085, path: str = DEFAULT_PATH, token: Optional[str] = None):
+        """
+        Args:
+            callback: Called with each decoded notification (server thread)
+            host: Interface to bind (localhost by default; put a tunnel or
+                reverse proxy in front for real Pub/Sub delivery)
+            port: Port to listen on (0 = any free port)
+            path: URL path accepting notifications
+            token: If set, requests must carry ``?token=<token>`` (the
+                verification token configured on the push subscription)
+        """
+        self.callback = callback
+        self.host = host
+        self.port = port
+        self.path = path
+        self.token = token
+        self.received = 0
+        self.rejected = 0
+        self._server = None
+
+    @property
+    def url(self) -> str:
+        query = f'?token={self.token}' if self.token else ''
+        return f'http://{self.host}:{self.port}{self.path}{query}'
+
+    def start(self) -> 'PushReceiver':
+        from http.server import ThreadingHTTPServer
+        self._server = ThreadingHTTPServer((self.host, self.port), _handler_class(self))
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, name='GmailPushHTTP', daemon=True).start()
+        logger.info(f'Gmail push endpoint: http://{self.host}:{self.port}{self.path}')
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def main():
+    """Stand-in publisher: post notifications to a running receiver."""
+    parser = argparse.ArgumentParser(description='Post Pub/Sub-style Gmail push notifications to a receiver')
+    parser.add_argument('--url', default=f'http://127.0.0.1:8085{DEFAULT_PATH}', help='Receiver URL')
+    parser.add_argument('--email', required=True, help='emailAddress in the notification')
+    parser.add_argument('--history-id', type=int, required=True, help='historyId of the first notification')
+    parser.add_argument('--count', type=int, default=1, help='Notifications to send (historyId increases by 1)')
+    parser.add_argument('--interval', type=float, default=0.0, help='Seconds between notifications')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    for i in range(args.count):
+        status = publish(args.url, args.email, args.history_id + i)
+        logger.info(f'historyId {args.history_id + i}: HTTP {status}')
+        if args.interval and i + 1 < args.count:
+            time.sleep(args.interval)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""
+Gmail Transport
+===============
+
+How ``GmailWatcher`` talks to the Gmail API. Every request goes through
+``GmailTransport.execute``, which applies, in order:
+
+- ``CircuitBreaker``: after ``failure_threshold`` calls in a row fail for
+  transient reasons (after their retries), calls fail fast with
+  ``CircuitOpen`` for ``reset_timeout`` seconds; then a single trial call
+  decides whether to close it again
+- ``QuotaLimiter``: a token bucket of Gmail quota units (250 per user per
+  second by default), charged per method (``messages.get`` costs 5,
+  ``history.list`` 2, a batch the sum of its calls), so bursts are spread
+  out before Gmail answers 429
+- ``Backoff``: 429, 5xx, rate-limit 403s and network errors are retried
+  with exponential backoff and full jitter; a ``Retry-After`` header sets
+  the minimum wait
+
+Requests travel over ``PooledHttp``, an httplib2-compatible adapter over
+one ``requests.Session`` with a bounded keep-alive connection pool, shared
+by every thread (httplib2 itself holds one connection per host and is not
+thread-safe).
+
+Usage:
+    transport = GmailTransport(watcher.metrics)
+    service = build('gmail', 'v1', http=transport.authorized_http(creds))
+    profile = transport.execute(service.users().getProfile(userId='me'), 'getProfile')
+"""
+
+import time
+import random
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Callable, Optional
+
+logger = logging.getLogger('GmailTransport')
+
+# Quota units per method (developers.google.com/gmail/api/reference/quota)
+QUOTA_UNITS = {
+    'getProfile': 1,
+    'watch': 100,
+    'stop': 50,
+    'history.list': 2,
+    'labels.list': 1,
+    'messages.list': 5,
+    'messages.get': 5,
+    'messages.modify': 5,
+    'messages.send': 100,
+    'attachments.get': 5,
+    'threads.get': 10,
+    'threads.list': 10,
+}
+DEFAULT_QUOTA_UNITS = 5
+
+# Gmail's per-user limit is 250 units per second (a moving average, so
+# short bursts above it are tolerated)
+DEFAULT_UNITS_PER_SECOND = 250
+
+DEFAULT_MAX_RETRIES = 4
+DEFAULT_BASE_DELAY = 0.5
+DEFAULT_MAX_DELAY = 32.0
+
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 60.0
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_TIMEOUT = 60.0
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+# 403 reasons that mean "slow down" rather than "forbidden"
+RATE_LIMIT_REASONS = (b'rateLimitExceeded', b'userRateLimitExceeded')
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling Gmail while the circuit breaker is open."""
+
+    def __init__(self, retry_in: float):
+        super().__init__(f'Gmail circuit open; next attempt in {retry_in:.0f}s')
+        self.retry_in = retry_in
+
+
+def http_status(error: Exception) -> Optional[int]:
+    """HTTP status of a googleapiclient HttpError (None for other errors)."""
+    return getattr(getattr(error, 'resp', None), 'status', None)
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """429, or a 403 whose reason is a rate limit."""
+    status = http_status(error)
+    if status == 403:
+        content = getattr(error, 'content', b'') or b''
+        if isinstance(content, str):
+            content = content.encode('utf-8', 'replace')
+        return any(reason in content for reason in RATE_LIMIT_REASONS) or \
+            'rate limit' in str(getattr(error, 'reason', '')).lower()
+    return status == 429
+
+
+def is_transient(error: Exception) -> bool:
+    """Worth retrying: rate limits, server errors and network failures."""
+    status = http_status(error)
+    if status is None:
+        return isinstance(error, (OSError, TimeoutError))
+    return status in RETRYABLE_STATUSES or is_rate_limited(error)
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Seconds requested by a ``Retry-After`` header (delay or HTTP date)."""
+    resp = getattr(error, 'resp', None)
+    value = resp.get('retry-after') if hasattr(resp, 'get') else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class QuotaLimiter:
+    """Token bucket of quota units, shared by every thread."""
+
+    def __init__(self, units_per_second: float = DEFAULT_UNITS_PER_SECOND, burst: float = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            units_per_second: Refill rate (0 = unlimited)
+            burst: Bucket size (default: one second of units)
+            clock: Monotonic time source
+        """
+        self.rate = units_per_second
+        self.capacity = burst or units_per_second
+        self.clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self, units: float) -> float:
+        """
+        Take ``units`` from the bucket, going into debt if needed.
+
+        Returns:
+            Seconds the caller must wait before sending (0 if none)
+        """
+        if not self.rate:
+            return 0.0
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= units
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+
+class Backoff:
+    """Exponential backoff with full jitter, floored by ``Retry-After``."""
+
+    def __init__(self, max_retries: int = DEFAULT_MAX_RETRIES, base_delay: float = DEFAULT_BASE_DELAY,
+                 max_delay: float = DEFAULT_MAX_DELAY, rng: random.Random = None):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.rng = rng or random.Random()
+
+    def delay(self, attempt: int, floor: float = None) -> Optional[float]:
+        """
+        Wait before retry number ``attempt`` (1-based).
+
+        Returns:
+            Seconds to wait, or None if the server asked for longer than
+            ``max_delay`` (give up for this cycle)
+        """
+        if floor is not None and floor > self.max_delay:
+            return None
+        delay = self.rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+        return max(delay, floor or 0.0)
+
+
+class CircuitBreaker:
+    """Closed -> open after consecutive failures -> half-open trial -> closed."""
+
+    CLOSED, HALF_OPEN, OPEN = 0, 1, 2
+
+    def __init__(self, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 reset_timeout: float = DEFAULT_RESET_TIMEOUT,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Let a call through or raise CircuitOpen."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            waited = self.clock() - self.opened_at
+            if self.state == self.OPEN and waited >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN and not self._trial:
+                self._trial = True
+                return
+            raise CircuitOpen(max(0.0, self.reset_timeout - waited))
+
+    def record_success(self):
+        with self._lock:
+            self.state, self.failures, self._trial = self.CLOSED, 0, False
+
+    def record_failure(self) -> bool:
+        """Count a transient failure; True if this opened the circuit."""
+        with self._lock:
+            self.failures += 1
+            self._trial = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                opened = self.state != self.OPEN
+                self.state, self.opened_at = self.OPEN, self.clock()
+                return opened
+            return False
+
+
+class PooledHttp:
+    """
+    httplib2-compatible ``request()`` over a ``requests.Session``, so the
+    Google client reuses keep-alive connections from a bounded pool that is
+    safe to share between threads.
+    """
+
+    def __init__(self, pool_size: int = DEFAULT_POOL_SIZE, timeout: float = DEFAULT_TIMEOUT):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.timeout = timeout
+        self.follow_redirects = True
+        self.redirect_codes = frozenset((300, 301, 302, 303, 307))
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size, pool_block=True)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def request(self, uri, method='GET', body=None, headers=None, redirections=5,
+                connection_type=None, **kwargs):
+        import httplib2
+
+        response = self.session.request(method, uri, data=body, headers=headers,
+                                        timeout=self.timeout,
+                                        allow_redirects=self.follow_redirects and redirections > 0)
+        info = {k.lower(): v for k, v in response.headers.items()}
+        # requests already decompressed the body
+        info.pop('content-encoding', None)
+        info['status'] = str(response.status_code)
+        resp = httplib2.Response(info)
+        resp.reason = response.reason
+        return resp, response.content
+
+    def close(self):
+        self.session.close()
+
+
+class GmailTransport:
+    """Rate-limited, retrying, circuit-broken execution of Gmail requests."""
+
+    def __init__(self, metrics, limiter: QuotaLimiter = None, backoff: Backoff = None,
+                 breaker: CircuitBreaker = None, pool_size: int = DEFAULT_POOL_SIZE,
+                 sleep: Callable[[float], object] = time.sleep, http: 'PooledHttp' = None):
+        """
+        Args:
+            metrics: The watcher's WatcherMetrics
+            limiter: Quota token bucket (default: 250 units/s)
+            backoff: Retry policy (default: 4 retries, 0.5 s doubling to 32 s)
+            breaker: Circuit breaker (default: open after 5 failures for 60 s)
+            pool_size: Connections kept by the pooled HTTP session
+            sleep: Wait function (a stop event's ``wait`` makes waits interruptible)
+            http: Pooled session shared with other transports (e.g. one per
+                account); left open by ``close()``
+        """
+        self.limiter = limiter or QuotaLimiter()
+        self.backoff = backoff or Backoff()
+        self.breaker = breaker or CircuitBreaker()
+        self.pool_size = pool_size
+        self.sleep = sleep
+        self.http = http
+        self._owns_http = http is None
+
+        self.throttled = metrics.counter('gmail_throttled_calls_total',
+                                         'Calls held back by the quota limiter')
+        self.throttle_wait = metrics.counter('gmail_throttle_wait_seconds_total',
+                                             'Time spent waiting for quota')
+        self.rate_limited = metrics.counter('gmail_rate_limited_responses_total',
+                                            'Responses refused for rate limits (429 / 403 rateLimitExceeded)')
+        self.retried = metrics.counter('gmail_retried_calls_total', 'Calls sent again after a transient error')
+        self.quota_units = metrics.counter('gmail_quota_units_total', 'Quota units spent')
+        self.circuit_state = metrics.gauge('gmail_circuit_state', 'Circuit breaker: 0 closed, 1 half-open, 2 open')
+        self.circuit_opens = metrics.counter('gmail_circuit_opens_total', 'Times the circuit breaker opened')
+
+    def authorized_http(self, creds):
+        """Credentials-applying HTTP object over the shared pooled session."""
+        from google_auth_httplib2 import AuthorizedHttp
+
+        if self.http is None:
+            self.http = PooledHttp(self.pool_size)
+        return AuthorizedHttp(creds, http=self.http)
+
+    def throttle(self, units: float):
+        """Wait until ``units`` of quota are available."""
+        wait = self.limiter.reserve(units)
+        self.quota_units.inc(units)
+        if wait > 0:
+            self.throttled.inc()
+            self.throttle_wait.inc(wait)
+            self.sleep(wait)
+
+    def execute(self, request, method: str, units: float = None):
+        """
+        Execute a googleapiclient request (or batch) under the quota,
+        retry and circuit-breaker policy.
+
+        Args:
+            request: Object with ``execute()``
+            method: API method ('messages.get', ...), for quota costs
+            units: Quota cost (default: the method's cost from QUOTA_UNITS)
+
+        Returns:
+            The response
+
+        Raises:
+            CircuitOpen: The breaker is open; nothing was sent
+            Exception: The last error, when it is not transient or the
+                retries ran out
+        """
+        if units is None:
+            units = QUOTA_UNITS.get(method, DEFAULT_QUOTA_UNITS)
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            self.throttle(units)
+            try:
+                response = request.execute()
+            except Exception as e:
+                delay = self._retry_delay(e, method, attempt + 1)
+                if delay is None:
+                    raise
+                attempt += 1
+                self.retried.inc()
+                logger.warning(f'{method} failed ({e}); retry {attempt} in {delay:.2f}s')
+                self.sleep(delay)
+                continue
+            self.breaker.record_success()
+            self.circuit_state.set(self.breaker.state)
+            return response
+
+    def _retry_delay(self, error: Exception, method: str, attempt: int) -> Optional[float]:
+        """Record a failed attempt; the wait before retrying, or None to give up."""
+        if not is_transient(error):
+            self.breaker.record_success()  # Gmail answered; the request was at fault
+            self.circuit_state.set(self.breaker.state)
+            return None
+        if is_rate_limited(error):
+            self.rate_limited.inc()
+        delay = None
+        # A half-open trial gets one attempt
+        if attempt <= self.backoff.max_retries and self.breaker.state != CircuitBreaker.HALF_OPEN:
+            delay = self.backoff.delay(attempt, retry_after(error))
+        if delay is None:
+            self.record_failure(method)
+        return delay
+
+    def record_failure(self, method: str):
+        """Count a call that failed for good with a transient error."""
+        if self.breaker.record_failure():
+            self.circuit_opens.inc()
+            logger.error(f'Gmail circuit opened after {self.breaker.failures} failed calls '
+                         f'(last: {method}); pausing {self.breaker.reset_timeout:.0f}s')
+        self.circuit_state.set(self.breaker.state)
+
+    def retry_wait(self, attempt: int, errors) -> Optional[float]:
+        """
+        Wait before re-sending the failed calls of a batch (the batch itself
+        succeeded, so ``execute`` did not retry them).
+
+        Returns:
+            Seconds to wait, or None if the retries ran out or a
+            ``Retry-After`` is too long
+        """
+        errors = list(errors)
+        self.rate_limited.inc(sum(is_rate_limited(e) for e in errors))
+        if attempt > self.backoff.max_retries:
+            return None
+        floors = [s for s in (retry_after(e) for e in errors) if s is not None]
+        delay = self.backoff.delay(attempt, max(floors) if floors else None)
+        if delay is not None:
+            self.retried.inc(len(errors))
+        return delay
+
+    def close(self):
+        if self.http is not None and self._owns_http:
+            self.http.close()
+            self.http = None
@@ -5,7 +5,8 @@ Gmail Watcher - Monitors Gmail inbox for new emails and creates action items.
 This script:
 1. Connects to Gmail API using OAuth
 2. Monitors for new unread emails
-3. Creates markdown files in Needs_Action/ for each email
+3. Creates markdown files in Needs_Action/, one per conversation (new
+   replies are appended to the thread's note) or one per email
 4. Tracks processed emails to avoid duplicates
 5. Supports dry-run mode for testing
 
@@ -18,42 +19,96 @@ Setup:
 """
 
 import os
+import re
 import sys
 import json
+import math
+import time
 import pickle
 import argparse
+import fnmatch
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Optional
-from base_watcher import BaseWatcher
-
-# Google API imports
-try:
-    from google.auth.transport.requests import Request
-    from google.oauth2.credentials import Credentials
-    from google_auth_oauthlib.flow import InstalledAppFlow
-    from googleapiclient.discovery import build
-except ImportError:
-    print("ERROR: Google API client not installed.")
-    print("Install with: pip install google-auth-oauthlib google-auth-httplib2 google-api-python-client")
-    sys.exit(1)
-
-# Load environment
-from dotenv import load_dotenv
-load_dotenv()
-
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('gmail_watcher.log'),
-        logging.StreamHandler()
-    ]
-)
+from typing import Callable, List, Dict, Optional, Tuple
+from base_watcher import BaseWatcher, configure_logging, load_environment
+from scheduling import SchedulePolicy, AdaptiveInterval, FixedInterval
+from frontmatter import HEADER_SLACK, read_frontmatter, render_note
+from mime_decoder import (extract_body, iter_attachments, iter_base64_chunks, walk_parts,
+                          is_attachment, attachment_info)
+from attachment_store import AttachmentStore, AttachmentTooLarge
+from gmail_transport import (GmailTransport, PooledHttp, QuotaLimiter, Backoff, CircuitOpen, QUOTA_UNITS,
+                             DEFAULT_POOL_SIZE, DEFAULT_UNITS_PER_SECOND, http_status, is_transient)
+from metrics import start_metrics_export
+from urgency import UrgencyMatcher, load_matcher
+
 logger = logging.getLogger('GmailWatcher')
 
+GOOGLE_INSTALL_HINT = ('Install with: pip install google-auth-oauthlib google-auth-httplib2 '
+                       'google-api-python-client')
+
+# messages.list page size of the original polling loop ('list' sync mode)
+LIST_PAGE_SIZE = 10
+
+# Page size for history.list and full resyncs
+SYNC_PAGE_SIZE = 100
+
+# messages.list maximum, used when draining the whole unread backlog
+DRAIN_PAGE_SIZE = 500
+
+# History record types that can make a message newly relevant
+HISTORY_TYPES = ['messageAdded', 'labelRemoved']
+
+# Labels that take a message out of the 'is:unread' view
+HIDDEN_LABELS = {'SPAM', 'TRASH', 'DRAFT'}
+
+SYNC_MODES = ('history', 'list')
+
+# Gmail accepts at most 100 calls per batch; it recommends 50 to stay
+# clear of per-user rate limits
+MAX_BATCH_SIZE = 100
+DEFAULT_BATCH_SIZE = 50
+
+# Two-phase fetch: partial-response masks for the relevance check
+# (headers, labels, snippet) and for the payload of messages that pass
+FETCH_MODES = ('two-phase', 'full')
+METADATA_HEADERS = ['From', 'To', 'Subject', 'Date']
+METADATA_FIELDS = 'id,threadId,labelIds,snippet,sizeEstimate,payload/headers'
+FULL_FIELDS = 'id,threadId,labelIds,snippet,sizeEstimate,payload'
+
+# Gmail categories that never become action files unless overridden
+DEFAULT_SKIP_LABELS = 'CATEGORY_PROMOTIONS,CATEGORY_SOCIAL'
+HIGH_PRIORITY_LABELS = {'IMPORTANT', 'STARRED'}
+
+# Body text kept in the action file (bytes of the decoded text part)
+DEFAULT_MAX_BODY_BYTES = 500
+
+# Attachment downloads: parallel attachments.get calls, and what is kept
+# (Gmail's own limit is 25 MB per message)
+DEFAULT_ATTACHMENT_WORKERS = 4
+DEFAULT_ATTACHMENT_MAX_BYTES = 25 * 1024 * 1024
+DEFAULT_ATTACHMENT_TYPES = ('application/pdf,image/*,text/plain,text/csv,application/msword,'
+                            'application/vnd.ms-excel,application/vnd.openxmlformats-officedocument.*')
+
+# Push mode: slow safety-net poll, window that merges a burst of
+# notifications into one fetch, and users.watch renewal (watches expire
+# after 7 days; Google recommends renewing daily)
+DEFAULT_SAFETY_INTERVAL = 900
+DEFAULT_PUSH_COALESCE = 2.0
+WATCH_RENEW_SECONDS = 24 * 3600
+
+# Per-cycle fetch budget; whatever is left stays queued for the next cycle
+DEFAULT_CYCLE_MESSAGES = 100
+DEFAULT_CYCLE_BYTES = 25 * 1024 * 1024
+
+# Several mailboxes in one process: parallel account cycles by default
+DEFAULT_ACCOUNT_WORKERS = 4
+
+# Action notes: one per conversation (threadId, later replies appended) or
+# one per message
+NOTE_MODES = ('thread', 'message')
+
 # Gmail API scopes
 SCOPES = [
     'https://www.googleapis.com/auth/gmail.readonly',
@@ -62,10 +117,29 @@ SCOPES = [
 ]
 
 
+def account_slug(account: str) -> str:
+    """File-name-safe form of an account name (used for its token and state files)."""
+    return re.sub(r'[^a-z0-9_.@+-]+', '_', account.strip().lower())
+
+
+def parse_accounts(value: Optional[str]) -> List[str]:
+    """Account names from a comma-separated list (e.g. $GMAIL_ACCOUNTS)."""
+    return [a.strip() for a in (value or '').split(',') if a.strip()]
+
+
 class GmailWatcher(BaseWatcher):
     """Monitor Gmail inbox and create action items for new emails."""
 
-    def __init__(self, vault_path: str, credentials_path: str, check_interval: int = 120):
+    def __init__(self, vault_path: str, credentials_path: str, check_interval: int = 120,
+                 schedule: SchedulePolicy = None, sync_mode: str = None,
+                 resync_limit: int = 500, batch_size: int = None, max_retries: int = 3,
+                 drain: bool = False, cycle_messages: int = None, cycle_bytes: int = None,
+                 fetch_mode: str = None, skip_labels: str = None, max_body_bytes: int = None,
+                 attachments: bool = None, attachment_workers: int = None,
+                 attachment_max_bytes: int = None, attachment_types: str = None,
+                 quota_units_per_second: float = None, http_pool_size: int = None,
+                 account: str = None, http_session: PooledHttp = None, note_mode: str = None,
+                 urgency: UrgencyMatcher = None, dry_run: bool = False):
         """
         Initialize Gmail watcher.
 
@@ -73,17 +147,199 @@ class GmailWatcher(BaseWatcher):
             vault_path: Path to Obsidian vault
             credentials_path: Path to credentials.json
             check_interval: Seconds between checks (default 120)
+            schedule: Polling policy (default: fixed check_interval)
+            sync_mode: 'history' (incremental History API deltas) or 'list'
+                (re-list the newest unread messages every cycle); default
+                $GMAIL_SYNC_MODE, else 'history'
+            resync_limit: Most unread messages pulled by a full resync
+            batch_size: Messages fetched per HTTP batch request (1 = one
+                request per message); default $GMAIL_BATCH_SIZE, else 50
+            max_retries: Times a call failing with a rate limit, server or
+                network error is retried within a cycle
+            drain: Make a full resync page through every unread message
+                instead of stopping at resync_limit
+            cycle_messages: Most messages taken from the backlog per cycle;
+                default $GMAIL_CYCLE_MESSAGES, else 100
+            cycle_bytes: Stop fetching once this many response bytes were
+                downloaded in a cycle, 0 = no limit; default
+                $GMAIL_CYCLE_BYTES, else 25 MiB
+            fetch_mode: 'two-phase' (metadata first, full payload only for
+                relevant messages) or 'full'; default $GMAIL_FETCH_MODE,
+                else 'two-phase'
+            skip_labels: Comma-separated labels whose messages are skipped;
+                default $GMAIL_SKIP_LABELS, else promotions and social
+            max_body_bytes: Body text kept per email; default
+                $GMAIL_MAX_BODY_BYTES, else 500
+            attachments: Download attachments into <vault>/Attachments and
+                link them from the action file; default $GMAIL_ATTACHMENTS,
+                else off
+            attachment_workers: Parallel attachment downloads; default
+                $GMAIL_ATTACHMENT_WORKERS, else 4
+            attachment_max_bytes: Largest attachment kept; default
+                $GMAIL_ATTACHMENT_MAX_BYTES, else 25 MiB
+            attachment_types: Comma-separated MIME type patterns kept;
+                default $GMAIL_ATTACHMENT_TYPES, else documents and images
+            quota_units_per_second: Gmail quota units spent per second at
+                most (0 = no limit); default $GMAIL_QUOTA_UNITS_PER_SECOND,
+                else 250 (Gmail's per-user limit)
+            http_pool_size: Keep-alive connections in the pooled HTTP
+                session; default $GMAIL_HTTP_POOL_SIZE, else 10 (or more
+                with more attachment workers)
+            account: Mailbox name (e.g. 'work' or its address) when several
+                are watched; gives the watcher its own token file, dedup
+                store and sync state, and tags its action files. None keeps
+                the single-mailbox file names
+            http_session: Pooled HTTP session shared with other accounts
+            note_mode: 'thread' (one action file per conversation, new
+                messages appended to it) or 'message' (one per email);
+                default $GMAIL_NOTE_MODE, else 'thread'
+            urgency: Rules scoring subject and snippet (default: from
+                $URGENCY_RULES or the vault's Company_Handbook.md)
+            dry_run: Check without persisting anything (no cursor, backlog
+                or dedup records saved, no attachments downloaded)
         """
-        super().__init__(vault_path, check_interval, watcher_name='Gmail')
+        sync_mode = sync_mode or os.getenv('GMAIL_SYNC_MODE', 'history')
+        if sync_mode not in SYNC_MODES:
+            raise ValueError(f'Unknown sync mode: {sync_mode}')
+        fetch_mode = fetch_mode or os.getenv('GMAIL_FETCH_MODE', 'two-phase')
+        if fetch_mode not in FETCH_MODES:
+            raise ValueError(f'Unknown fetch mode: {fetch_mode}')
+        note_mode = note_mode or os.getenv('GMAIL_NOTE_MODE', 'thread')
+        if note_mode not in NOTE_MODES:
+            raise ValueError(f'Unknown note mode: {note_mode}')
+        self.account = account
+        super().__init__(vault_path, check_interval, schedule=schedule,
+                         watcher_name=f'Gmail:{account}' if account else 'Gmail', dry_run=dry_run)
         self.credentials_path = Path(credentials_path)
-        self.token_path = Path('gmail_token.pickle')
+        token_dir = Path(os.getenv('GMAIL_TOKEN_DIR', '.'))
+        namespace = f'gmail-{account_slug(account)}' if account else 'gmail'
+        self.token_path = token_dir / (f'gmail_token_{account_slug(account)}.pickle' if account
+                                       else 'gmail_token.pickle')
+        self.discovery_cache_path = Path(os.getenv('GMAIL_DISCOVERY_CACHE', 'gmail_discovery_v1.json'))
         self.service = None
         self.creds = None
-        self.processed_ids = set()
-        self._load_processed_ids()
+        # Imports the old .processed_emails JSON list on first run
+        self.processed_ids = self.open_dedup_store(namespace,
+                                                   legacy_file=None if account else '.processed_emails')
+
+        # History API cursor (historyId), pending backlog and unread estimate
+        self.sync_mode = sync_mode
+        self.resync_limit = resync_limit
+        self.drain = drain
+        self.sync_state = self.open_sync_state(namespace)
+        self.full_resyncs = self.metrics.counter('gmail_full_resyncs_total',
+                                                 'Full resyncs (no stored or expired historyId)')
+        self.calls_saved = self.metrics.counter('gmail_api_calls_saved_total',
+                                                'List calls avoided by history sync')
+        self.calls_saved_last = self.metrics.gauge('gmail_api_calls_saved_last_cycle',
+                                                   'List calls avoided by history sync in the last cycle')
+
+        # Message fetch: HTTP batches, retrying only the messages that failed
+        batch_size = batch_size or int(os.getenv('GMAIL_BATCH_SIZE', DEFAULT_BATCH_SIZE))
+        if batch_size > MAX_BATCH_SIZE:
+            logger.warning(f"Batch size {batch_size} exceeds Gmail's limit; using {MAX_BATCH_SIZE}")
+        self.batch_size = max(1, min(batch_size, MAX_BATCH_SIZE))
+        self.batch_latency = self.metrics.histogram('gmail_batch_fetch_seconds',
+                                                    'Latency of one batched messages.get request')
+        self.fetch_latency = self.metrics.histogram('gmail_message_fetch_seconds',
+                                                    'Latency of one unbatched messages.get request')
+
+        # Backlog drain: new IDs queue oldest first, each cycle takes a budget's worth
+        if cycle_messages is None:
+            cycle_messages = int(os.getenv('GMAIL_CYCLE_MESSAGES', DEFAULT_CYCLE_MESSAGES))
+        if cycle_bytes is None:
+            cycle_bytes = int(os.getenv('GMAIL_CYCLE_BYTES', DEFAULT_CYCLE_BYTES))
+        self.cycle_messages = max(1, cycle_messages)
+        self.cycle_bytes = max(0, cycle_bytes)
+        self.backlog_remaining = self.metrics.gauge('gmail_backlog_remaining',
+                                                    'Messages queued for later cycles')
+        self.backlog_remaining.set(len(self.sync_state.get('backlog', [])))
+        self.dropped = self.metrics.counter('gmail_messages_dropped_total',
+                                            'Messages given up on after a permanent fetch error')
+
+        # Two-phase fetch: relevance from metadata, payload only when kept
+        self.fetch_mode = fetch_mode
+        if skip_labels is None:
+            skip_labels = os.getenv('GMAIL_SKIP_LABELS', DEFAULT_SKIP_LABELS)
+        self.skip_labels = {label.strip() for label in skip_labels.split(',') if label.strip()}
+        if max_body_bytes is None:
+            max_body_bytes = int(os.getenv('GMAIL_MAX_BODY_BYTES', DEFAULT_MAX_BODY_BYTES))
+        self.max_body_bytes = max_body_bytes
+        self.urgency = urgency or load_matcher(vault_path)
+        self.cycle_downloaded = 0
+        self.skipped = self.metrics.counter('gmail_messages_skipped_total',
+                                            'Messages dropped by the relevance check')
+        self.metadata_bytes = self.metrics.counter('gmail_metadata_downloaded_bytes_total',
+                                                   'Bytes of format=metadata responses')
+        self.payload_bytes = self.metrics.counter('gmail_payload_downloaded_bytes_total',
+                                                  'Bytes of format=full responses')
+        self.cycle_downloaded_last = self.metrics.gauge('gmail_downloaded_bytes_last_cycle',
+                                                        'Response bytes downloaded in the last cycle')
+
+        # Thread notes: later messages of a conversation are appended to its note
+        self.note_mode = note_mode
+        self._unpublished_threads = set()  # notes submitted to the writer, maybe not on disk yet
+        self._last_note_status = None  # of the latest create_action_file call
+        self.thread_appends = self.metrics.counter('gmail_thread_messages_appended_total',
+                                                   'Messages appended to an existing thread note')
+
+        # Push mode (see start_push); the address routes notifications
+        self.email_address = account if account and '@' in account else None
+        self.watch_topic = None
+        self.push_notifications = self.metrics.counter('gmail_push_notifications_total',
+                                                       'Push notifications received')
+        self.push_ignored = self.metrics.counter('gmail_push_ignored_total',
+                                                 'Push notifications already covered by the cursor')
+
+        # Attachments: content-addressed store, downloaded on a bounded pool
+        if attachments is None:
+            attachments = os.getenv('GMAIL_ATTACHMENTS', 'false').lower() == 'true'
+        if attachment_max_bytes is None:
+            attachment_max_bytes = int(os.getenv('GMAIL_ATTACHMENT_MAX_BYTES', DEFAULT_ATTACHMENT_MAX_BYTES))
+        if attachment_types is None:
+            attachment_types = os.getenv('GMAIL_ATTACHMENT_TYPES', DEFAULT_ATTACHMENT_TYPES)
+        self.attachment_workers = max(1, attachment_workers or int(
+            os.getenv('GMAIL_ATTACHMENT_WORKERS', DEFAULT_ATTACHMENT_WORKERS)))
+        self.attachment_types = [t.strip().lower() for t in attachment_types.split(',') if t.strip()]
+        self.attachment_store = None
+        if attachments and not dry_run:
+            self.attachment_store = AttachmentStore(self.vault_path / 'Attachments',
+                                                    max_bytes=attachment_max_bytes)
+        self.stored_attachments: Dict[str, List[Dict]] = {}
+        self._attachment_pool = None
+        self.attachment_bytes = self.metrics.counter('gmail_attachment_bytes_total',
+                                                     'Attachment bytes downloaded')
+        self.attachments_stored = self.metrics.counter('gmail_attachments_stored_total',
+                                                       'Attachments written to the vault')
+        self.attachments_deduplicated = self.metrics.counter(
+            'gmail_attachments_deduplicated_total', 'Attachments already in the vault (same SHA-256)')
+        self.attachments_rejected = self.metrics.counter('gmail_attachments_rejected_total',
+                                                         'Attachments refused by the size/type limits')
+        self.attachment_latency = self.metrics.histogram('gmail_attachment_download_seconds',
+                                                         'Latency of one attachment download')
+        self.attachment_throughput = self.metrics.gauge(
+            'gmail_attachment_throughput_bytes_per_second', 'Attachment download rate in the last cycle')
+
+        # Transport: quota limiter, retries with backoff, circuit breaker and
+        # one pooled HTTP session shared by every thread
+        if quota_units_per_second is None:
+            quota_units_per_second = float(os.getenv('GMAIL_QUOTA_UNITS_PER_SECOND', DEFAULT_UNITS_PER_SECOND))
+        http_pool_size = http_pool_size or int(os.getenv('GMAIL_HTTP_POOL_SIZE', 0)) or \
+            max(DEFAULT_POOL_SIZE, self.attachment_workers + 2)
+        self.transport = GmailTransport(self.metrics, limiter=QuotaLimiter(quota_units_per_second),
+                                        backoff=Backoff(max_retries), pool_size=http_pool_size,
+                                        sleep=self._stop.wait, http=http_session)
 
     def authenticate(self) -> bool:
         """Authenticate with Gmail API using OAuth."""
+        # Deferred so --help and library imports don't pay for the Google stack
+        try:
+            import googleapiclient.discovery  # noqa: F401
+        except ImportError:
+            logger.error("Google API client not installed.")
+            logger.error(GOOGLE_INSTALL_HINT)
+            return False
+
         try:
             # Load token if it exists
             if self.token_path.exists():
@@ -94,9 +350,13 @@ class GmailWatcher(BaseWatcher):
             # If no valid credentials, create new ones
             if not self.creds or not self.creds.valid:
                 if self.creds and self.creds.expired and self.creds.refresh_token:
+                    from google.auth.transport.requests import Request
                     self.creds.refresh(Request())
                     logger.info("Refreshed token")
                 else:
+                    from google_auth_oauthlib.flow import InstalledAppFlow
+                    if self.account:
+                        logger.info(f"Sign in to Google as {self.account}")
                     flow = InstalledAppFlow.from_client_secrets_file(
                         self.credentials_path, SCOPES
                     )
@@ -104,11 +364,12 @@ class GmailWatcher(BaseWatcher):
                     logger.info("Created new token via OAuth")
 
                 # Save token for next run
+                self.token_path.parent.mkdir(parents=True, exist_ok=True)
                 with open(self.token_path, 'wb') as token_file:
                     pickle.dump(self.creds, token_file)
 
             # Build Gmail service
-            self.service = build('gmail', 'v1', credentials=self.creds)
+            self.service = self._build_service()
             logger.info("Successfully authenticated with Gmail API")
             return True
 
@@ -116,140 +377,742 @@ class GmailWatcher(BaseWatcher):
             logger.error(f"Authentication failed: {e}")
             return False
 
-    def _load_processed_ids(self):
-        """Load previously processed email IDs."""
-        processed_file = Path(self.vault_path) / '.processed_emails'
-        if processed_file.exists():
+    def _build_service(self):
+        """
+        Build the Gmail client from the locally cached discovery document.
+
+        The first start builds the client normally and saves its discovery
+        document; later starts construct the client straight from that file
+        instead of resolving discovery again.
+        """
+        from googleapiclient.discovery import build, build_from_document
+
+        if self.discovery_cache_path.exists():
             try:
-                with open(processed_file, 'r') as f:
-                    self.processed_ids = set(json.load(f))
-                logger.info(f"Loaded {len(self.processed_ids)} previously processed emails")
+                document = self.discovery_cache_path.read_text(encoding='utf-8')
+                return build_from_document(document, http=self._http())
             except Exception as e:
-                logger.warning(f"Could not load processed IDs: {e}")
+                logger.warning(f"Ignoring unusable discovery cache {self.discovery_cache_path}: {e}")
+
+        service = build('gmail', 'v1', http=self._http())
+        document = getattr(service, '_rootDesc', None)
+        if document:
+            try:
+                tmp = self.discovery_cache_path.with_name(f'.{self.discovery_cache_path.name}.tmp')
+                tmp.write_text(json.dumps(document), encoding='utf-8')
+                os.replace(tmp, self.discovery_cache_path)
+            except OSError as e:
+                logger.warning(f"Could not cache discovery document: {e}")
+        return service
+
+    def _http(self):
+        """Authorized HTTP over the transport's pooled session."""
+        return self.transport.authorized_http(self.creds)
+
+    def _call(self, request, method: str, units: float = None):
+        """Execute one API request through the transport (quota, retries, breaker)."""
+        self.metrics.api_call(method)
+        return self.transport.execute(request, method, units)
+
+    def setup(self) -> bool:
+        """Authenticate before polling (used by the supervisor)."""
+        return self.authenticate()
 
     def _save_processed_ids(self):
-        """Save processed email IDs to avoid duplicates."""
-        processed_file = Path(self.vault_path) / '.processed_emails'
+        """Fsync processed email IDs (each ID is appended as it is added)."""
         try:
-            with open(processed_file, 'w') as f:
-                json.dump(list(self.processed_ids), f)
+            self.processed_ids.flush()
         except Exception as e:
             logger.warning(f"Could not save processed IDs: {e}")
 
     def check_for_updates(self) -> List[Dict]:
-        """Check for new unread emails."""
+        """
+        Check for new unread emails.
+
+        Raises:
+            Exception: Any failure (after recording it in the metrics), so
+                the cycle counts as failed and the schedule backs off
+        """
         if not self.service:
             return []
 
+        self.cycle_downloaded = 0
+        self.stored_attachments.clear()
         try:
-            # Get unread emails
-            results = self.service.users().messages().list(
-                userId='me',
-                q='is:unread',
-                maxResults=10  # Check last 10 unread emails
-            ).execute()
+            if self.watch_topic:
+                self._ensure_watch()
+            if self.sync_mode == 'history':
+                new_emails = self._check_history()
+            else:
+                # Get unread emails
+                results = self._call(self.service.users().messages().list(
+                    userId='me',
+                    q='is:unread',
+                    maxResults=LIST_PAGE_SIZE  # Check last 10 unread emails
+                ), 'messages.list')
+                new_emails, _ = self._fetch_messages(m['id'] for m in results.get('messages', []))
 
-            messages = results.get('messages', [])
-            new_emails = []
+            if self.attachment_store is not None:
+                self._download_attachments(new_emails)
+            return new_emails
 
-            for message in messages:
-                msg_id = message['id']
+        except CircuitOpen:
+            self.metrics.error('circuit_open')
+            raise
+        except Exception:
+            self.metrics.error('check_for_updates')
+            raise
+        finally:
+            self.cycle_downloaded_last.set(self.cycle_downloaded)
 
-                # Skip if already processed
-                if msg_id in self.processed_ids:
-                    continue
+    def _fetch_messages(self, message_ids) -> Tuple[List[Dict], List[str]]:
+        """
+        Fetch messages not processed yet and keep the relevant ones.
 
-                # Get full message details
-                try:
-                    msg = self.service.users().messages().get(
-                        userId='me',
-                        id=msg_id,
-                        format='full'
-                    ).execute()
+        In two-phase mode only headers and labels are fetched first; the
+        full payload is fetched only for messages ``_classify`` keeps.
+        Skipped messages are marked processed so they are not examined again.
 
-                    new_emails.append(msg)
-                    self.processed_ids.add(msg_id)
+        Returns:
+            (relevant messages, in the order given; IDs whose fetch failed)
+        """
+        wanted = []
+        for msg_id in message_ids:
+            # Skip if already processed
+            if msg_id in self.processed_ids:
+                self.metrics.dedup_hit()
+                continue
+            wanted.append(msg_id)
+
+        first_format = 'metadata' if self.fetch_mode == 'two-phase' else 'full'
+        examined, failed = self._get_messages(wanted, first_format)
+
+        relevant, skipped = [], 0
+        for msg_id in wanted:
+            if msg_id not in examined:
+                continue
+            if self._classify(examined[msg_id]) is None:
+                self.processed_ids.add(msg_id)
+                skipped += 1
+            else:
+                relevant.append(msg_id)
+        self.skipped.inc(skipped)
+
+        if first_format == 'metadata':
+            fetched, body_failed = self._get_messages(relevant, 'full')
+            failed += body_failed
+        else:
+            fetched = examined
+
+        new_emails = []
+        for msg_id in relevant:
+            if msg_id in fetched:
+                new_emails.append(fetched[msg_id])
+                self.processed_ids.add(msg_id)
+
+        if new_emails:
+            logger.info(f"Found {len(new_emails)} new unread emails"
+                        f"{f' ({skipped} skipped)' if skipped else ''}")
+        if new_emails or skipped:
+            self._save_processed_ids()
+
+        return new_emails, failed
+
+    def _classify(self, message: Dict) -> Optional[str]:
+        """
+        Decide relevance and priority from labels, headers and snippet only,
+        so it works on metadata responses as well as full messages.
 
-                except Exception as e:
-                    logger.error(f"Could not retrieve message {msg_id}: {e}")
+        Returns:
+            'high' or 'normal', or None if the message should be skipped
+        """
+        labels = set(message.get('labelIds', []))
+        if labels & self.skip_labels:
+            return None
+        if labels & HIGH_PRIORITY_LABELS:
+            return 'high'
+        return self._urgency(message)['priority']
+
+    def _urgency(self, message: Dict) -> Dict:
+        """Urgency rule score of the subject and snippet (see urgency.py)."""
+        headers = {h['name']: h['value'] for h in message.get('payload', {}).get('headers', [])}
+        return self.urgency.score(headers.get('Subject'), message.get('snippet'))
+
+    def _get_messages(self, message_ids: List[str], fmt: str) -> Tuple[Dict[str, Dict], List[str]]:
+        """messages.get for each ID in ``fmt`` ('metadata' or 'full')."""
+        if self.batch_size > 1 and len(message_ids) > 1:
+            return self._get_batched(message_ids, fmt)
+        return self._get_serial(message_ids, fmt)
+
+    def _get_request(self, msg_id: str, fmt: str):
+        messages = self.service.users().messages()
+        if fmt == 'metadata':
+            return messages.get(userId='me', id=msg_id, format='metadata',
+                                metadataHeaders=METADATA_HEADERS, fields=METADATA_FIELDS)
+        return messages.get(userId='me', id=msg_id, format='full', fields=FULL_FIELDS)
+
+    def _count_download(self, fmt: str, response: Dict):
+        """Approximate response size: the JSON as sent (before compression)."""
+        size = len(json.dumps(response, separators=(',', ':')))
+        self.cycle_downloaded += size
+        (self.metadata_bytes if fmt == 'metadata' else self.payload_bytes).inc(size)
+
+    def _get_serial(self, message_ids: List[str], fmt: str) -> Tuple[Dict[str, Dict], List[str]]:
+        """One messages.get round trip per message."""
+        fetched, failed = {}, []
+        for msg_id in message_ids:
+            try:
+                with self.fetch_latency.time():
+                    fetched[msg_id] = self._call(self._get_request(msg_id, fmt), 'messages.get')
+                self._count_download(fmt, fetched[msg_id])
+            except CircuitOpen:
+                raise
+            except Exception as e:
+                if self._fetch_failed(msg_id, e):
+                    failed.append(msg_id)
+        return fetched, failed
 
-            if new_emails:
-                logger.info(f"Found {len(new_emails)} new unread emails")
-                self._save_processed_ids()
+    def _get_batched(self, message_ids: List[str], fmt: str) -> Tuple[Dict[str, Dict], List[str]]:
+        """
+        Fetch messages in HTTP batches of ``batch_size``.
 
-            return new_emails
+        Each message succeeds or fails on its own; only the ones that failed
+        with a transient error are sent again (in new batches, after the
+        transport's backoff, honouring Retry-After), up to ``max_retries``
+        times.
+        """
+        fetched = {}
+        pending, attempt = list(message_ids), 0
+        while pending:
+            retry = {}
+            for start in range(0, len(pending), self.batch_size):
+                chunk = pending[start:start + self.batch_size]
+                for msg_id, error in self._execute_batch(chunk, fmt, fetched).items():
+                    if self._fetch_failed(msg_id, error):
+                        retry[msg_id] = error
+            pending = list(retry)
+            if not pending:
+                break
+            attempt += 1
+            delay = self.transport.retry_wait(attempt, retry.values())
+            if delay is None:
+                break
+            logger.info(f"Retrying {len(pending)} failed message fetches in {delay:.2f}s (attempt {attempt + 1})")
+            self.transport.sleep(delay)
+        return fetched, pending
+
+    def _execute_batch(self, message_ids: List[str], fmt: str,
+                       fetched: Dict[str, Dict]) -> Dict[str, Exception]:
+        """
+        Send one batch request; successes go into ``fetched``.
+
+        Returns:
+            Exception per message ID that failed
+        """
+        errors = {}
 
+        def on_response(request_id, response, exception):
+            if exception is not None:
+                errors[request_id] = exception
+            else:
+                fetched[request_id] = response
+                self._count_download(fmt, response)
+
+        batch = self.service.new_batch_http_request(callback=on_response)
+        for msg_id in message_ids:
+            batch.add(self._get_request(msg_id, fmt), request_id=msg_id)
+
+        self.metrics.api_call('messages.get', len(message_ids))
+        try:
+            with self.batch_latency.time():
+                self._call(batch, 'batch', units=QUOTA_UNITS['messages.get'] * len(message_ids))
+        except CircuitOpen:
+            raise
         except Exception as e:
-            logger.error(f"Error checking for emails: {e}")
-            return []
+            # The whole batch failed (e.g. network error): every message not
+            # answered yet counts as failed
+            for msg_id in message_ids:
+                if msg_id not in fetched:
+                    errors.setdefault(msg_id, e)
+        return errors
+
+    def _fetch_failed(self, msg_id: str, error: Exception) -> bool:
+        """
+        Record a failed message fetch. Permanent failures (the message is
+        gone, a 400, ...) are dropped with an audit entry instead of going
+        back to the queue, where they would be retried every cycle.
+
+        Returns:
+            True if the error is transient and the fetch worth retrying
+        """
+        self.metrics.error('messages.get')
+        if is_transient(error):
+            logger.warning(f"Could not retrieve message {msg_id} (will retry): {error}")
+            return True
+        status = http_status(error)
+        if status == 404:
+            logger.warning(f"Message {msg_id} no longer exists")
+        else:
+            logger.error(f"Could not retrieve message {msg_id}, dropping it: {error}")
+        self.dropped.inc()
+        self.log_action({
+            'action_type': 'email_fetch_dropped',
+            'description': f'Gave up on message {msg_id}',
+            'status': 'failed',
+            'message_id': msg_id,
+            'http_status': status,
+            'error': str(error)[:500],
+        })
+        return False
+
+    # --------------------------------------------------------------- push mode
+
+    def start_push(self, host: str = '127.0.0.1', port: int = 8085, token: str = None,
+                   safety_interval: float = DEFAULT_SAFETY_INTERVAL,
+                   coalesce_seconds: float = DEFAULT_PUSH_COALESCE, watch_topic: str = None):
+        """
+        Switch to push mode: serve a Pub/Sub push endpoint whose
+        notifications trigger an immediate incremental fetch, and fall back
+        to a slow safety-net poll.
+
+        Args:
+            host: Interface for the receiver
+            port: Receiver port (0 = any free port)
+            token: Verification token required as ``?token=`` (optional)
+            safety_interval: Seconds between polls without notifications
+            coalesce_seconds: Notifications this close together share one fetch
+            watch_topic: Pub/Sub topic to register with ``users.watch``
+                (``projects/<id>/topics/<name>``); None if notifications are
+                published some other way
+
+        Returns:
+            The started PushReceiver
+        """
+        from gmail_push import PushReceiver
+
+        self.enable_push(safety_interval, coalesce_seconds, watch_topic)
+        return PushReceiver(self.on_push_notification, host, port, token=token).start()
+
+    def enable_push(self, safety_interval: float = DEFAULT_SAFETY_INTERVAL,
+                    coalesce_seconds: float = DEFAULT_PUSH_COALESCE, watch_topic: str = None):
+        """
+        Push mode without a receiver of its own (several accounts share one,
+        see ``gmail_push.PushRouter``); arguments as for ``start_push``.
+        Looks up the mailbox address notifications are routed by.
+        """
+        if self.sync_mode != 'history':
+            raise ValueError('Push mode needs history sync')
+        self.schedule = FixedInterval(safety_interval)
+        self.coalesce_seconds = coalesce_seconds
+        self.watch_topic = watch_topic
+        if self.service and not self.email_address:
+            self.email_address = self._call(self.service.users().getProfile(userId='me'),
+                                            'getProfile').get('emailAddress')
+
+    def on_push_notification(self, notification: Dict) -> bool:
+        """
+        Handle one decoded push notification (receiver thread).
+
+        Returns:
+            True if it woke the watcher, False if it was for another mailbox
+            or the stored cursor already covers it
+        """
+        self.push_notifications.inc()
+        address = notification.get('emailAddress')
+        if self.email_address and address and address.lower() != self.email_address.lower():
+            logger.warning(f"Ignoring push notification for {address}")
+            self.push_ignored.inc()
+            return False
+        cursor = self.sync_state.get('history_id')
+        if cursor and int(notification['historyId']) <= int(cursor):
+            self.push_ignored.inc()
+            return False
+        self.request_poll()
+        return True
+
+    def _ensure_watch(self):
+        """Register (or renew) the users.watch subscription when it is due."""
+        expiration = self.sync_state.get('watch_expiration', 0) / 1000
+        if expiration - time.time() > WATCH_RENEW_SECONDS:
+            return
+        response = self._call(self.service.users().watch(userId='me', body={
+            'topicName': self.watch_topic,
+            'labelIds': ['INBOX'],
+        }), 'watch')
+        self.sync_state.update(watch_expiration=int(response['expiration']))
+        logger.info(f"Gmail push watch on {self.watch_topic} until "
+                    f"{datetime.fromtimestamp(int(response['expiration']) / 1000).isoformat()}")
+
+    # ------------------------------------------------------------- attachments
+
+    def _download_attachments(self, messages: List[Dict]):
+        """
+        Download the attachments of ``messages`` on the thread pool into the
+        attachment store; results land in ``stored_attachments`` for
+        ``create_action_file``. A failed download only loses its link.
+        """
+        jobs = []
+        for message in messages:
+            for part in walk_parts(message['payload']):
+                if not is_attachment(part):
+                    continue
+                info = attachment_info(part)
+                reason = self._attachment_rejected(info)
+                if reason:
+                    self.attachments_rejected.inc()
+                    info['skipped'] = reason
+                    self.stored_attachments.setdefault(message['id'], []).append(info)
+                    continue
+                jobs.append((message['id'], part, info))
+        if not jobs:
+            return
+
+        if self._attachment_pool is None:
+            self._attachment_pool = ThreadPoolExecutor(max_workers=self.attachment_workers,
+                                                       thread_name_prefix='gmail-attachment')
+        started = time.perf_counter()
+        futures = [(msg_id, info, self._attachment_pool.submit(self._download_attachment, msg_id, part))
+                   for msg_id, part, info in jobs]
+        downloaded = 0
+        for msg_id, info, future in futures:
+            try:
+                blob = future.result()
+            except AttachmentTooLarge as e:
+                self.attachments_rejected.inc()
+                info['skipped'] = 'too large'
+                logger.warning(f"Skipped attachment of {msg_id}: {e}")
+            except Exception as e:
+                self.metrics.error('attachments.get')
+                info['skipped'] = 'download failed'
+                logger.error(f"Could not download {info['filename']} from {msg_id}: {e}")
+            else:
+                downloaded += blob['size']
+                info.update(blob)
+                if blob['deduplicated']:
+                    self.attachments_deduplicated.inc()
+                else:
+                    self.attachments_stored.inc()
+            self.stored_attachments.setdefault(msg_id, []).append(info)
+
+        elapsed = time.perf_counter() - started
+        self.attachment_bytes.inc(downloaded)
+        self.attachment_throughput.set(downloaded / elapsed if elapsed > 0 else 0)
+        logger.info(f"Downloaded {len(jobs)} attachments ({downloaded / 1024:.0f} KiB) in {elapsed:.2f}s")
+
+    def _attachment_rejected(self, info: Dict) -> Optional[str]:
+        """Why an attachment is not downloaded (None if it is)."""
+        if not any(fnmatch.fnmatch(info['mime_type'].lower(), pattern) for pattern in self.attachment_types):
+            return 'type not allowed'
+        max_bytes = self.attachment_store.max_bytes
+        if max_bytes is not None and info['size'] > max_bytes:
+            return 'too large'
+        return None
+
+    def _download_attachment(self, msg_id: str, part: Dict) -> Dict:
+        """Fetch one attachment and stream-decode it into the store (pool thread)."""
+        body = part.get('body', {})
+        data = body.get('data')
+        if data is None:
+            with self.attachment_latency.time():
+                response = self._call(self.service.users().messages().attachments().get(
+                    userId='me', messageId=msg_id, id=body['attachmentId']
+                ), 'attachments.get')
+            data = response.get('data', '')
+        return self.attachment_store.put(iter_base64_chunks(data), part.get('filename', ''))
+
+    def close(self):
+        """Stop the attachment download pool and close pooled connections."""
+        if self._attachment_pool is not None:
+            self._attachment_pool.shutdown(wait=True)
+            self._attachment_pool = None
+        self.transport.close()
+
+    # ------------------------------------------------------------ history sync
+
+    def _check_history(self) -> List[Dict]:
+        """
+        Incremental sync: fetch only what changed since the stored historyId.
+
+        Falls back to a full resync when there is no cursor yet or Gmail has
+        expired it. New IDs join a persistent oldest-first backlog, and each
+        cycle drains as much of it as the per-cycle budget allows. The cursor
+        and the remaining backlog are saved together after fetching, so a
+        restart resumes mid-drain; failed fetches go back to its head.
+        """
+        delta = self._history_delta()
+        if delta is None:
+            message_ids, history_id, unread = self._full_resync()
+            calls_saved = 0
+        else:
+            message_ids, history_id, unread, history_calls = delta
+            # A full re-list would page through every unread message at the
+            # original page size just to find these changes
+            relist_calls = max(1, math.ceil(unread / LIST_PAGE_SIZE))
+            calls_saved = max(0, relist_calls - history_calls)
+
+        # retry_ids: failures saved before the backlog existed
+        backlog = self.sync_state.get('retry_ids', []) + self.sync_state.get('backlog', [])
+        queued = set(backlog)
+        backlog.extend(i for i in message_ids if i not in queued)
+        new_emails, backlog = self._drain(backlog)
+
+        self.sync_state.update(
+            history_id=history_id,
+            unread_estimate=unread,
+            backlog=backlog or None,
+            retry_ids=None,
+            last_sync=datetime.now().isoformat(),
+        )
+        self.backlog_remaining.set(len(backlog))
+        self.calls_saved.inc(calls_saved)
+        self.calls_saved_last.set(calls_saved)
+        return new_emails
+
+    def _drain(self, backlog: List[str]) -> Tuple[List[Dict], List[str]]:
+        """
+        Fetch queued messages oldest first until the cycle budget is spent.
+
+        Args:
+            backlog: Message IDs waiting to be fetched, oldest first
+
+        Returns:
+            (fetched messages, IDs left for later cycles with transient
+            failures first)
+        """
+        new_emails, failed = [], []
+        position, start_bytes = 0, self.cycle_downloaded
+        while position < min(len(backlog), self.cycle_messages):
+            if self.cycle_bytes and self.cycle_downloaded - start_bytes >= self.cycle_bytes:
+                break
+            chunk = backlog[position:position + min(self.batch_size, self.cycle_messages - position)]
+            position += len(chunk)
+            try:
+                fetched, chunk_failed = self._fetch_messages(chunk)
+            except CircuitOpen as e:
+                # Keep what this cycle already fetched; the chunk waits in the queue
+                logger.warning(f"Stopping the drain: {e}")
+                failed.extend(chunk)
+                break
+            new_emails.extend(fetched)
+            failed.extend(chunk_failed)
+
+        remaining = failed + backlog[position:]
+        if backlog[position:]:
+            logger.info(f"Cycle budget reached: {position} messages, "
+                        f"{(self.cycle_downloaded - start_bytes) / 1024:.0f} KiB; "
+                        f"{len(remaining)} left in backlog")
+        return new_emails, remaining
+
+    def _history_delta(self) -> Optional[Tuple[List[str], str, int, int]]:
+        """
+        Walk history.list from the stored cursor.
+
+        Returns:
+            (new unread message IDs oldest first, latest historyId, updated
+            unread estimate, history.list calls made), or None when a full
+            resync is needed
+        """
+        start = self.sync_state.get('history_id')
+        if not start:
+            return None
+
+        candidates = {}  # insertion-ordered set of message IDs
+        unread = self.sync_state.get('unread_estimate', 0)
+        latest, page_token, calls = start, None, 0
+        while True:
+            calls += 1
+            try:
+                response = self._call(self.service.users().history().list(
+                    userId='me',
+                    startHistoryId=start,
+                    historyTypes=HISTORY_TYPES,
+                    maxResults=SYNC_PAGE_SIZE,
+                    pageToken=page_token
+                ), 'history.list')
+            except Exception as e:
+                if http_status(e) == 404:
+                    logger.warning(f"History ID {start} has expired; running a full resync")
+                    return None
+                raise
+
+            for record in response.get('history', []):
+                for added in record.get('messagesAdded', []):
+                    message = added['message']
+                    labels = set(message.get('labelIds', []))
+                    if 'UNREAD' in labels and not labels & HIDDEN_LABELS:
+                        candidates[message['id']] = None
+                        unread += 1
+                for removed in record.get('labelsRemoved', []):
+                    message = removed['message']
+                    dropped = set(removed.get('labelIds', []))
+                    labels = set(message.get('labelIds', []))
+                    if 'UNREAD' in dropped:
+                        # Read elsewhere before we got to it
+                        candidates.pop(message['id'], None)
+                        unread -= 1
+                    elif dropped & HIDDEN_LABELS and 'UNREAD' in labels and not labels & HIDDEN_LABELS:
+                        # Moved back out of spam/trash while still unread
+                        candidates[message['id']] = None
+                        unread += 1
+
+            latest = response.get('historyId', latest)
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                break
+
+        return list(candidates), latest, max(0, unread), calls
+
+    def _full_resync(self) -> Tuple[List[str], str, int]:
+        """
+        Full resync: list unread messages (up to ``resync_limit``, or all of
+        them when draining) and start a new history cursor.
+
+        The cursor is read before listing, so mail that arrives meanwhile
+        appears again in the next delta and is dropped by the dedup store.
+
+        Returns:
+            (unread message IDs oldest first, new historyId, unread count)
+        """
+        limit = None if self.drain else self.resync_limit
+        page_size = DRAIN_PAGE_SIZE if self.drain else SYNC_PAGE_SIZE
+        logger.info(f"Full resync ({'all' if limit is None else f'up to {limit}'} unread messages)")
+        self.full_resyncs.inc()
+        profile = self._call(self.service.users().getProfile(userId='me'), 'getProfile')
+        history_id = profile['historyId']
+        self.email_address = profile.get('emailAddress', self.email_address)
+
+        message_ids, page_token = [], None
+        while limit is None or len(message_ids) < limit:
+            if limit is not None:
+                page_size = min(page_size, limit - len(message_ids))
+            response = self._call(self.service.users().messages().list(
+                userId='me',
+                q='is:unread',
+                maxResults=page_size,
+                pageToken=page_token
+            ), 'messages.list')
+            message_ids.extend(m['id'] for m in response.get('messages', []))
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                break
+
+        message_ids.reverse()  # the API lists newest first
+        return message_ids, history_id, len(message_ids)
 
     def _extract_email_data(self, message: Dict) -> Dict:
         """Extract relevant data from Gmail message."""
         try:
             headers = {h['name']: h['value'] for h in message['payload']['headers']}
 
-            # Get email body
-            body = ''
-            if 'parts' in message['payload']:
-                for part in message['payload']['parts']:
-                    if part['mimeType'] == 'text/plain':
-                        if 'data' in part['body']:
-                            import base64
-                            body = base64.urlsafe_b64decode(part['body']['data']).decode('utf-8')
-                        break
-            else:
-                if 'body' in message['payload'] and 'data' in message['payload']['body']:
-                    import base64
-                    body = base64.urlsafe_b64decode(message['payload']['body']['data']).decode('utf-8')
+            # Best body part (plain text, else HTML as text), decoded only up to the cap
+            body = extract_body(message['payload'], self.max_body_bytes)
+            urgency = self._urgency(message)
+            labels = message.get('labelIds', [])
 
             return {
                 'id': message['id'],
+                'thread_id': message.get('threadId'),
                 'from': headers.get('From', 'Unknown'),
                 'subject': headers.get('Subject', '(No Subject)'),
                 'to': headers.get('To', ''),
                 'date': headers.get('Date', ''),
-                'body': body[:500] if body else '(No body)',  # First 500 chars
-                'labels': message.get('labelIds', [])
+                'body': body or '(No body)',
+                'priority': 'high' if set(labels) & HIGH_PRIORITY_LABELS else urgency['priority'],
+                'urgency_score': urgency['score'],
+                'urgency_rules': urgency['matched'],
+                'attachments': self.stored_attachments.get(message['id'])
+                               or list(iter_attachments(message['payload'])),
+                'labels': labels
             }
         except Exception as e:
             logger.error(f"Error extracting email data: {e}")
             return {}
 
     def create_action_file(self, message: Dict) -> Path:
-        """Create markdown file for email in Needs_Action folder."""
+        """
+        Create (or extend) the markdown action file for an email.
+
+        In thread mode each conversation has one note, and later messages are
+        appended to it; otherwise every email gets a note of its own.
+        """
+        self._last_note_status = None
         try:
             email_data = self._extract_email_data(message)
             if not email_data:
                 return None
 
             msg_id = email_data['id']
+            status = 'created_action_file'
+            if self.note_mode == 'thread' and email_data['thread_id']:
+                filepath, status = self._write_thread_note(email_data)
+            else:
+                filepath = self._write_message_note(email_data)
+            self._last_note_status = status
+            if status == 'already_in_thread':
+                return filepath
 
-            # Create filename from sender and subject
-            from_name = email_data['from'].split('<')[0].strip().replace(' ', '_')
-            subject_slug = email_data['subject'][:30].replace(' ', '_').replace('/', '-')
-            filename = f"EMAIL_{msg_id}_{from_name}.md"
-
-            # Create markdown content
-            content = f"""---
-type: email
-status: pending
-priority: normal
-from: {email_data['from']}
-to: {email_data['to']}
-subject: {email_data['subject']}
-date: {email_data['date']}
-email_id: {msg_id}
-received: {datetime.now().isoformat()}
----
-
-# Email from {email_data['from']}
+            # Log action
+            self.log_action({
+                'action_type': 'email_detected',
+                'email_id': msg_id,
+                'thread_id': email_data['thread_id'],
+                'from': email_data['from'],
+                'subject': email_data['subject'],
+                'attachments': sum('path' in a for a in email_data['attachments']),
+                'status': status,
+                'file': str(filepath)
+            })
+
+            logger.info(f"{'Appended to' if status == 'appended_to_thread' else 'Created'} "
+                        f"action file: {filepath.name}")
+            return filepath
+
+        except Exception as e:
+            logger.error(f"Error creating action file: {e}")
+            return None
+
+    def note_created(self, item: Dict) -> bool:
+        """Messages appended to (or already in) a thread note are not new action files."""
+        return self._last_note_status == 'created_action_file'
+
+    def _write_message_note(self, email_data: Dict) -> Path:
+        """One note for one email (note_mode 'message')."""
+        msg_id = email_data['id']
+
+        # Create filename from sender and subject
+        from_name = email_data['from'].split('<')[0].strip().replace(' ', '_')
+        filename = f"EMAIL_{msg_id}_{from_name}.md"
+
+        # Create markdown content
+        frontmatter = {
+            'type': 'email',
+            'status': 'pending',
+            'priority': email_data['priority'],
+            'from': email_data['from'],
+            'to': email_data['to'],
+            'subject': email_data['subject'],
+            'date': email_data['date'],
+            'email_id': msg_id,
+            'urgency_score': email_data['urgency_score'],
+            'urgency_rules': email_data['urgency_rules'],
+            'received': datetime.now().isoformat()
+        }
+        if email_data['thread_id']:
+            frontmatter['thread_id'] = email_data['thread_id']
+        if self.account:
+            frontmatter['account'] = self.account
+        attachments = ''
+        if email_data['attachments']:
+            attachments = '\n## Attachments\n' + ''.join(
+                f"- {self._attachment_line(a)}\n" for a in email_data['attachments'])
+        body = f"""# Email from {email_data['from']}
 
 ## Subject
 {email_data['subject']}
 
 ## Message
 {email_data['body']}
-
+{attachments}
 ## Suggested Actions
 - [ ] Read and analyze
 - [ ] Draft response
@@ -259,26 +1122,128 @@ received: {datetime.now().isoformat()}
 ## Notes
 Add your analysis here.
 """
+        return self.write_action_file(filename, render_note(frontmatter, body))
 
-            filepath = self.needs_action / filename
-            filepath.write_text(content)
-
-            # Log action
-            self.log_action({
-                'action_type': 'email_detected',
-                'email_id': msg_id,
+    def _write_thread_note(self, email_data: Dict) -> Tuple[Path, str]:
+        """
+        Add an email to its conversation's note (note_mode 'thread').
+
+        The first message creates ``EMAIL_THREAD_<threadId>.md``, with room
+        left in its header. Later ones are appended to the end of the file
+        and the header is rewritten where it stands (``VaultWriter.append``),
+        so the body is never copied: ``email_id`` names the latest message,
+        ``messages`` indexes every email in the note, ``unread`` lists those
+        added since a reader last cleared it (``unread_since`` is the number
+        of the first one) and the status goes back to pending. Once the note
+        is moved out of Needs_Action, the next reply starts a new one.
+
+        Returns:
+            (path, log status); the status is 'already_in_thread' if the
+            email was in the note before
+        """
+        thread_id = email_data['thread_id']
+        msg_id = email_data['id']
+        now = datetime.now().isoformat()
+        path = self.needs_action / f"EMAIL_THREAD_{thread_id}.md"
+        if thread_id in self._unpublished_threads:
+            self.vault_writer.flush()
+            self._unpublished_threads.clear()
+
+        if not path.exists():
+            frontmatter = {
+                'type': 'email',
+                'status': 'pending',
+                'priority': email_data['priority'],
                 'from': email_data['from'],
                 'subject': email_data['subject'],
-                'status': 'created_action_file',
-                'file': str(filepath)
-            })
+                'thread_id': thread_id,
+                'email_id': msg_id,
+                'participants': [email_data['from']],
+                'messages': [msg_id],
+                'message_count': 1,
+                'unread': [msg_id],
+                'unread_since': 1,
+                'last_from': email_data['from'],
+                'last_date': email_data['date'],
+                'urgency_score': email_data['urgency_score'],
+                'urgency_rules': email_data['urgency_rules'],
+                'received': now,
+                'updated': now
+            }
+            if self.account:
+                frontmatter['account'] = self.account
+            body = f"""# Email thread: {email_data['subject']}
 
-            logger.info(f"Created action file: {filename}")
-            return filepath
+## Suggested Actions
+- [ ] Read the messages listed under `unread` (from message `unread_since` on)
+- [ ] Draft response
+- [ ] Request approval to send
+- [ ] Move to Done when complete
 
-        except Exception as e:
-            logger.error(f"Error creating action file: {e}")
-            return None
+## Notes
+Add your analysis here.
+
+## Messages
+{self._thread_entry(1, email_data)}"""
+            self._unpublished_threads.add(thread_id)
+            note = render_note(frontmatter, body, slack=HEADER_SLACK)
+            return self.write_action_file(path.name, note), 'created_action_file'
+
+        meta = read_frontmatter(path)
+        messages = list(meta.get('messages') or [])
+        if msg_id in messages:
+            return path, 'already_in_thread'
+        messages.append(msg_id)
+        unread = list(meta.get('unread') or []) + [msg_id]
+        participants = list(meta.get('participants') or [])
+        if email_data['from'] not in participants:
+            participants.append(email_data['from'])
+        updates = {
+            'status': 'pending',
+            'email_id': msg_id,
+            'messages': messages,
+            'message_count': len(messages),
+            'unread': unread,
+            'unread_since': len(messages) - len(unread) + 1,
+            'participants': participants,
+            'last_from': email_data['from'],
+            'last_date': email_data['date'],
+            'updated': now
+        }
+        if email_data['priority'] == 'high':
+            updates['priority'] = 'high'
+        if email_data['urgency_score'] > (meta.get('urgency_score') or 0):
+            # The thread is as urgent as its most urgent message
+            updates['urgency_score'] = email_data['urgency_score']
+            updates['urgency_rules'] = email_data['urgency_rules']
+        self.vault_writer.append(path, self._thread_entry(len(messages), email_data), updates)
+        self.thread_appends.inc()
+        return path, 'appended_to_thread'
+
+    def _thread_entry(self, number: int, email_data: Dict) -> str:
+        """One message of a thread note, numbered to match ``unread_since``."""
+        attachments = ''
+        if email_data['attachments']:
+            attachments = '\n**Attachments**\n' + ''.join(
+                f"- {self._attachment_line(a)}\n" for a in email_data['attachments'])
+        return f"""
+### {number}. {email_data['from']} ({email_data['date']})
+<!-- email_id: {email_data['id']} -->
+**To:** {email_data['to']}
+**Subject:** {email_data['subject']}
+
+{email_data['body']}
+{attachments}"""
+
+    def _attachment_line(self, attachment: Dict) -> str:
+        """Markdown list entry: a link to the stored copy when there is one."""
+        details = f"{attachment['mime_type']}, {attachment['size']} bytes"
+        if 'path' in attachment:
+            link = Path(os.path.relpath(attachment['path'], self.needs_action)).as_posix()
+            return f"[{attachment['filename']}]({link}) ({details}, sha256 {attachment['sha256'][:12]})"
+        if 'skipped' in attachment:
+            return f"{attachment['filename']} ({details}; not downloaded: {attachment['skipped']})"
+        return f"{attachment['filename']} ({details})"
 
     def list_unread(self):
         """List all unread emails (for testing/inspection)."""
@@ -287,22 +1252,22 @@ Add your analysis here.
             return
 
         try:
-            results = self.service.users().messages().list(
+            results = self._call(self.service.users().messages().list(
                 userId='me',
                 q='is:unread',
                 maxResults=10
-            ).execute()
+            ), 'messages.list')
 
             messages = results.get('messages', [])
             logger.info(f"Found {len(messages)} unread emails:\n")
 
             for msg in messages:
-                msg_data = self.service.users().messages().get(
+                msg_data = self._call(self.service.users().messages().get(
                     userId='me',
                     id=msg['id'],
                     format='metadata',
                     metadataHeaders=['From', 'Subject', 'Date']
-                ).execute()
+                ), 'messages.get')
 
                 headers = {h['name']: h['value'] for h in msg_data['payload']['headers']}
                 print(f"  From: {headers.get('From', 'Unknown')}")
@@ -314,57 +1279,229 @@ Add your analysis here.
             logger.error(f"Error listing emails: {e}")
 
 
+def account_watchers(vault_path: str, credentials_path: str, accounts: List[str],
+                     check_interval: int = 120, schedule_factory: Callable[[], SchedulePolicy] = None,
+                     cycle_messages: int = None, cycle_bytes: int = None,
+                     http_pool_size: int = None, **kwargs) -> List[GmailWatcher]:
+    """
+    One GmailWatcher per account, for running several mailboxes in one
+    process (under ``supervisor.WatcherSupervisor``, whose bounded thread
+    pool runs the account cycles).
+
+    The accounts share one pooled HTTP session, and the per-cycle budget
+    is split evenly between them, so a mailbox draining a large backlog
+    cannot crowd out the others or the pool. Each account keeps its own
+    token, dedup store, sync cursor and quota limiter (Gmail's quota is
+    per user).
+
+    Args:
+        vault_path: Path to Obsidian vault
+        credentials_path: OAuth client (credentials.json), shared by all accounts
+        accounts: Account names, e.g. ['work', 'me@gmail.com']
+        check_interval: Seconds between checks
+        schedule_factory: Creates each account's polling policy (default fixed)
+        cycle_messages: Messages fetched per cycle across all accounts;
+            default $GMAIL_CYCLE_MESSAGES, else 100
+        cycle_bytes: Bytes downloaded per cycle across all accounts, 0 = no
+            limit; default $GMAIL_CYCLE_BYTES, else 25 MiB
+        http_pool_size: Connections in the shared session; default
+            $GMAIL_HTTP_POOL_SIZE, else 10 or two per account
+        **kwargs: Passed to every GmailWatcher
+
+    Returns:
+        The watchers, in account order
+    """
+    if cycle_messages is None:
+        cycle_messages = int(os.getenv('GMAIL_CYCLE_MESSAGES', DEFAULT_CYCLE_MESSAGES))
+    if cycle_bytes is None:
+        cycle_bytes = int(os.getenv('GMAIL_CYCLE_BYTES', DEFAULT_CYCLE_BYTES))
+    share = len(accounts) or 1
+    http_pool_size = http_pool_size or int(os.getenv('GMAIL_HTTP_POOL_SIZE', 0)) or \
+        max(DEFAULT_POOL_SIZE, 2 * share)
+    session = PooledHttp(http_pool_size)
+    kwargs.setdefault('urgency', load_matcher(vault_path))
+    return [GmailWatcher(vault_path, credentials_path, check_interval,
+                         schedule_factory() if schedule_factory else None,
+                         cycle_messages=max(1, math.ceil(cycle_messages / share)),
+                         cycle_bytes=math.ceil(cycle_bytes / share),
+                         account=account, http_session=session, **kwargs)
+            for account in accounts]
+
+
 def main():
     """Main entry point."""
     parser = argparse.ArgumentParser(description='Gmail Watcher for AI Employee')
     parser.add_argument('--vault', required=True, help='Path to Obsidian vault')
     parser.add_argument('--credentials', default='./credentials.json', help='Path to credentials.json')
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help='Serve Prometheus metrics on this port (default: $METRICS_PORT)')
     parser.add_argument('--demo', action='store_true', help='Demo mode (read-only, no files created)')
-    parser.add_argument('--test', action='store_true', help='Test connection')
+    parser.add_argument('--test', action='store_true', help='Test connection (read-only)')
     parser.add_argument('--list-unread', action='store_true', help='List unread emails')
     parser.add_argument('--interval', type=int, default=120, help='Check interval in seconds')
+    parser.add_argument('--adaptive', action='store_true',
+                        help='Adapt the interval to traffic (faster during bursts, backs off when idle)')
+    parser.add_argument('--min-interval', type=float, default=None, help='Fastest adaptive interval in seconds')
+    parser.add_argument('--max-interval', type=float, default=None, help='Slowest adaptive interval in seconds')
+    parser.add_argument('--sync', choices=SYNC_MODES, default=None,
+                        help='history: fetch History API deltas (default); list: re-list unread mail each cycle')
+    parser.add_argument('--resync-limit', type=int, default=500,
+                        help='Most unread messages pulled by a full resync')
+    parser.add_argument('--batch-size', type=int, default=None,
+                        help=f'Messages per HTTP batch request, 1 = unbatched (default: $GMAIL_BATCH_SIZE or {DEFAULT_BATCH_SIZE})')
+    parser.add_argument('--drain', action='store_true',
+                        help='Full resyncs page through the whole unread backlog instead of stopping at --resync-limit')
+    parser.add_argument('--cycle-messages', type=int, default=None,
+                        help=f'Most messages taken from the backlog per cycle (default: $GMAIL_CYCLE_MESSAGES or {DEFAULT_CYCLE_MESSAGES})')
+    parser.add_argument('--cycle-bytes', type=int, default=None,
+                        help='Stop fetching after downloading this many bytes per cycle, 0 = no limit '
+                             '(default: $GMAIL_CYCLE_BYTES or 25 MiB)')
+    parser.add_argument('--fetch', choices=FETCH_MODES, default=None,
+                        help='two-phase: metadata first, full payload only for relevant mail (default); '
+                             'full: full payload for every message')
+    parser.add_argument('--skip-labels', default=None,
+                        help=f'Comma-separated labels to skip, "" = none (default: $GMAIL_SKIP_LABELS or {DEFAULT_SKIP_LABELS})')
+    parser.add_argument('--attachments', action='store_true', default=None,
+                        help='Download attachments into the vault and link them (default: $GMAIL_ATTACHMENTS)')
+    parser.add_argument('--attachment-workers', type=int, default=None,
+                        help=f'Parallel attachment downloads (default: $GMAIL_ATTACHMENT_WORKERS or {DEFAULT_ATTACHMENT_WORKERS})')
+    parser.add_argument('--push', action='store_true',
+                        help='Fetch on Pub/Sub push notifications instead of polling (keeps a safety-net poll)')
+    parser.add_argument('--push-host', default='127.0.0.1', help='Interface for the push receiver')
+    parser.add_argument('--push-port', type=int, default=None,
+                        help='Port for the push receiver (default: $GMAIL_PUSH_PORT or 8085)')
+    parser.add_argument('--push-token', default=None,
+                        help='Require ?token=<value> on push requests (default: $GMAIL_PUSH_TOKEN)')
+    parser.add_argument('--watch-topic', default=None,
+                        help='Pub/Sub topic to register with users.watch (default: $GMAIL_WATCH_TOPIC)')
+    parser.add_argument('--safety-interval', type=float, default=DEFAULT_SAFETY_INTERVAL,
+                        help='Seconds between polls in push mode when no notification arrives')
+    parser.add_argument('--push-coalesce', type=float, default=DEFAULT_PUSH_COALESCE,
+                        help='Notifications within this many seconds share one fetch')
+    parser.add_argument('--accounts', default=None,
+                        help='Comma-separated mailboxes watched from this process, each with its own '
+                             'token and state (default: $GMAIL_ACCOUNTS; none = the single default mailbox)')
+    parser.add_argument('--account-workers', type=int, default=None,
+                        help=f'Accounts polled at the same time (default: $GMAIL_ACCOUNT_WORKERS or {DEFAULT_ACCOUNT_WORKERS})')
+    parser.add_argument('--notes', choices=NOTE_MODES, default=None,
+                        help='thread: one action file per conversation, new messages appended (default); '
+                             'message: one action file per email')
+    parser.add_argument('--max-body-bytes', type=int, default=None,
+                        help=f'Body text kept per email (default: $GMAIL_MAX_BODY_BYTES or {DEFAULT_MAX_BODY_BYTES})')
 
     args = parser.parse_args()
 
-    # Create watcher
-    watcher = GmailWatcher(args.vault, args.credentials, args.interval)
-
-    if not watcher.authenticate():
-        logger.error("Failed to authenticate with Gmail")
-        sys.exit(1)
+    configure_logging('gmail_watcher.log')
+    load_environment()
+
+    # One watcher per account (one unnamed watcher for a single mailbox)
+    accounts = parse_accounts(args.accounts if args.accounts is not None else os.getenv('GMAIL_ACCOUNTS'))
+    args.account_workers = args.account_workers or int(os.getenv('GMAIL_ACCOUNT_WORKERS', DEFAULT_ACCOUNT_WORKERS))
+
+    def schedule_factory():
+        if args.adaptive:
+            return AdaptiveInterval(args.interval, args.min_interval, args.max_interval)
+        return None
+
+    options = dict(sync_mode=args.sync, resync_limit=args.resync_limit,
+                   batch_size=args.batch_size, drain=args.drain,
+                   fetch_mode=args.fetch, skip_labels=args.skip_labels,
+                   max_body_bytes=args.max_body_bytes, attachments=args.attachments,
+                   attachment_workers=args.attachment_workers, note_mode=args.notes,
+                   dry_run=args.demo or args.test)
+    if len(accounts) > 1:
+        watchers = account_watchers(args.vault, args.credentials, accounts, args.interval, schedule_factory,
+                                    cycle_messages=args.cycle_messages, cycle_bytes=args.cycle_bytes,
+                                    **options)
+    else:
+        watchers = [GmailWatcher(args.vault, args.credentials, args.interval, schedule_factory(),
+                                 cycle_messages=args.cycle_messages, cycle_bytes=args.cycle_bytes,
+                                 account=accounts[0] if accounts else None, **options)]
+
+    for watcher in watchers:
+        if not watcher.authenticate():
+            logger.error(f"Failed to authenticate {watcher.watcher_name} with Gmail")
+            sys.exit(1)
 
     if args.list_unread:
-        watcher.list_unread()
+        for watcher in watchers:
+            watcher.list_unread()
         return
 
     if args.test:
-        logger.info("Testing Gmail connection...")
-        items = watcher.check_for_updates()
-        logger.info(f"Found {len(items)} unread emails")
-        if items:
-            logger.info("Sample email:")
-            email_data = watcher._extract_email_data(items[0])
-            logger.info(json.dumps(email_data, indent=2))
+        for watcher in watchers:
+            logger.info(f"Testing {watcher.watcher_name} connection...")
+            try:
+                items = watcher.check_for_updates()
+            except Exception as e:
+                logger.error(f"Error checking for emails: {e}")
+                sys.exit(1)
+            logger.info(f"Found {len(items)} unread emails")
+            if items:
+                logger.info("Sample email:")
+                email_data = watcher._extract_email_data(items[0])
+                logger.info(json.dumps(email_data, indent=2))
         return
 
     if args.demo:
         logger.info("Demo mode: checking for emails without creating files...")
-        items = watcher.check_for_updates()
-        logger.info(f"Would create {len(items)} action files:")
-        for item in items:
-            email_data = watcher._extract_email_data(item)
-            logger.info(f"  - {email_data['from']}: {email_data['subject']}")
+        for watcher in watchers:
+            try:
+                items = watcher.check_for_updates()
+            except Exception as e:
+                logger.error(f"Error checking for emails: {e}")
+                sys.exit(1)
+            logger.info(f"{watcher.watcher_name} would create {len(items)} action files:")
+            for item in items:
+                email_data = watcher._extract_email_data(item)
+                logger.info(f"  - {email_data['from']}: {email_data['subject']}")
         return
 
     # Run continuous watcher
-    logger.info(f"Starting Gmail watcher (checking every {args.interval}s)")
+    receiver = None
+    push_options = dict(safety_interval=args.safety_interval, coalesce_seconds=args.push_coalesce,
+                        watch_topic=args.watch_topic or os.getenv('GMAIL_WATCH_TOPIC'))
+    push_address = (args.push_host, args.push_port or int(os.getenv('GMAIL_PUSH_PORT', 8085)))
+    push_token = args.push_token or os.getenv('GMAIL_PUSH_TOKEN')
+    if args.push and len(watchers) > 1:
+        from gmail_push import PushReceiver, PushRouter
+        router = PushRouter()
+        for watcher in watchers:
+            watcher.enable_push(**push_options)
+            router.add(watcher.email_address, watcher.on_push_notification)
+        receiver = PushReceiver(router, *push_address, token=push_token).start()
+    elif args.push:
+        receiver = watchers[0].start_push(*push_address, token=push_token, **push_options)
+
+    if args.push:
+        logger.info(f"Starting Gmail watcher (push, safety-net poll every {args.safety_interval:g}s)")
+    else:
+        logger.info(f"Starting Gmail watcher (checking every {args.interval}s{', adaptive' if args.adaptive else ''})")
+    if len(watchers) > 1:
+        logger.info(f"Accounts: {', '.join(accounts)} ({args.account_workers} at a time)")
     logger.info(f"Vault: {args.vault}")
     logger.info("Press Ctrl+C to stop")
 
+    start_metrics_export(watchers[0].logs, args.metrics_port)
+
+    if len(watchers) > 1:
+        import asyncio
+        from supervisor import WatcherSupervisor
+        try:
+            asyncio.run(WatcherSupervisor(watchers, max_workers=args.account_workers).run())
+        finally:
+            if receiver:
+                receiver.stop()
+        return
+
+    watcher = watchers[0]
     try:
         watcher.run()
     except KeyboardInterrupt:
         logger.info("Gmail watcher stopped by user")
+        if receiver:
+            receiver.stop()
+        watcher.close()
         sys.exit(0)
 
 
@@ -33,30 +33,15 @@ from pathlib import Path
 from typing import List, Dict, Optional
 import time
 
-# Playwright imports
-try:
-    from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
-except ImportError:
-    print("ERROR: Playwright not installed.")
-    print("Install with: pip install playwright")
-    print("Then run: python3 -m playwright install")
-    sys.exit(1)
-
-# Load environment
-from dotenv import load_dotenv
-load_dotenv()
-
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('linkedin_poster.log'),
-        logging.StreamHandler()
-    ]
-)
+from vault_index import get_vault_index
+from frontmatter import read_note, update_fields
+from base_watcher import configure_logging, load_environment
+from browser_profile import BrowserProfile
+
 logger = logging.getLogger('LinkedInPoster')
 
+PLAYWRIGHT_INSTALL_HINT = 'Install with: pip install playwright && python3 -m playwright install'
+
 
 class LinkedInPoster:
     """Handle LinkedIn posting via browser automation."""
@@ -72,12 +57,14 @@ class LinkedInPoster:
         """
         self.vault_path = Path(vault_path)
         self.session_path = Path(os.getenv('LINKEDIN_SESSION_PATH', './linkedin_session'))
+        self.profile = BrowserProfile(self.session_path)
         self.email = email or os.getenv('LINKEDIN_EMAIL')
         self.password = password or os.getenv('LINKEDIN_PASSWORD')
         self.browser = None
         self.context = None
         self.page = None
         self._ensure_folders()
+        self.index = get_vault_index(self.vault_path)
 
     def _ensure_folders(self):
         """Ensure required folders exist."""
@@ -85,15 +72,24 @@ class LinkedInPoster:
         (self.vault_path / 'Pending_Approval').mkdir(exist_ok=True)
         (self.vault_path / 'Done').mkdir(exist_ok=True)
 
-    def setup_browser(self, headless: bool = True) -> bool:
-        """Setup Playwright browser."""
+    def setup_browser(self, headless: bool = None) -> bool:
+        """
+        Setup Playwright browser.
+
+        Args:
+            headless: Override the profile (default: headless once a
+                session has been saved)
+        """
+        try:
+            from playwright.sync_api import sync_playwright
+        except ImportError:
+            logger.error("Playwright not installed.")
+            logger.error(PLAYWRIGHT_INSTALL_HINT)
+            return False
+
         try:
             playwright = sync_playwright().start()
-            self.context = playwright.chromium.launch_persistent_context(
-                str(self.session_path),
-                headless=headless,
-                args=['--no-sandbox', '--disable-setuid-sandbox']
-            )
+            self.context = self.profile.launch(playwright.chromium, headless)
             self.page = self.context.pages[0] if self.context.pages else self.context.new_page()
             logger.info("Browser launched successfully")
             return True
@@ -137,26 +133,18 @@ class LinkedInPoster:
             return False
 
     def find_pending_posts(self) -> List[Dict]:
-        """Find pending LinkedIn posts in Pending_Approval folder."""
+        """Find pending LinkedIn posts in Pending_Approval folder (via the vault index)."""
         try:
-            pending_dir = self.vault_path / 'Pending_Approval'
+            self.index.refresh()
             posts = []
 
-            for file in pending_dir.glob('LINKEDIN_*.md'):
+            notes = self.index.query(type='linkedin_post', folder='Pending_Approval',
+                                     name_prefix='LINKEDIN_')
+            for note in notes:
+                file = note['path']
                 try:
-                    content = file.read_text()
-
-                    # Parse YAML frontmatter
-                    parts = content.split('---')
-                    if len(parts) < 3:
-                        continue
-
-                    frontmatter = parts[1]
-                    body = parts[2].strip()
-
-                    # Check if this is a LinkedIn post
-                    if 'type: linkedin_post' not in frontmatter:
-                        continue
+                    _, body = read_note(file)
+                    body = body.strip()
 
                     # Extract metadata
                     post_data = {
@@ -167,10 +155,8 @@ class LinkedInPoster:
                     }
 
                     # Extract hashtags if present
-                    if 'hashtags:' in frontmatter:
-                        hashtags_line = [l for l in frontmatter.split('\n') if l.startswith('hashtags:')]
-                        if hashtags_line:
-                            post_data['hashtags'] = hashtags_line[0].replace('hashtags:', '').strip()
+                    if note['frontmatter'].get('hashtags'):
+                        post_data['hashtags'] = note['frontmatter']['hashtags']
 
                     posts.append(post_data)
 
@@ -243,12 +229,15 @@ class LinkedInPoster:
             dest = self.vault_path / 'Done' / f"{filename.replace('LINKEDIN_', 'LINKEDIN_POSTED_')}"
 
             if source.exists():
-                content = source.read_text()
-                # Update status in YAML
-                content = content.replace('status: pending_approval', 'status: posted')
-                content = content.replace('type: linkedin_post', f'type: linkedin_post\nposted_at: {datetime.now().isoformat()}\nsuccess: {success}')
-                dest.write_text(content)
+                # Update status in YAML (body is copied across untouched)
+                update_fields(source, {
+                    'status': 'posted',
+                    'posted_at': datetime.now().isoformat(),
+                    'success': success
+                }, dest=dest)
                 source.unlink()
+                self.index.remove_path(source)
+                self.index.update_path(dest)
                 logger.info(f"Moved to Done: {filename}")
         except Exception as e:
             logger.error(f"Error moving post: {e}")
@@ -260,7 +249,7 @@ class LinkedInPoster:
                 self.page.close()
             if self.context:
                 self.context.close()
-            logger.info("Browser closed")
+            logger.info(f"Browser closed ({self.profile.blocked} requests blocked)")
         except Exception as e:
             logger.warning(f"Error closing browser: {e}")
 
@@ -305,6 +294,9 @@ def main():
 
     args = parser.parse_args()
 
+    configure_logging('linkedin_poster.log')
+    load_environment()
+
     # Create poster
     poster = LinkedInPoster(args.vault, args.email, args.password)
 
@@ -331,7 +323,7 @@ def main():
 
     if args.post or args.demo:
         logger.info(f"{'DEMO' if args.demo else 'POSTING'} mode...")
-        if poster.setup_browser(headless=not args.demo):
+        if poster.setup_browser(headless=False if args.demo else None):
             if poster.authenticate_linkedin():
                 poster.process_pending_posts(auto_post=args.post)
         poster.close()
@@ -0,0 +1,436 @@
+#!/usr/bin/env python3
+"""
+Watcher Metrics
+===============
+
+Process-wide metrics registry (counters, gauges, latency histograms) with
+two exporters:
+
+- A stdlib ``http.server`` endpoint serving Prometheus text format on
+  ``/metrics`` (and the same data as JSON on ``/metrics.json``)
+- A periodic JSON snapshot appended to ``Logs/metrics/YYYY-MM-DD.jsonl``
+
+Every BaseWatcher gets a ``WatcherMetrics`` view (``self.metrics``) bound to
+its name; ``run``, ``check_for_updates`` and ``create_action_file`` are
+instrumented there, and watchers add their own API/DOM call and dedup-hit
+counts.
+
+Usage:
+    start_metrics_export(vault / 'Logs', port=9464, snapshot_interval=60)
+    curl localhost:9464/metrics
+"""
+
+import os
+import json
+import math
+import time
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+logger = logging.getLogger('Metrics')
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """Base for labelled metrics; one value (or histogram state) per label set."""
+
+    kind = ''
+
+    def __init__(self, name: str, help_text: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], object] = {}
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, '')) for n in self.label_names)
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            lines.append(f'{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}')
+        return lines
+
+    def snapshot(self) -> List[Dict]:
+        with self._lock:
+            return [{'labels': dict(zip(self.label_names, key)), 'value': value}
+                    for key, value in self._values.items()]
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    """Value that can go up and down."""
+
+    kind = 'gauge'
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Histogram(_Metric):
+    """Latency/size distribution with cumulative buckets."""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, labels: Iterable[str] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state['counts'][i] += 1
+                    break
+            state['sum'] += value
+            state['count'] += 1
+
+    def time(self, **labels) -> '_Timer':
+        """Context manager observing the elapsed wall time of its block."""
+        return _Timer(self, labels)
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            items = [(k, {'counts': list(v['counts']), 'sum': v['sum'], 'count': v['count']})
+                     for k, v in self._values.items()]
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state['counts']):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f'{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}')
+            labels = _format_labels(self.label_names, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(state["sum"])}')
+            lines.append(f'{self.name}_count{labels} {state["count"]}')
+        return lines
+
+    def snapshot(self) -> List[Dict]:
+        with self._lock:
+            return [{'labels': dict(zip(self.label_names, key)),
+                     'count': state['count'], 'sum': round(state['sum'], 6),
+                     'buckets': {_format_value(b): c for b, c in zip(self.buckets, state['counts'])}}
+                    for key, state in self._values.items()]
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labels: Dict[str, str]):
+        self.histogram = histogram
+        self.labels = labels
+        self.elapsed = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.elapsed = time.perf_counter() - self._start
+        self.histogram.observe(self.elapsed, **self.labels)
+        return False
+
+
+class MetricsRegistry:
+    """Named collection of metrics; get-or-create so modules can share them."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name: str, help_text: str, labels: Iterable[str], **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, labels, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f'Metric {name} already registered as {metric.kind}')
+            return metric
+
+    def counter(self, name: str, help_text: str, labels: Iterable[str] = ()) -> Counter:
+        return self._get(Counter, name, help_text, labels)
+
+    def gauge(self, name: str, help_text: str, labels: Iterable[str] = ()) -> Gauge:
+        return self._get(Gauge, name, help_text, labels)
+
+    def histogram(self, name: str, help_text: str, labels: Iterable[str] = (),
+                  buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help_text, labels, buckets=buckets)
+
+    def render_prometheus(self) -> str:
+        """All metrics in Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self) -> Dict:
+        """All metrics as a JSON-serializable dict."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {
+            'timestamp': datetime.utcnow().isoformat() + 'Z',
+            'metrics': {m.name: {'type': m.kind, 'samples': m.snapshot()} for m in metrics}
+        }
+
+
+REGISTRY = MetricsRegistry()
+
+
+class WatcherMetrics:
+    """The standard watcher metrics, bound to one watcher's name."""
+
+    def __init__(self, watcher: str, registry: MetricsRegistry = REGISTRY):
+        self.watcher = watcher
+        self.registry = registry
+        r = registry
+        self.cycles = r.counter('watcher_cycles_total', 'Poll cycles run', ['watcher'])
+        self.cycle_duration = r.histogram('watcher_cycle_duration_seconds',
+                                          'Wall time of a full poll cycle', ['watcher'])
+        self.check_duration = r.histogram('watcher_check_duration_seconds',
+                                          'Wall time of check_for_updates', ['watcher'])
+        self.create_duration = r.histogram('watcher_create_action_file_seconds',
+                                           'Wall time of create_action_file', ['watcher'])
+        self.items_found = r.counter('watcher_items_found_total', 'Items returned by check_for_updates',
+                                     ['watcher'])
+        self.action_files = r.counter('watcher_action_files_total', 'New action files written', ['watcher'])
+        self.api_calls = r.counter('watcher_api_calls_total', 'Remote API / browser DOM calls',
+                                   ['watcher', 'call'])
+        self.errors = r.counter('watcher_errors_total', 'Errors by stage', ['watcher', 'stage'])
+        self.dedup_hits = r.counter('watcher_dedup_hits_total', 'Items skipped as already processed',
+                                    ['watcher'])
+        self.interval = r.gauge('watcher_poll_interval_seconds', 'Interval chosen after the last cycle',
+                                ['watcher'])
+        self.last_success = r.gauge('watcher_last_success_timestamp_seconds',
+                                    'Unix time of the last cycle that completed without error',
+                                    ['watcher'])
+
+    def api_call(self, call: str, count: int = 1):
+        self.api_calls.inc(count, watcher=self.watcher, call=call)
+
+    def error(self, stage: str):
+        self.errors.inc(watcher=self.watcher, stage=stage)
+
+    def dedup_hit(self, count: int = 1):
+        self.dedup_hits.inc(count, watcher=self.watcher)
+
+    def counter(self, name: str, help_text: str) -> '_BoundCounter':
+        """A watcher-specific counter (labelled by watcher)."""
+        return _BoundCounter(self.registry.counter(name, help_text, ['watcher']), self.watcher)
+
+    def gauge(self, name: str, help_text: str) -> '_BoundGauge':
+        """A watcher-specific gauge (labelled by watcher)."""
+        return _BoundGauge(self.registry.gauge(name, help_text, ['watcher']), self.watcher)
+
+    def histogram(self, name: str, help_text: str,
+                  buckets: Iterable[float] = DEFAULT_BUCKETS) -> '_BoundHistogram':
+        """A watcher-specific histogram (labelled by watcher)."""
+        return _BoundHistogram(self.registry.histogram(name, help_text, ['watcher'], buckets),
+                               self.watcher)
+
+
+class _BoundCounter:
+    def __init__(self, counter: Counter, watcher: str):
+        self._counter, self._watcher = counter, watcher
+
+    def inc(self, amount: float = 1):
+        self._counter.inc(amount, watcher=self._watcher)
+
+    def value(self) -> float:
+        return self._counter.value(watcher=self._watcher)
+
+
+class _BoundGauge:
+    def __init__(self, gauge: Gauge, watcher: str):
+        self._gauge, self._watcher = gauge, watcher
+
+    def set(self, value: float):
+        self._gauge.set(value, watcher=self._watcher)
+
+    def inc(self, amount: float = 1):
+        self._gauge.inc(amount, watcher=self._watcher)
+
+    def value(self) -> float:
+        return self._gauge.value(watcher=self._watcher)
+
+
+class _BoundHistogram:
+    def __init__(self, histogram: Histogram, watcher: str):
+        self._histogram, self._watcher = histogram, watcher
+
+    def observe(self, value: float):
+        self._histogram.observe(value, watcher=self._watcher)
+
+    def time(self) -> _Timer:
+        return self._histogram.time(watcher=self._watcher)
+
+
+# ------------------------------------------------------------------ exporters
+
+def _handler_class(registry: MetricsRegistry):
+    """Request handler for /metrics; http.server is only imported when serving."""
+    from http.server import BaseHTTPRequestHandler
+
+    class _MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?', 1)[0] == '/metrics':
+                body = registry.render_prometheus().encode('utf-8')
+                content_type = 'text/plain; version=0.0.4; charset=utf-8'
+            elif self.path.split('?', 1)[0] == '/metrics.json':
+                body = json.dumps(registry.snapshot()).encode('utf-8')
+                content_type = 'application/json'
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+    return _MetricsHandler
+
+
+class MetricsExporter:
+    """HTTP endpoint and/or periodic JSON snapshots for a registry."""
+
+    def __init__(self, logs_dir: Path = None, port: int = None, host: str = '127.0.0.1',
+                 snapshot_interval: float = 60, registry: MetricsRegistry = REGISTRY):
+        """
+        Args:
+            logs_dir: Vault Logs folder for snapshots (None = no snapshots)
+            port: HTTP port for /metrics (None = no server)
+            host: Interface to bind (localhost by default)
+            snapshot_interval: Seconds between JSON snapshots
+            registry: Registry to export
+        """
+        self.logs_dir = Path(logs_dir) if logs_dir else None
+        self.port = port
+        self.host = host
+        self.snapshot_interval = snapshot_interval
+        self.registry = registry
+        self._server = None
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        if self.port is not None:
+            from http.server import ThreadingHTTPServer
+            self._server = ThreadingHTTPServer((self.host, self.port), _handler_class(self.registry))
+            self.port = self._server.server_address[1]
+            thread = threading.Thread(target=self._server.serve_forever, name='MetricsHTTP', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+            logger.info(f'Metrics endpoint: http://{self.host}:{self.port}/metrics')
+        if self.logs_dir is not None and self.snapshot_interval:
+            thread = threading.Thread(target=self._snapshot_loop, name='MetricsSnapshot', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def write_snapshot(self) -> Path:
+        """Append one JSON snapshot line to Logs/metrics/YYYY-MM-DD.jsonl."""
+        folder = self.logs_dir / 'metrics'
+        folder.mkdir(parents=True, exist_ok=True)
+        snapshot = self.registry.snapshot()
+        path = folder / f'{snapshot["timestamp"][:10]}.jsonl'
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(snapshot) + '\n')
+        return path
+
+    def _snapshot_loop(self):
+        while not self._stop.wait(self.snapshot_interval):
+            try:
+                self.write_snapshot()
+            except Exception as e:
+                logger.warning(f'Could not write metrics snapshot: {e}')
+
+    def stop(self):
+        self._stop.set()
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+        if self.logs_dir is not None and self.snapshot_interval:
+            try:
+                self.write_snapshot()
+            except Exception as e:
+                logger.warning(f'Could not write metrics snapshot: {e}')
+
+
+_exporter = None
+
+
+def start_metrics_export(logs_dir: Path = None, port: int = None,
+                         snapshot_interval: float = None) -> MetricsExporter:
+    """
+    Start the process-wide exporter once (later calls return the same one).
+
+    ``port`` defaults to $METRICS_PORT (unset = no HTTP endpoint) and
+    ``snapshot_interval`` to $METRICS_SNAPSHOT_INTERVAL (default 60s).
+    """
+    global _exporter
+    if _exporter is None:
+        if port is None and os.getenv('METRICS_PORT'):
+            port = int(os.getenv('METRICS_PORT'))
+        if snapshot_interval is None:
+            snapshot_interval = float(os.getenv('METRICS_SNAPSHOT_INTERVAL', 60))
+        _exporter = MetricsExporter(logs_dir, port, snapshot_interval=snapshot_interval).start()
+    return _exporter
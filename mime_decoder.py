@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+MIME Decoder
+============
+
+Reads the body and attachment list of a Gmail API message
+(``format='full'``) while decoding as little as possible.
+
+- ``walk_parts(payload)`` walks nested multipart trees iteratively and
+  yields the leaf parts in document order, however deep the nesting
+- ``best_body_part(payload)`` picks the first ``text/plain`` part, else the
+  first ``text/html`` one, ignoring attachments
+- ``decode_text(part, max_bytes)`` base64url-decodes the part in chunks
+  through an incremental decoder for its declared charset (HTML is turned
+  into text as it streams) and stops once ``max_bytes`` of text are
+  collected, so a 20 MB body is never decoded in full
+- ``iter_attachments(payload)`` yields attachment metadata (name, type,
+  size, ``attachmentId``); attachment data is never touched
+- ``iter_base64_chunks(data)`` decodes base64url data piece by piece, for
+  streaming attachment content to disk
+
+Usage:
+    from mime_decoder import extract_body, iter_attachments
+
+    body = extract_body(message['payload'], max_bytes=500)
+    for attachment in iter_attachments(message['payload']):
+        print(attachment['filename'], attachment['size'])
+"""
+
+import re
+import base64
+import codecs
+from html.parser import HTMLParser
+from typing import Dict, Iterator, List, Optional
+
+DEFAULT_CHARSET = 'utf-8'
+
+# base64 characters decoded per step (a multiple of 4: 12 KiB of bytes)
+CHUNK_CHARS = 16 * 1024
+
+# HTML is mostly markup: read at most this many raw bytes looking for text
+DEFAULT_MAX_SCAN_BYTES = 2 * 1024 * 1024
+
+_CHARSET = re.compile(r'charset\s*=\s*"?([^";\s]+)"?', re.IGNORECASE)
+_BLANK_LINES = re.compile(r'\n\s*\n\s*\n+')
+_SPACES = re.compile(r'[ \t\r\f\v]+')
+
+# Tags whose content is never text, and tags that start a new line
+_SKIP_TAGS = {'script', 'style', 'head', 'title', 'template', 'noscript'}
+_BLOCK_TAGS = {'p', 'div', 'br', 'tr', 'li', 'ul', 'ol', 'table', 'blockquote',
+               'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr', 'pre', 'section', 'article'}
+
+
+def header(part: Dict, name: str, default: str = '') -> str:
+    """Value of a part header (case-insensitive name)."""
+    name = name.lower()
+    for h in part.get('headers', []):
+        if h.get('name', '').lower() == name:
+            return h.get('value', default)
+    return default
+
+
+def content_charset(part: Dict) -> str:
+    """Declared charset of a part, if Python knows it; UTF-8 otherwise."""
+    match = _CHARSET.search(header(part, 'Content-Type'))
+    if match:
+        try:
+            return codecs.lookup(match.group(1).strip("'")).name
+        except LookupError:
+            pass
+    return DEFAULT_CHARSET
+
+
+def is_attachment(part: Dict) -> bool:
+    """True for parts with a filename or an ``attachment`` disposition."""
+    if part.get('filename'):
+        return True
+    return header(part, 'Content-Disposition').lower().startswith('attachment')
+
+
+def walk_parts(payload: Dict) -> Iterator[Dict]:
+    """Yield the leaf (non-multipart) parts of a payload in document order."""
+    stack = [payload]
+    while stack:
+        part = stack.pop()
+        children = part.get('parts')
+        if children:
+            stack.extend(reversed(children))
+        elif not part.get('mimeType', '').startswith('multipart/'):
+            yield part
+
+
+def best_body_part(payload: Dict) -> Optional[Dict]:
+    """The part to show as the message body: plain text, else HTML."""
+    html = None
+    for part in walk_parts(payload):
+        if is_attachment(part):
+            continue
+        mime_type = part.get('mimeType', '').lower()
+        if mime_type == 'text/plain':
+            return part
+        if mime_type == 'text/html' and html is None:
+            html = part
+    return html
+
+
+def attachment_info(part: Dict) -> Dict:
+    """Metadata of an attachment part (its data is not decoded)."""
+    body = part.get('body', {})
+    return {
+        'filename': part.get('filename') or 'attachment',
+        'mime_type': part.get('mimeType', 'application/octet-stream'),
+        'size': body.get('size', 0),
+        'attachment_id': body.get('attachmentId'),
+        'part_id': part.get('partId'),
+        'inline': header(part, 'Content-Disposition').lower().startswith('inline'),
+    }
+
+
+def iter_attachments(payload: Dict) -> Iterator[Dict]:
+    """Yield metadata for every attachment part (data is not decoded)."""
+    for part in walk_parts(payload):
+        if is_attachment(part):
+            yield attachment_info(part)
+
+
+def iter_base64_chunks(data: str) -> Iterator[bytes]:
+    """Decode base64url ``data`` a chunk at a time."""
+    for start in range(0, len(data), CHUNK_CHARS):
+        chunk = data[start:start + CHUNK_CHARS]
+        yield base64.urlsafe_b64decode(chunk + '=' * (-len(chunk) % 4))
+
+
+class _TextCollector(HTMLParser):
+    """Collects the visible text of an HTML document fed in pieces."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.pieces: List[str] = []
+        self.size = 0
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in _BLOCK_TAGS:
+            self._add('\n')
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in _BLOCK_TAGS:
+            self._add('\n')
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in _BLOCK_TAGS:
+            self._add('\n')
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self._add(_SPACES.sub(' ', data))
+
+    def _add(self, text: str):
+        self.pieces.append(text)
+        self.size += len(text)
+
+
+def _tidy(text: str) -> str:
+    text = '\n'.join(line.strip() for line in text.split('\n'))
+    return _BLANK_LINES.sub('\n\n', text).strip()
+
+
+def _truncate(text: str, max_bytes: int) -> str:
+    """Cut ``text`` to at most ``max_bytes`` of UTF-8 without splitting a character."""
+    encoded = text.encode('utf-8')
+    if len(encoded) <= max_bytes:
+        return text
+    return encoded[:max_bytes].decode('utf-8', errors='ignore')
+
+
+def decode_text(part: Dict, max_bytes: int,
+                max_scan_bytes: int = DEFAULT_MAX_SCAN_BYTES) -> str:
+    """
+    Decode the text of a ``text/*`` part, stopping early.
+
+    Args:
+        part: Gmail message part with ``body.data``
+        max_bytes: Most UTF-8 bytes of text returned
+        max_scan_bytes: Most raw bytes read from an HTML part while
+            looking for text
+
+    Returns:
+        Plain text (HTML converted), '' if the part has no inline data
+    """
+    data = part.get('body', {}).get('data')
+    if not data or max_bytes <= 0:
+        return ''
+    decoder = codecs.getincrementaldecoder(content_charset(part))(errors='replace')
+    is_html = part.get('mimeType', '').lower() == 'text/html'
+    collector = _TextCollector() if is_html else None
+    pieces, size, scanned = [], 0, 0
+
+    for raw in iter_base64_chunks(data):
+        scanned += len(raw)
+        text = decoder.decode(raw)
+        if collector is not None:
+            collector.feed(text)
+            # Markup-heavy text shrinks when tidied; keep a margin
+            if collector.size >= max_bytes * 2 or scanned >= max_scan_bytes:
+                break
+        else:
+            pieces.append(text)
+            size += len(text)
+            if size >= max_bytes:
+                break
+    else:
+        tail = decoder.decode(b'', final=True)
+        if collector is not None:
+            collector.feed(tail)
+            collector.close()
+        else:
+            pieces.append(tail)
+
+    if collector is not None:
+        text = _tidy(''.join(collector.pieces))
+    else:
+        text = ''.join(pieces).replace('\r\n', '\n').strip()
+    return _truncate(text, max_bytes).rstrip()
+
+
+def extract_body(payload: Dict, max_bytes: int) -> str:
+    """Text of the best body part of a message payload ('' if none)."""
+    part = best_body_part(payload)
+    return decode_text(part, max_bytes) if part else ''
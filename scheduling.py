@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Polling Schedule Policies
+=========================
+
+Decide how long a watcher sleeps between ``check_for_updates`` cycles.
+
+- FixedInterval: always ``check_interval`` (the original behaviour)
+- AdaptiveInterval: poll faster while items keep arriving, back off
+  exponentially (with jitter) when cycles come back empty or fail
+
+Usage:
+    watcher = GmailWatcher(vault, creds, check_interval=120,
+                           schedule=AdaptiveInterval(120, min_interval=10, max_interval=900))
+"""
+
+import random
+from abc import ABC, abstractmethod
+
+
+class SchedulePolicy(ABC):
+    """Pluggable policy returning the delay before the next poll."""
+
+    @abstractmethod
+    def next_interval(self, items_found: int, error: bool = False) -> float:
+        """
+        Compute the delay after a cycle.
+
+        Args:
+            items_found: Number of items the cycle returned
+            error: True if the cycle raised
+
+        Returns:
+            Seconds to wait before the next cycle
+        """
+        pass
+
+    def reset(self):
+        """Forget history (e.g. after the watcher restarts)."""
+        pass
+
+
+class FixedInterval(SchedulePolicy):
+    """Sleep the same interval after every cycle."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+
+    def next_interval(self, items_found: int, error: bool = False) -> float:
+        return self.interval
+
+
+class AdaptiveInterval(SchedulePolicy):
+    """
+    Traffic-driven polling interval.
+
+    Each cycle that finds items multiplies the interval by ``speedup``
+    (shrinking it towards ``min_interval``); empty cycles multiply it by
+    ``backoff`` and failed cycles by ``error_backoff`` (growing it towards
+    ``max_interval``). The returned delay is jittered by +/- ``jitter`` so
+    several watchers don't poll in lockstep.
+    """
+
+    def __init__(self, base_interval: float, min_interval: float = None,
+                 max_interval: float = None, speedup: float = 0.5,
+                 backoff: float = 1.5, error_backoff: float = 2.0,
+                 jitter: float = 0.1, rng: random.Random = None):
+        """
+        Initialize the policy.
+
+        Args:
+            base_interval: Starting interval (usually the watcher's check_interval)
+            min_interval: Fastest allowed poll (default: base / 8, at least 1s)
+            max_interval: Slowest allowed poll (default: base * 8)
+            speedup: Multiplier applied after a cycle that found items (< 1)
+            backoff: Multiplier applied after an empty cycle (> 1)
+            error_backoff: Multiplier applied after a failed cycle (> 1)
+            jitter: Fractional random spread applied to the returned delay
+            rng: Random source (injectable for reproducible runs)
+        """
+        self.base_interval = float(base_interval)
+        self.min_interval = float(min_interval if min_interval is not None
+                                  else max(1.0, base_interval / 8))
+        self.max_interval = float(max_interval if max_interval is not None
+                                  else base_interval * 8)
+        if self.min_interval > self.max_interval:
+            raise ValueError('min_interval must not exceed max_interval')
+        self.speedup = speedup
+        self.backoff = backoff
+        self.error_backoff = error_backoff
+        self.jitter = jitter
+        self.rng = rng or random.Random()
+        self.interval = self._clamp(self.base_interval)
+
+    def _clamp(self, value: float) -> float:
+        return min(self.max_interval, max(self.min_interval, value))
+
+    def next_interval(self, items_found: int, error: bool = False) -> float:
+        if error:
+            self.interval = self._clamp(self.interval * self.error_backoff)
+        elif items_found:
+            self.interval = self._clamp(self.interval * self.speedup)
+        else:
+            self.interval = self._clamp(self.interval * self.backoff)
+
+        spread = self.interval * self.jitter
+        return self._clamp(self.interval + self.rng.uniform(-spread, spread))
+
+    def reset(self):
+        self.interval = self._clamp(self.base_interval)
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Watcher Supervisor
+==================
+
+Runs every configured watcher concurrently in a single asyncio process.
+
+- Blocking SDK calls run on a bounded shared thread pool; watchers whose
+  client is thread-affine (Playwright sync API) get a dedicated thread
+- Crashed watchers are restarted with exponential backoff
+- SIGINT/SIGTERM shut every watcher down cleanly
+
+Usage:
+    python supervisor.py --vault ./AI_Employee_Vault --gmail --whatsapp --watch ~/Downloads
+    python supervisor.py --vault ./AI_Employee_Vault --gmail --max-workers 4
+    python supervisor.py --vault ./AI_Employee_Vault --gmail --gmail-accounts work,personal
+    python supervisor.py --vault ./AI_Employee_Vault --whatsapp --whatsapp-push
+"""
+
+import os
+import sys
+import signal
+import asyncio
+import logging
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent))
+from base_watcher import BaseWatcher, configure_logging, load_environment
+from scheduling import AdaptiveInterval
+from metrics import start_metrics_export
+
+logger = logging.getLogger('Supervisor')
+
+
+class WatcherSupervisor:
+    """Schedule, restart and shut down a set of watchers on one event loop."""
+
+    def __init__(self, watchers: List[BaseWatcher], max_workers: int = 4,
+                 initial_backoff: float = 1.0, max_backoff: float = 300.0,
+                 stable_after: float = 60.0, shutdown_timeout: float = 30.0):
+        """
+        Initialize the supervisor.
+
+        Args:
+            watchers: Watchers to run
+            max_workers: Size of the shared thread pool for blocking calls
+            initial_backoff: First restart delay after a crash (seconds)
+            max_backoff: Upper bound on the restart delay (seconds)
+            stable_after: A run lasting this long resets the backoff (seconds)
+            shutdown_timeout: How long to wait for watchers to stop (seconds)
+        """
+        self.watchers = watchers
+        self.max_workers = max_workers
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.stable_after = stable_after
+        self.shutdown_timeout = shutdown_timeout
+
+        self.stop_event = None
+        self.shared_executor = ThreadPoolExecutor(max_workers=max_workers,
+                                                  thread_name_prefix='watcher')
+        self.executors: Dict[str, ThreadPoolExecutor] = {}
+        self.restarts: Dict[str, int] = {}
+
+    def _executor_for(self, watcher: BaseWatcher) -> ThreadPoolExecutor:
+        """Shared pool, or a dedicated single thread for thread-affine watchers."""
+        if not watcher.thread_affine:
+            return self.shared_executor
+        if watcher.watcher_name not in self.executors:
+            self.executors[watcher.watcher_name] = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix=watcher.watcher_name
+            )
+        return self.executors[watcher.watcher_name]
+
+    async def _supervise(self, watcher: BaseWatcher):
+        """Run one watcher, restarting it with backoff until shutdown."""
+        loop = asyncio.get_running_loop()
+        executor = self._executor_for(watcher)
+        backoff = self.initial_backoff
+        name = watcher.watcher_name
+
+        while not self.stop_event.is_set():
+            started = time.monotonic()
+            try:
+                ready = await loop.run_in_executor(executor, watcher.setup)
+                if not ready:
+                    raise RuntimeError('setup() returned False')
+                await watcher.run_async(self.stop_event, executor)
+                if self.stop_event.is_set():
+                    break
+                raise RuntimeError('run_async() returned before shutdown')
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.restarts[name] = self.restarts.get(name, 0) + 1
+                if time.monotonic() - started >= self.stable_after:
+                    backoff = self.initial_backoff
+                logger.error(f'{name} crashed: {e} (restart #{self.restarts[name]} in {backoff:.1f}s)')
+                watcher.log_action('watcher_crashed', f'{name} crashed: {e}', 'failed',
+                                   {'restart': self.restarts[name], 'backoff_seconds': backoff})
+                await loop.run_in_executor(executor, self._safe_close, watcher)
+                try:
+                    await asyncio.wait_for(self.stop_event.wait(), timeout=backoff)
+                except asyncio.TimeoutError:
+                    pass
+                backoff = min(backoff * 2, self.max_backoff)
+
+        await loop.run_in_executor(executor, self._safe_close, watcher)
+        logger.info(f'{name} stopped')
+
+    @staticmethod
+    def _safe_close(watcher: BaseWatcher):
+        try:
+            watcher.close()
+        except Exception as e:
+            logger.warning(f'Error closing {watcher.watcher_name}: {e}')
+
+    def request_stop(self):
+        """Ask every watcher to stop (safe to call from a signal handler)."""
+        if self.stop_event and not self.stop_event.is_set():
+            logger.info('Shutdown requested')
+            self.stop_event.set()
+
+    def _install_signal_handlers(self, loop: asyncio.AbstractEventLoop):
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.request_stop)
+            except (NotImplementedError, RuntimeError):
+                # Windows / non-main thread: fall back to signal.signal
+                try:
+                    signal.signal(sig, lambda *_: loop.call_soon_threadsafe(self.request_stop))
+                except ValueError:
+                    pass
+
+    async def run(self):
+        """Run all watchers until a shutdown signal arrives."""
+        loop = asyncio.get_running_loop()
+        self.stop_event = asyncio.Event()
+        self._install_signal_handlers(loop)
+
+        logger.info(f'Supervising {len(self.watchers)} watchers: '
+                    f'{", ".join(w.watcher_name for w in self.watchers)}')
+        tasks = [asyncio.create_task(self._supervise(w), name=w.watcher_name)
+                 for w in self.watchers]
+
+        await self.stop_event.wait()
+        done, pending = await asyncio.wait(tasks, timeout=self.shutdown_timeout)
+        for task in pending:
+            logger.warning(f'{task.get_name()} did not stop in time; cancelling')
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        for executor in [self.shared_executor, *self.executors.values()]:
+            executor.shutdown(wait=False, cancel_futures=True)
+        for watcher in self.watchers:
+            watcher.vault_writer.close()
+            watcher.audit_log.flush(timeout=5)
+        logger.info('All watchers stopped')
+
+
+def build_watchers(args) -> List[BaseWatcher]:
+    """Create the watchers requested on the command line."""
+    watchers = []
+
+    if args.gmail:
+        try:
+            from gmail_watcher import GmailWatcher, account_watchers, parse_accounts
+            accounts = parse_accounts(args.gmail_accounts)
+            if len(accounts) > 1:
+                watchers.extend(account_watchers(
+                    args.vault, args.credentials, accounts, args.gmail_interval,
+                    (lambda: AdaptiveInterval(args.gmail_interval)) if args.adaptive else None
+                ))
+            else:
+                watchers.append(GmailWatcher(
+                    args.vault, args.credentials, args.gmail_interval,
+                    AdaptiveInterval(args.gmail_interval) if args.adaptive else None,
+                    account=accounts[0] if accounts else None
+                ))
+        except (ImportError, SystemExit) as e:
+            logger.error(f'Gmail watcher unavailable: {e}')
+
+    if args.whatsapp:
+        try:
+            from whatsapp_watcher import WhatsAppWatcher
+            watchers.append(WhatsAppWatcher(
+                args.vault, args.session, args.whatsapp_interval,
+                AdaptiveInterval(args.whatsapp_interval) if args.adaptive else None,
+                push=args.whatsapp_push
+            ))
+        except (ImportError, SystemExit) as e:
+            logger.error(f'WhatsApp watcher unavailable: {e}')
+
+    if args.watch:
+        try:
+            from filesystem_watcher import FileDropHandler
+            watchers.append(FileDropHandler(args.vault, args.watch, args.exclude))
+        except (ImportError, ValueError) as e:
+            logger.error(f'FileSystem watcher unavailable: {e}')
+
+    return watchers
+
+
+def main():
+    """CLI entry point."""
+    # Before the parser: .env supplies the interval defaults
+    load_environment()
+
+    parser = argparse.ArgumentParser(description='Run all AI Employee watchers in one process')
+    parser.add_argument('--vault', required=True, help='Path to Obsidian vault')
+    parser.add_argument('--gmail', action='store_true', help='Run the Gmail watcher')
+    parser.add_argument('--credentials', default='./credentials.json', help='Path to Gmail credentials.json')
+    parser.add_argument('--gmail-accounts', default=os.getenv('GMAIL_ACCOUNTS'),
+                        help='Comma-separated Gmail accounts, one watcher each (default: $GMAIL_ACCOUNTS)')
+    parser.add_argument('--gmail-interval', type=int, default=int(os.getenv('GMAIL_CHECK_INTERVAL', 120)),
+                        help='Gmail check interval in seconds')
+    parser.add_argument('--whatsapp', action='store_true', help='Run the WhatsApp watcher')
+    parser.add_argument('--session', default=None, help='Path to WhatsApp session')
+    parser.add_argument('--whatsapp-interval', type=int, default=int(os.getenv('WHATSAPP_CHECK_INTERVAL', 30)),
+                        help='WhatsApp check interval in seconds')
+    parser.add_argument('--whatsapp-push', action='store_true', default=None,
+                        help='Check WhatsApp when its chat list changes, polling only as a safety net '
+                             '(default: $WHATSAPP_PUSH)')
+    parser.add_argument('--watch', default=None, help='Folder for the FileSystem watcher')
+    parser.add_argument('--exclude', nargs='+', default=['.DS_Store', 'thumbs.db'],
+                        help='File patterns the FileSystem watcher ignores')
+    parser.add_argument('--adaptive', action='store_true',
+                        help='Adapt polling intervals to traffic instead of fixed intervals')
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help='Serve Prometheus metrics on this port (default: $METRICS_PORT)')
+    parser.add_argument('--max-workers', type=int, default=4, help='Shared thread pool size')
+
+    args = parser.parse_args()
+
+    configure_logging()
+
+    watchers = build_watchers(args)
+    if not watchers:
+        print('❌ No watchers configured (use --gmail, --whatsapp and/or --watch)', file=sys.stderr)
+        sys.exit(1)
+
+    print(f'🚀 Starting {len(watchers)} watchers in one process')
+    print(f'   Vault: {args.vault}')
+    print(f'   Press Ctrl+C to stop')
+    exporter = start_metrics_export(watchers[0].logs, args.metrics_port)
+    try:
+        asyncio.run(WatcherSupervisor(watchers, max_workers=args.max_workers).run())
+    finally:
+        exporter.stop()
+
+
+if __name__ == '__main__':
+    main()
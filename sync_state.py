@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Sync State
+==========
+
+Small persistent cursors for incremental watchers (e.g. the Gmail
+``historyId``), kept as one JSON document per namespace under
+``<vault>/.state/``. Every save is a temp-file + rename, so a crash leaves
+either the old or the new cursor, never a torn file. With ``persist=False``
+updates stay in memory (dry runs such as ``--demo``).
+
+Usage:
+    state = SyncState(vault / '.state' / 'gmail.json')
+    start = state.get('history_id')
+    state.update(history_id='12345', last_sync='2026-02-17T10:00:00')
+"""
+
+import os
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict
+
+logger = logging.getLogger('SyncState')
+
+
+class SyncState:
+    """A JSON dict persisted atomically on every update."""
+
+    def __init__(self, path: Path, persist: bool = True):
+        """
+        Load (or start) the state document.
+
+        Args:
+            path: JSON file holding the state
+            persist: Save on every update; False keeps changes in memory
+        """
+        self.path = Path(path)
+        self.persist = persist
+        self._lock = threading.Lock()
+        self._data: Dict[str, Any] = {}
+        if self.path.exists():
+            try:
+                self._data = json.loads(self.path.read_text(encoding='utf-8'))
+            except (OSError, ValueError) as e:
+                logger.warning(f'Ignoring unreadable sync state {self.path.name}: {e}')
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            return self._data.get(key, default)
+
+    def __getitem__(self, key: str) -> Any:
+        with self._lock:
+            return self._data[key]
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._data
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._data)
+
+    def update(self, **fields):
+        """Set fields (None deletes a key) and save."""
+        with self._lock:
+            for key, value in fields.items():
+                if value is None:
+                    self._data.pop(key, None)
+                else:
+                    self._data[key] = value
+            self._save()
+
+    def clear(self):
+        """Forget every cursor (the next sync starts from scratch)."""
+        with self._lock:
+            self._data = {}
+            self._save()
+
+    def _save(self):
+        if not self.persist:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f'.{self.path.name}.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self._data, f, indent=2, sort_keys=True)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
@@ -0,0 +1,56 @@
+"""Tests for the persistent dedup store."""
+
+import os
+import threading
+
+from dedup_store import DedupStore
+
+
+def test_compaction_writes_without_blocking_adds(tmp_path, monkeypatch):
+    path = tmp_path / 'ids.idx'
+    store = DedupStore(path, compact_interval=3600)
+    store.update(f'old-{n}' for n in range(1000))
+    fsync = os.fsync
+    added = []
+
+    def add_during_write(fd):
+        # The first fsync is the rewritten file's; an add must get through meanwhile
+        if not added:
+            added.append(None)
+            writer = threading.Thread(target=store.add, args=('late',))
+            writer.start()
+            writer.join(timeout=2)
+            added[0] = not writer.is_alive()
+        fsync(fd)
+
+    monkeypatch.setattr(os, 'fsync', add_during_write)
+    store.compact()
+    monkeypatch.undo()
+
+    assert added == [True]  # the add did not wait for the compaction
+    assert 'late' in store and 'old-0' in store
+    store.add('after')
+    store.close()
+
+    reopened = DedupStore(path)
+    try:
+        assert len(reopened) == 1002
+        assert all(item in reopened for item in ('late', 'after', 'old-999'))
+        assert path.stat().st_size == 1002 * 12
+    finally:
+        reopened.close()
+
+
+def test_read_only_store_writes_nothing(tmp_path):
+    path = tmp_path / 'ids.idx'
+    store = DedupStore(path)
+    store.add('known')
+    store.close()
+
+    dry = DedupStore(path, read_only=True)
+    assert 'known' in dry
+    assert dry.add('new')
+    assert 'new' in dry
+    dry.compact()
+    dry.close()
+    assert path.stat().st_size == 12
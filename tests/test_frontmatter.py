@@ -0,0 +1,48 @@
+"""Tests for frontmatter serialization."""
+
+import math
+
+import pytest
+
+from frontmatter import dump_scalar, dumps, parse_scalar, read_frontmatter, render_note
+
+
+@pytest.mark.parametrize('value', [0.5, -2.25, 1e20, 1.5e-10, -3e300, 12345678901234567.0,
+                                   math.inf, -math.inf, 7, -0, True, None])
+def test_scalars_round_trip(value):
+    assert parse_scalar(dump_scalar(value)) == value
+
+
+def test_nan_round_trips():
+    assert dump_scalar(math.nan) == '.nan'
+    assert math.isnan(parse_scalar('.nan'))
+
+
+@pytest.mark.parametrize('text', ['1e5', '.inf', '-.Inf', '.NaN', '3.', '42'])
+def test_number_like_strings_stay_strings(text):
+    assert parse_scalar(dump_scalar(text)) == text
+
+
+def test_note_round_trip(tmp_path):
+    fields = {'score': 1e20, 'ratio': 0.1, 'limit': math.inf, 'subject': 'Re: invoice #42',
+              'tags': ['a', 'b, c']}
+    note = tmp_path / 'note.md'
+    note.write_text(render_note(fields, 'Body\n'))
+    assert read_frontmatter(note) == fields
+    assert dumps({'score': 1e20}) == 'score: 1e+20\n'
+
+
+@pytest.mark.parametrize('items', [
+    ["Pat O'Brien <p@x.com>", 'Jane <j@x.com>'],
+    ['"Smith, John" <john@x.com>', 'b'],
+    ['back\\slash, "quoted"', "it's", 'plain'],
+    [{'name': 'Smith, John', 'tags': ['a', 'b, c']}, [1, [2, 'c, d']], 'z'],
+])
+def test_flow_lists_round_trip(items):
+    assert parse_scalar(dump_scalar(items)) == items
+
+
+def test_flow_lists_written_by_hand():
+    assert parse_scalar("[Pat O'Brien <p@x.com>, Jane <j@x.com>]") == ["Pat O'Brien <p@x.com>", 'Jane <j@x.com>']
+    assert parse_scalar("['it''s, fine', \"a\\\"b, c\"]") == ["it's, fine", 'a"b, c']
+    assert parse_scalar('{"a": [1, 2]}') == {'a': [1, 2]}
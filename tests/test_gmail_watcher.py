@@ -0,0 +1,146 @@
+"""Tests for GmailWatcher against the fake Gmail API in benchmarks/fakes.py."""
+
+import sys
+
+import pytest
+
+from conftest import REPO_ROOT
+
+sys.path.insert(0, str(REPO_ROOT / 'benchmarks'))
+
+from fakes import FakeGmailService, FakeHttpError  # noqa: E402
+from gmail_watcher import GmailWatcher  # noqa: E402
+
+
+@pytest.fixture
+def service():
+    return FakeGmailService(mailbox_size=6, body_kb=1)
+
+
+@pytest.fixture
+def watcher(tmp_path, monkeypatch, service):
+    monkeypatch.chdir(tmp_path)
+    watcher = GmailWatcher(str(tmp_path / 'vault'), str(tmp_path / 'credentials.json'),
+                           skip_labels='', max_retries=0)
+    watcher.service = service
+    yield watcher
+    watcher.audit_log.close()
+
+
+@pytest.mark.parametrize('batch_size', [1, 50])
+def test_drain_requeues_only_transient_failures(watcher, service, batch_size):
+    watcher.batch_size = batch_size
+    poison, flaky = service.order[1], service.order[2]
+    handle_get = service.handle_get
+
+    def failing_get(id=None, **kwargs):
+        if id == poison:
+            raise FakeHttpError(400, 'Invalid id value')
+        if id == flaky:
+            raise FakeHttpError(503, 'Backend Error')
+        return handle_get(id=id, **kwargs)
+
+    service.handle_get = failing_get
+    fetched, remaining = watcher._drain(list(service.order))
+
+    assert remaining == [flaky]
+    assert poison not in {message['id'] for message in fetched}
+    assert len(fetched) == 4
+    assert watcher.dropped.value() >= 1
+
+
+def test_failed_check_backs_off_the_schedule(watcher, service):
+    from scheduling import AdaptiveInterval
+
+    watcher.schedule = AdaptiveInterval(60, jitter=0)
+    service.outage(60)
+    interval = watcher._run_cycle()
+
+    assert watcher.last_cycle['error']
+    assert interval == 120
+
+
+def test_thread_replies_append_without_new_action_files(watcher, service):
+    from frontmatter import read_frontmatter
+
+    watcher.note_mode = 'thread'
+    messages = [watcher.service.handle_get(id=msg_id) for msg_id in service.order[:3]]
+    assert len({message['threadId'] for message in messages}) == 1
+    created_before = watcher.metrics.action_files.value(watcher=watcher.watcher_name)
+
+    paths = [watcher._create_action_file_instrumented(message) for message in messages]
+    watcher._create_action_file_instrumented(messages[1])  # seen before
+
+    assert len(set(paths)) == 1
+    assert watcher.metrics.action_files.value(watcher=watcher.watcher_name) - created_before == 1
+    note = paths[0]
+    meta = read_frontmatter(note)
+    assert meta['messages'] == [message['id'] for message in messages]
+    assert meta['message_count'] == 3
+    text = note.read_text()
+    assert text.count('<!-- email_id:') == 3
+    assert text.index(messages[0]['id']) < text.index('<!-- email_id: ' + messages[2]['id'])
+
+
+def test_thread_participants_survive_quoted_and_apostrophe_senders(watcher):
+    import copy
+
+    from frontmatter import read_frontmatter
+
+    service = watcher.service = FakeGmailService(mailbox_size=4, thread_size=4, body_kb=1)
+    watcher.note_mode = 'thread'
+    smith, pat, ann = '"Smith, John" <john@x.com>', "Pat O'Brien <pat@x.com>", 'Ann [ops] <ann@x.com>'
+    for msg_id, sender in zip(service.order, (smith, pat, ann, smith)):
+        message = copy.deepcopy(service.handle_get(id=msg_id))
+        for header in message['payload']['headers']:
+            if header['name'] == 'From':
+                header['value'] = sender
+        watcher.create_action_file(message)
+
+    note = next(watcher.needs_action.glob('EMAIL_THREAD_*.md'))
+    meta = read_frontmatter(note)
+    assert meta['participants'] == [smith, pat, ann]
+    assert meta['last_from'] == smith
+    assert meta['message_count'] == 4
+
+
+def test_thread_note_header_outgrowing_its_padding_is_rewritten(watcher):
+    from frontmatter import HEADER_SLACK, read_frontmatter
+
+    service = watcher.service = FakeGmailService(mailbox_size=60, thread_size=60, body_kb=1)
+    watcher.note_mode = 'thread'
+    for msg_id in service.order:
+        watcher.create_action_file(service.handle_get(id=msg_id))
+
+    note = next(watcher.needs_action.glob('EMAIL_THREAD_*.md'))
+    meta = read_frontmatter(note)
+    assert meta['messages'] == service.order
+    assert note.read_text().count('<!-- email_id:') == 60
+    header = note.read_text().split('\n---\n', 1)[0]
+    assert len(header) > 2 * HEADER_SLACK  # grown past the first padding
+
+
+def test_dry_run_persists_nothing(tmp_path, monkeypatch, service):
+    monkeypatch.chdir(tmp_path)
+    vault = tmp_path / 'vault'
+    demo = GmailWatcher(str(vault), str(tmp_path / 'credentials.json'), skip_labels='',
+                        attachments=True, dry_run=True)
+    demo.service = service
+    try:
+        assert len(demo.check_for_updates()) == 6
+        assert demo.check_for_updates() == []
+        demo.log_action('email_received', 'not written')
+    finally:
+        demo.audit_log.close()
+
+    assert demo.attachment_store is None
+    assert not (vault / '.state').exists()
+    assert not (vault / '.dedup').exists()
+    assert not list((vault / 'Logs').rglob('*.jsonl'))
+
+    watcher = GmailWatcher(str(vault), str(tmp_path / 'credentials.json'), skip_labels='')
+    watcher.service = service
+    try:
+        assert len(watcher.check_for_updates()) == 6
+    finally:
+        watcher.audit_log.close()
@@ -0,0 +1,41 @@
+"""Tests for urgency.UrgencyMatcher scoring."""
+
+from urgency import UrgencyMatcher, UrgencyRule
+
+
+def test_overlapping_regex_rules_each_count():
+    matcher = UrgencyMatcher([
+        UrgencyRule('invoice', weight=1),
+        UrgencyRule('overdue', 'regex', 2),
+        UrgencyRule(r'over\w+', 'regex', 1),
+    ])
+    result = matcher.score('invoice overdue')
+    assert result['score'] == 4
+    assert result['matched'] == ['invoice', 'overdue', r'over\w+']
+
+
+def test_regex_matching_inside_another_regex_match():
+    matcher = UrgencyMatcher([
+        UrgencyRule(r'\$\d+', 'regex', 2, 'amount'),
+        UrgencyRule(r'\d+', 'regex', 1, 'number'),
+    ], threshold=3)
+    result = matcher.score('pay $500')
+    assert result == {'score': 3, 'priority': 'high', 'matched': ['amount', 'number']}
+
+
+def test_overlapping_keywords_and_phrases_each_count():
+    matcher = UrgencyMatcher([
+        UrgencyRule('as soon as possible', 'phrase', 2),
+        UrgencyRule('as soon', 'phrase', 1),
+        UrgencyRule('possible', weight=1),
+    ])
+    result = matcher.score('Reply AS SOON\n as possible')
+    assert result['score'] == 4
+    assert sorted(result['matched']) == ['as soon', 'as soon as possible', 'possible']
+
+
+def test_rule_counts_once_and_words_are_whole():
+    matcher = UrgencyMatcher([UrgencyRule('help'), UrgencyRule(r'\d+', 'regex', 0.5)], threshold=1)
+    assert matcher.score('helpful notes') == {'score': 0, 'priority': 'normal', 'matched': []}
+    assert matcher.score('help, help', '1 2 3') == {'score': 1.5, 'priority': 'high',
+                                                    'matched': ['help', r'\d+']}
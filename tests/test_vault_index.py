@@ -0,0 +1,38 @@
+"""Tests for the SQLite vault index."""
+
+from vault_index import VaultIndex, get_vault_index
+
+
+def write_note(vault, folder, name, **fields):
+    path = vault / folder / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    header = ''.join(f'{key}: {value}\n' for key, value in fields.items())
+    path.write_text(f'---\n{header}---\n\nBody\n')
+    return path
+
+
+def test_count_matches_query(tmp_path):
+    for n in range(5):
+        write_note(tmp_path, 'Pending_Approval', f'LINKEDIN_{n}.md', type='linkedin_post',
+                   status='pending' if n % 2 else 'approved')
+    write_note(tmp_path, 'Needs_Action', 'EMAIL_1.md', type='email', status='pending')
+    index = VaultIndex(str(tmp_path))
+    try:
+        for filters in ({}, {'type': 'linkedin_post'}, {'status': 'pending'},
+                        {'folder': 'Needs_Action'}, {'name_prefix': 'LINKEDIN_'}):
+            assert index.count(**filters) == len(index.query(**filters))
+        assert index.count(type='linkedin_post', status='pending') == 2
+    finally:
+        index.close()
+
+
+def test_shared_index_syncs_on_first_query(tmp_path):
+    write_note(tmp_path, 'Needs_Action', 'EMAIL_1.md', type='email')
+    index = get_vault_index(str(tmp_path))
+    try:
+        assert not index._synced
+        write_note(tmp_path, 'Needs_Action', 'EMAIL_2.md', type='email')
+        assert index.count(type='email') == 2
+        assert index._synced
+    finally:
+        index.close()
@@ -0,0 +1,78 @@
+"""Tests for vault_writer.VaultWriter."""
+
+import os
+
+from frontmatter import read_frontmatter, render_note
+from vault_writer import VaultWriter
+
+
+def _count_fsyncs(monkeypatch):
+    calls = []
+    real_fsync = os.fsync
+
+    def fsync(fd):
+        calls.append(fd)
+        real_fsync(fd)
+
+    monkeypatch.setattr(os, 'fsync', fsync)
+    return calls
+
+
+def test_batch_publishes_submits_together(tmp_path, monkeypatch):
+    fsyncs = _count_fsyncs(monkeypatch)
+    writer = VaultWriter()
+    with writer.batch():
+        paths = [writer.submit(tmp_path, f'NOTE_{i}.md', f'note {i}') for i in range(3)]
+        assert not any(path.exists() for path in paths)
+    assert [path.read_text() for path in paths] == ['note 0', 'note 1', 'note 2']
+    assert len(fsyncs) == 3 + 1  # each file, then the folder once
+
+
+def test_unbatched_submit_writes_immediately(tmp_path, monkeypatch):
+    fsyncs = _count_fsyncs(monkeypatch)
+    writer = VaultWriter()
+    for i in range(3):
+        assert writer.submit(tmp_path, f'NOTE_{i}.md', 'x').exists()
+    assert len(fsyncs) == 3 * 2
+
+
+def test_flush_inside_batch_and_reserved_names(tmp_path):
+    writer = VaultWriter()
+    with writer.batch():
+        first = writer.submit(tmp_path, 'NOTE.md', 'first')
+        second = writer.submit(tmp_path, 'NOTE.md', 'second')
+        assert second.name == 'NOTE_1.md'
+        writer.flush()
+        assert first.read_text() == 'first'
+        assert second.read_text() == 'second'
+
+
+def test_update_fields_is_fsynced(tmp_path, monkeypatch):
+    note = tmp_path / 'NOTE.md'
+    note.write_text(render_note({'status': 'pending'}, 'body\n'))
+    fsyncs = _count_fsyncs(monkeypatch)
+    VaultWriter().update_fields(note, {'status': 'done'}, append='more\n')
+    assert read_frontmatter(note) == {'status': 'done'}
+    assert note.read_text().endswith('body\nmore\n')
+    assert len(fsyncs) == 2
+    assert not list(tmp_path.glob('.*.tmp'))
+
+
+def test_append_rewrites_the_header_in_one_write(tmp_path, monkeypatch):
+    from frontmatter import HEADER_SLACK
+
+    note = tmp_path / 'NOTE.md'
+    note.write_text(render_note({'status': 'done', 'count': 1}, 'body\n', slack=HEADER_SLACK))
+    header_size = note.read_text().index('\n---\n') + len('\n---\n')
+    writes = []
+    real_pwrite = os.pwrite
+
+    def pwrite(fd, data, offset):
+        writes.append((len(data), offset))
+        return real_pwrite(fd, data, offset)
+
+    monkeypatch.setattr(os, 'pwrite', pwrite)
+    VaultWriter().append(note, 'more\n', {'status': 'pending', 'count': 2})
+    assert writes == [(header_size, 0)]
+    assert read_frontmatter(note) == {'status': 'pending', 'count': 2}
+    assert note.read_text().endswith('body\nmore\n')
@@ -0,0 +1,104 @@
+"""Tests for WhatsAppWatcher's message identity and per-chat cursors."""
+
+import sys
+
+import pytest
+
+from conftest import REPO_ROOT
+
+sys.path.insert(0, str(REPO_ROOT / 'benchmarks'))
+
+from fakes import FakeWhatsAppPage  # noqa: E402
+import whatsapp_watcher  # noqa: E402
+from whatsapp_watcher import WhatsAppWatcher  # noqa: E402
+
+
+@pytest.fixture
+def watcher(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    watcher = WhatsAppWatcher(str(tmp_path / 'vault'), str(tmp_path / 'session'))
+    watcher.page = FakeWhatsAppPage(chats=20, unread_ratio=0.5, latency=0)
+    yield watcher
+    watcher.audit_log.close()
+
+
+def test_relative_time_label_does_not_change_message_id(watcher):
+    first = {m['from']: m['id'] for m in watcher.check_for_updates()}
+    assert first
+
+    # A day later "10:42" reads "Yesterday": same messages, no new IDs
+    for chat in watcher.page.chats:
+        chat['container'].children[1].text = 'Yesterday'
+    assert watcher.check_for_updates() == []
+
+    watcher.page.receive(0, 'URGENT: call me')
+    again = watcher.check_for_updates()
+    assert [m['from'] for m in again] == ['Contact 0000']
+    assert again[0]['id'] != first.get('Contact 0000')
+
+
+def test_same_text_after_the_chat_was_read_is_a_new_message(watcher):
+    watcher.check_for_updates()
+    watcher.page.receive(0, 'URGENT: call me')
+    first = watcher.check_for_updates()
+    assert [m['preview'] for m in first] == ['URGENT: call me']
+
+    watcher.page.read(0)
+    assert watcher.check_for_updates() == []
+    watcher.page.receive(0, 'URGENT: call me')
+    again = watcher.check_for_updates()
+    assert [m['preview'] for m in again] == ['URGENT: call me']
+    assert again[0]['id'] != first[0]['id']
+    assert watcher.check_for_updates() == []
+
+
+def test_absolute_send_time_is_part_of_the_identity(watcher):
+    chat = {'chat': 'Ann', 'preview': 'ok', 'unread_count': 1}
+    digest = whatsapp_watcher.preview_hash('ok')
+    earlier = whatsapp_watcher.chat_cursor(dict(chat, sent_at='2026-01-01T10:00:00Z'), digest)
+    later = whatsapp_watcher.chat_cursor(dict(chat, sent_at='2026-01-02T10:00:00Z'), digest)
+    assert (whatsapp_watcher.stable_message_id('Ann', earlier)
+            != whatsapp_watcher.stable_message_id('Ann', later))
+
+
+def test_chat_cursors_are_bounded(watcher, monkeypatch):
+    monkeypatch.setattr(whatsapp_watcher, 'MAX_CHAT_CURSORS', 4)
+    watcher.check_for_updates()
+    assert len(watcher.sync_state.get('chats')) == 4
+
+    watcher.page.receive(19, 'URGENT: latest')
+    watcher.check_for_updates()
+    assert list(watcher.sync_state.get('chats'))[-1] == 'Contact 0019'
+
+
+def test_stop_before_push_loop_starts_is_not_lost(tmp_path, monkeypatch):
+    import asyncio
+    import threading
+
+    monkeypatch.chdir(tmp_path)
+    watcher = WhatsAppWatcher(str(tmp_path / 'vault'), str(tmp_path / 'session'), push=True,
+                              safety_interval=60)
+    watcher.page = FakeWhatsAppPage(chats=5, latency=0)
+
+    watcher.stop()
+    thread = threading.Thread(target=watcher.run, daemon=True)
+    thread.start()
+    thread.join(timeout=5)
+    assert not thread.is_alive()
+
+    async def stopped_at_once():
+        stop_event = asyncio.Event()
+        stop_event.set()
+        await asyncio.wait_for(watcher.run_async(stop_event), timeout=5)
+
+    asyncio.run(stopped_at_once())
+    watcher.audit_log.close()
+
+
+def test_failed_check_counts_as_a_failed_cycle(watcher):
+    def broken(*args, **kwargs):
+        raise RuntimeError('Target page, context or browser has been closed')
+
+    watcher.page.evaluate = broken
+    watcher._run_cycle()
+    assert 'has been closed' in watcher.last_cycle['error']
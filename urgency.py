@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Urgency Rules
+=============
+
+Scores message text against weighted urgency rules. All keywords and
+phrases compile into one regular expression, so a message is scanned once
+for them however many there are; each regex rule is searched on its own
+(one alternation would let a regex hide another that matches the same
+text).
+
+- ``keyword`` rules match whole words only (``help`` does not match
+  ``helpful``)
+- ``phrase`` rules match their words with any whitespace in between
+- ``regex`` rules are used as written
+- Matching ignores case. Keywords and phrases are folded into a trie-shaped
+  alternation over the lower-cased text; every branch opens with a plain
+  character, so ``re`` skips ahead to candidate positions instead of trying
+  each one. A match also credits the shorter keys it starts with, and the
+  scan resumes at the second word of a phrase, so overlapping rules all
+  count
+- Each rule counts once per message; the score is the sum of the matched
+  rules' weights, and a score at or above the threshold is high priority
+
+Rules come from, in order: a JSON file (``URGENCY_RULES``), the "Urgency
+Rules" section of the vault's ``Company_Handbook.md``, or the built-in
+keyword list.
+
+Usage:
+    matcher = load_matcher(vault_path)
+    result = matcher.score(subject, snippet)
+    result['priority'], result['score'], result['matched']
+"""
+
+import os
+import re
+import json
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger('Urgency')
+
+RULE_TYPES = ('keyword', 'phrase', 'regex')
+
+# Used when neither a rules file nor a handbook section exists: any one of
+# these words makes a message high priority
+DEFAULT_KEYWORDS = ('urgent', 'asap', 'invoice', 'payment', 'help', 'emergency', 'critical')
+DEFAULT_THRESHOLD = 1.0
+
+HANDBOOK_NAME = 'Company_Handbook.md'
+
+_HEADING = re.compile(r'^(#+)\s+(.*)$')
+_SECTION_TITLE = re.compile(r'urgency rules', re.IGNORECASE)
+_THRESHOLD_LINE = re.compile(r'high priority[^:\n]*:\**\s*([0-9]+(?:\.[0-9]+)?)', re.IGNORECASE)
+_CELL_SPLIT = re.compile(r'(?<!\\)\|')
+_SEPARATOR_CELL = re.compile(r'^:?-{3,}:?$')
+_WHITESPACE = re.compile(r'\s+')
+
+
+class UrgencyRule:
+    """One weighted keyword, phrase or regular expression."""
+
+    def __init__(self, pattern: str, kind: str = 'keyword', weight: float = 1.0, label: str = None):
+        """
+        Args:
+            pattern: The word, phrase or regular expression
+            kind: 'keyword', 'phrase' or 'regex'
+            weight: Added to the score when the rule matches
+            label: Name reported in ``matched`` (default: the pattern)
+
+        Raises:
+            ValueError: Unknown kind, empty pattern or invalid regex
+        """
+        if kind not in RULE_TYPES:
+            raise ValueError(f'Unknown urgency rule type: {kind}')
+        pattern = pattern.strip()
+        if not pattern:
+            raise ValueError('Empty urgency rule')
+        if kind == 'regex':
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                raise ValueError(f'Invalid urgency regex {pattern!r}: {e}') from None
+        self.pattern = pattern
+        self.kind = kind
+        self.weight = float(weight)
+        self.label = label or pattern
+
+    @property
+    def key(self) -> str:
+        """Lower-case, single-spaced text a keyword or phrase match normalizes to."""
+        return ' '.join(self.pattern.lower().split())
+
+    def __repr__(self) -> str:
+        return f'UrgencyRule({self.pattern!r}, {self.kind!r}, {self.weight:g})'
+
+
+def _trie_pattern(keys: Iterable[str]) -> str:
+    r"""
+    Regex alternation for a set of lower-case words/phrases, factored by
+    common prefix so the engine follows one branch per character; a space
+    stands for any run of whitespace. The word-start check comes after the
+    first character (``(?<!\w.)``) so that every branch begins with a literal.
+    """
+    trie: Dict = {}
+    for key in keys:
+        node = trie
+        for ch in key:
+            node = node.setdefault(ch, {})
+        node[''] = {}
+
+    def emit(node: Dict, first: bool = False) -> str:
+        branches = [(r'\s+' if ch == ' ' else re.escape(ch)) + (r'(?<!\w.)' if first else '') + emit(child)
+                    for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if '' in node:
+            # A key ends here; longer keys are tried first
+            return f'(?:{body})?'
+        return body
+
+    return emit(trie, first=True)
+
+
+class UrgencyMatcher:
+    """A compiled rule set that scores text."""
+
+    def __init__(self, rules: List[UrgencyRule], threshold: float = DEFAULT_THRESHOLD,
+                 source: str = 'built-in'):
+        """
+        Args:
+            rules: Rules to compile
+            threshold: Score at which text is high priority
+            source: Where the rules came from (for logs)
+        """
+        self.rules = list(rules)
+        self.threshold = float(threshold)
+        self.source = source
+
+        # Keywords and phrases: one trie over lower-cased text, resolved by the
+        # matched text to its rule and the rules of the keys it starts with
+        # (the trie only reports the longest)
+        literals: Dict[str, UrgencyRule] = {}
+        for rule in self.rules:
+            if rule.kind != 'regex':
+                literals.setdefault(rule.key, rule)
+        self._literals: Dict[str, List[UrgencyRule]] = {}
+        for key in literals:
+            words = key.split(' ')
+            prefixes = (' '.join(words[:n]) for n in range(1, len(words) + 1))
+            self._literals[key] = [literals[prefix] for prefix in prefixes if prefix in literals]
+        self._literal_pattern = None
+        if literals:
+            self._literal_pattern = re.compile(f'(?:{_trie_pattern(literals)})' + r'(?!\w)')
+
+        # Regex rules: compiled one by one and matched against the original text
+        self._regexes = [(re.compile(rule.pattern, re.IGNORECASE), rule)
+                         for rule in self.rules if rule.kind == 'regex']
+
+    def score(self, *texts: Optional[str]) -> Dict:
+        """
+        Score one message.
+
+        Args:
+            *texts: Parts of the message (e.g. subject and snippet); None is skipped
+
+        Returns:
+            Dict with score, priority ('high' or 'normal') and matched
+            (labels of the rules that matched: keywords and phrases in order
+            of appearance, then regexes)
+        """
+        matched: Dict[str, float] = {}
+        text = '\n'.join(t for t in texts if t)
+        if self._literal_pattern is not None:
+            lowered, position = text.lower(), 0
+            search = self._literal_pattern.search
+            while True:
+                match = search(lowered, position)
+                if match is None:
+                    break
+                for rule in self._literals[' '.join(match.group().split())]:
+                    matched.setdefault(rule.label, rule.weight)
+                # Another key may start inside a phrase: carry on from its second word
+                gap = _WHITESPACE.search(lowered, match.start(), match.end())
+                position = gap.end() if gap else match.end()
+        for regex, rule in self._regexes:
+            if rule.label not in matched and regex.search(text):
+                matched[rule.label] = rule.weight
+        total = sum(matched.values())
+        if float(total).is_integer():
+            total = int(total)
+        return {
+            'score': total,
+            'priority': 'high' if matched and total >= self.threshold else 'normal',
+            'matched': list(matched),
+        }
+
+    def is_urgent(self, *texts: Optional[str]) -> bool:
+        return self.score(*texts)['priority'] == 'high'
+
+
+def default_matcher() -> UrgencyMatcher:
+    """The built-in keyword list (any keyword is urgent)."""
+    return UrgencyMatcher([UrgencyRule(kw) for kw in DEFAULT_KEYWORDS], DEFAULT_THRESHOLD)
+
+
+def load_rules_file(path: Path) -> UrgencyMatcher:
+    """
+    Load rules from JSON::
+
+        {"threshold": 2,
+         "rules": [{"pattern": "urgent", "type": "keyword", "weight": 3}, ...]}
+
+    Raises:
+        ValueError: Unreadable file or invalid rule
+    """
+    path = Path(path)
+    try:
+        config = json.loads(path.read_text(encoding='utf-8'))
+    except (OSError, ValueError) as e:
+        raise ValueError(f'Cannot read urgency rules {path}: {e}') from None
+    rules = [UrgencyRule(entry['pattern'], entry.get('type', 'keyword'), entry.get('weight', 1),
+                         entry.get('label'))
+             for entry in config.get('rules', [])]
+    return UrgencyMatcher(rules, config.get('threshold', DEFAULT_THRESHOLD), source=str(path))
+
+
+def _table_cells(line: str) -> List[str]:
+    cells = _CELL_SPLIT.split(line.strip().strip('|'))
+    return [cell.strip().replace('\\|', '|') for cell in cells]
+
+
+def parse_handbook(text: str, source: str = HANDBOOK_NAME) -> Optional[UrgencyMatcher]:
+    """
+    Read the "Urgency Rules" section of the handbook: a table with Rule,
+    Type, Weight and optional Label columns (regexes in backticks, ``|``
+    written ``\\|``) and a "High priority at score: N" line.
+
+    Returns:
+        The matcher, or None if the handbook has no such section
+    """
+    lines = text.splitlines()
+    start = level = None
+    for i, line in enumerate(lines):
+        heading = _HEADING.match(line)
+        if heading and _SECTION_TITLE.search(heading.group(2)):
+            start, level = i + 1, len(heading.group(1))
+            break
+    if start is None:
+        return None
+
+    rules, columns, threshold = [], None, DEFAULT_THRESHOLD
+    for line in lines[start:]:
+        heading = _HEADING.match(line)
+        if heading and len(heading.group(1)) <= level:
+            break
+        found = _THRESHOLD_LINE.search(line)
+        if found:
+            threshold = float(found.group(1))
+            continue
+        if not line.lstrip().startswith('|'):
+            continue
+        cells = _table_cells(line)
+        if all(_SEPARATOR_CELL.match(cell) for cell in cells if cell):
+            continue
+        if columns is None:
+            columns = [cell.lower() for cell in cells]
+            continue
+        row = dict(zip(columns, cells))
+        pattern = (row.get('rule') or row.get('pattern') or '').strip('`')
+        try:
+            rules.append(UrgencyRule(pattern, (row.get('type') or 'keyword').lower(),
+                                     float(row.get('weight') or 1), row.get('label') or None))
+        except ValueError as e:
+            logger.warning(f'Skipping urgency rule in {source}: {e}')
+    return UrgencyMatcher(rules, threshold, source=source)
+
+
+def load_matcher(vault_path: str = None, rules_path: str = None) -> UrgencyMatcher:
+    """
+    Rules for a vault: ``rules_path`` (default $URGENCY_RULES) if set, else
+    the handbook's "Urgency Rules" section, else the built-in keywords.
+    """
+    rules_path = rules_path or os.getenv('URGENCY_RULES')
+    if rules_path:
+        matcher = load_rules_file(Path(rules_path))
+    else:
+        matcher = None
+        handbook = Path(vault_path) / HANDBOOK_NAME if vault_path else None
+        if handbook is not None and handbook.exists():
+            matcher = parse_handbook(handbook.read_text(encoding='utf-8'), source=str(handbook))
+        matcher = matcher or default_matcher()
+    logger.debug(f'{len(matcher.rules)} urgency rules from {matcher.source}, high at {matcher.threshold:g}')
+    return matcher
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Vault Index
+===========
+
+Incremental SQLite index of every note in the Obsidian vault.
+
+Each ``*.md`` note's path, folder, mtime, size and frontmatter are kept in
+``<vault>/.vault_index.sqlite3``. The index is brought up to date by an
+mtime/size diff (``sync``), which only re-reads notes that changed, and can
+then be kept live with watchdog events (``start_watching``). The first
+query syncs an index nobody has synced yet. Components query it instead of
+globbing and re-parsing folders:
+
+    index = VaultIndex('./AI_Employee_Vault')
+    index.query(type='email', status='pending', priority='high')
+
+Usage:
+    python vault_index.py --vault ./AI_Employee_Vault --type linkedin_post --folder Pending_Approval
+    python vault_index.py --vault ./AI_Employee_Vault --priority high --since 2026-02-01
+"""
+
+import os
+import json
+import sqlite3
+import logging
+import argparse
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from frontmatter import read_frontmatter
+
+logger = logging.getLogger('VaultIndex')
+
+DB_FILENAME = '.vault_index.sqlite3'
+
+# Frontmatter keys tried, in order, for a note's date
+DATE_KEYS = ('created', 'received', 'detected', 'date')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS notes (
+    path        TEXT PRIMARY KEY,
+    folder      TEXT NOT NULL,
+    name        TEXT NOT NULL,
+    mtime       REAL NOT NULL,
+    size        INTEGER NOT NULL,
+    type        TEXT,
+    status      TEXT,
+    priority    TEXT,
+    date        TEXT,
+    frontmatter TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS notes_type ON notes(type, status);
+CREATE INDEX IF NOT EXISTS notes_priority ON notes(priority);
+CREATE INDEX IF NOT EXISTS notes_folder ON notes(folder);
+CREATE INDEX IF NOT EXISTS notes_date ON notes(date);
+'''
+
+UPSERT = 'INSERT OR REPLACE INTO notes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)'
+
+
+class VaultIndex:
+    """
+    SQLite-backed metadata index of the vault's notes.
+
+    Provides:
+    - Startup sync by mtime/size diff (only changed notes are re-read)
+    - Live updates from watchdog events
+    - Queries by type, status, priority, folder and date
+    """
+
+    def __init__(self, vault_path: str, db_path: str = None):
+        """
+        Open (or create) the index.
+
+        Args:
+            vault_path: Path to Obsidian vault
+            db_path: SQLite file (default: <vault>/.vault_index.sqlite3)
+        """
+        self.vault_path = Path(vault_path).resolve()
+        self.db_path = Path(db_path) if db_path else self.vault_path / DB_FILENAME
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+        self._observer = None
+        self._synced = False
+
+    # ------------------------------------------------------------ maintenance
+
+    def _rel(self, path: Path) -> str:
+        return Path(path).resolve().relative_to(self.vault_path).as_posix()
+
+    def _iter_notes(self):
+        """Yield (absolute path, stat) for every note, skipping hidden folders."""
+        stack = [str(self.vault_path)]
+        while stack:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.name.startswith('.'):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.name.endswith('.md') and entry.is_file():
+                        yield entry.path, entry.stat()
+
+    def sync(self) -> Dict[str, int]:
+        """
+        Bring the index up to date with the vault by mtime/size diff.
+
+        Returns:
+            Counts of added, updated and removed notes
+        """
+        with self._lock:
+            known = {row['path']: (row['mtime'], row['size'])
+                     for row in self._conn.execute('SELECT path, mtime, size FROM notes')}
+        added = updated = 0
+        seen = set()
+        rows = []
+        for full_path, stat in self._iter_notes():
+            rel = self._rel(full_path)
+            seen.add(rel)
+            previous = known.get(rel)
+            if previous == (stat.st_mtime, stat.st_size):
+                continue
+            row = self._row(Path(full_path), rel, stat)
+            if row:
+                rows.append(row)
+                if previous is None:
+                    added += 1
+                else:
+                    updated += 1
+        removed = [path for path in known if path not in seen]
+        with self._lock, self._conn:
+            self._conn.executemany(UPSERT, rows)
+            self._conn.executemany('DELETE FROM notes WHERE path = ?', ((p,) for p in removed))
+        self._synced = True
+        if added or updated or removed:
+            logger.info(f'Index sync: +{added} ~{updated} -{len(removed)}')
+        return {'added': added, 'updated': updated, 'removed': len(removed)}
+
+    def update_path(self, path: Path) -> bool:
+        """Re-index a single note (no-op for non-notes)."""
+        path = Path(path)
+        if path.suffix != '.md':
+            return False
+        rel = self._rel(path)
+        if any(part.startswith('.') for part in rel.split('/')):
+            return False
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            self.remove_path(path)
+            return False
+        row = self._row(path, rel, stat)
+        if row:
+            with self._lock, self._conn:
+                self._conn.execute(UPSERT, row)
+        return row is not None
+
+    def remove_path(self, path: Path):
+        """Drop a note from the index."""
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM notes WHERE path = ?', (self._rel(path),))
+
+    def _row(self, path: Path, rel: str, stat) -> Optional[tuple]:
+        """Build the notes row for a file (None if it can't be read)."""
+        try:
+            fields = read_frontmatter(path)
+        except OSError as e:
+            logger.warning(f'Could not index {rel}: {e}')
+            return None
+        date = next((str(fields[k]) for k in DATE_KEYS if fields.get(k)), None)
+        if not date:
+            date = datetime.utcfromtimestamp(stat.st_mtime).isoformat() + 'Z'
+        folder = rel.rsplit('/', 1)[0] if '/' in rel else ''
+        column = lambda key: str(fields[key]) if fields.get(key) is not None else None
+        return (rel, folder, Path(rel).name, stat.st_mtime, stat.st_size,
+                column('type'), column('status'), column('priority'), date,
+                json.dumps(fields, ensure_ascii=False, default=str))
+
+    # ----------------------------------------------------------------- watch
+
+    def start_watching(self):
+        """Keep the index live from watchdog events (after an initial sync)."""
+        from watchdog.observers import Observer
+        from watchdog.events import FileSystemEventHandler
+
+        index = self
+
+        class _Handler(FileSystemEventHandler):
+            def on_created(self, event):
+                if not event.is_directory:
+                    index.update_path(Path(event.src_path))
+
+            on_modified = on_created
+
+            def on_deleted(self, event):
+                if not event.is_directory:
+                    index.remove_path(Path(event.src_path))
+
+            def on_moved(self, event):
+                if not event.is_directory:
+                    index.remove_path(Path(event.src_path))
+                    index.update_path(Path(event.dest_path))
+
+        self.sync()
+        self._observer = Observer()
+        self._observer.schedule(_Handler(), str(self.vault_path), recursive=True)
+        self._observer.start()
+        logger.info(f'Watching {self.vault_path} for index updates')
+
+    @property
+    def watching(self) -> bool:
+        return self._observer is not None
+
+    def refresh(self):
+        """Make the index current: a no-op while watching, otherwise an mtime sync."""
+        if not self.watching:
+            self.sync()
+
+    def close(self):
+        if self._observer:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+        with self._lock:
+            self._conn.close()
+
+    # ----------------------------------------------------------------- query
+
+    def _ensure_synced(self):
+        if not self._synced:
+            self.sync()
+
+    def _where(self, type: str = None, status: str = None, priority: str = None,
+               folder: str = None, since: str = None, until: str = None,
+               name_prefix: str = None):
+        """SQL WHERE clause (or '') and parameters for the ``query`` filters."""
+        clauses, params = [], []
+        for column, value in (('type', type), ('status', status),
+                              ('priority', priority), ('folder', folder)):
+            if value is not None:
+                clauses.append(f'{column} = ?')
+                params.append(value)
+        if since:
+            clauses.append('date >= ?')
+            params.append(since)
+        if until:
+            clauses.append('date < ?')
+            params.append(until)
+        if name_prefix:
+            clauses.append("name LIKE ? ESCAPE '\\'")
+            params.append(name_prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%')
+        return (' WHERE ' + ' AND '.join(clauses) if clauses else ''), params
+
+    def query(self, type: str = None, status: str = None, priority: str = None,
+              folder: str = None, since: str = None, until: str = None,
+              name_prefix: str = None, limit: int = None) -> List[Dict]:
+        """
+        Find notes by metadata.
+
+        Args:
+            type: Frontmatter ``type`` (e.g. 'email', 'linkedin_post')
+            status: Frontmatter ``status`` (e.g. 'pending')
+            priority: Frontmatter ``priority`` (e.g. 'high')
+            folder: Vault-relative folder (e.g. 'Needs_Action')
+            since: Only notes dated on/after this ISO date
+            until: Only notes dated before this ISO date
+            name_prefix: Only files whose name starts with this (e.g. 'LINKEDIN_')
+            limit: Maximum rows
+
+        Returns:
+            List of dicts with path (absolute Path), folder, name, mtime, size,
+            date and the parsed frontmatter
+        """
+        self._ensure_synced()
+        where, params = self._where(type, status, priority, folder, since, until, name_prefix)
+        sql = 'SELECT * FROM notes' + where + ' ORDER BY date, path'
+        if limit:
+            sql += f' LIMIT {int(limit)}'
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [{
+            'path': self.vault_path / row['path'],
+            'folder': row['folder'],
+            'name': row['name'],
+            'mtime': row['mtime'],
+            'size': row['size'],
+            'date': row['date'],
+            'frontmatter': json.loads(row['frontmatter']),
+        } for row in rows]
+
+    def count(self, **filters) -> int:
+        """Number of notes matching ``query`` filters (except ``limit``)."""
+        self._ensure_synced()
+        where, params = self._where(**filters)
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM notes' + where, params).fetchone()[0]
+
+
+_shared_indexes: Dict[str, VaultIndex] = {}
+_shared_lock = threading.Lock()
+
+
+def get_vault_index(vault_path: str) -> VaultIndex:
+    """Return the process-wide VaultIndex for a vault (synced by its first query)."""
+    key = str(Path(vault_path).resolve())
+    with _shared_lock:
+        index = _shared_indexes.get(key)
+        if index is None:
+            index = VaultIndex(vault_path)
+            _shared_indexes[key] = index
+        return index
+
+
+def main():
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(description='Query the AI Employee vault index')
+    parser.add_argument('--vault', required=True, help='Path to Obsidian vault')
+    parser.add_argument('--type', default=None, help='Frontmatter type')
+    parser.add_argument('--status', default=None, help='Frontmatter status')
+    parser.add_argument('--priority', default=None, help='Frontmatter priority')
+    parser.add_argument('--folder', default=None, help='Vault folder (e.g. Needs_Action)')
+    parser.add_argument('--since', default=None, help='Only notes dated on/after this ISO date')
+    parser.add_argument('--until', default=None, help='Only notes dated before this ISO date')
+    parser.add_argument('--limit', type=int, default=None, help='Maximum results')
+
+    args = parser.parse_args()
+
+    index = VaultIndex(args.vault)
+    stats = index.sync()
+    print(f'✅ Index synced (+{stats["added"]} ~{stats["updated"]} -{stats["removed"]})')
+
+    notes = index.query(type=args.type, status=args.status, priority=args.priority,
+                        folder=args.folder, since=args.since, until=args.until, limit=args.limit)
+    for note in notes:
+        fm = note['frontmatter']
+        print(f'   {note["date"][:19]}  {fm.get("priority", "-"):8} {fm.get("status", "-"):18} '
+              f'{note["folder"]}/{note["name"]}')
+    print(f'{len(notes)} notes')
+    index.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+Vault Writer
+============
+
+Atomic, batched file writer for the Obsidian vault.
+
+Every file is written to a hidden temp file in the target folder and then
+linked/renamed into place, so a consumer watching ``Needs_Action`` never
+sees a half-written note. Name collisions get a ``_1``, ``_2``... suffix
+instead of overwriting. Writes are grouped into batches: all temp files are
+written, then fsynced together, then published, then each touched folder is
+fsynced once.
+
+In background mode writes are queued (bounded) and performed by a writer
+thread, so a watcher's polling loop is not blocked on disk. Otherwise
+``batch()`` groups the submits of a block (a poll cycle) into one batch,
+written when the block ends.
+
+``update_fields`` rewrites the frontmatter of an existing note (and
+appends to it) with the same temp file + rename and fsyncs; ``append``
+adds to the end of a note and updates its header in place, without
+copying the body.
+
+Usage:
+    writer = VaultWriter()
+    path = writer.write(vault / 'Needs_Action', 'EMAIL_123.md', content)
+
+    with writer.batch():
+        for note in notes:
+            writer.submit(vault / 'Needs_Action', note.name, note.text)
+
+    writer = VaultWriter(background=True)
+    path = writer.submit(vault / 'Needs_Action', 'EMAIL_123.md', content)
+    writer.flush()
+"""
+
+import os
+import queue
+import atexit
+import shutil
+import logging
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple, Union
+
+from frontmatter import HEADER_SLACK, append_note, update_fields
+
+logger = logging.getLogger('VaultWriter')
+
+Content = Union[str, bytes]
+
+
+class _WriteRequest:
+    """One pending write (content, or a source file to copy)."""
+
+    def __init__(self, folder: Path, filename: str, content: Content = None,
+                 source: Path = None):
+        self.folder = Path(folder)
+        self.filename = filename
+        self.content = content
+        self.source = source
+        self.future = Future()
+        self.tmp_path = None
+
+
+class VaultWriter:
+    """
+    Write vault files atomically, in batches, optionally off-thread.
+
+    Provides:
+    - Temp file + rename publishing (no partial reads)
+    - Collision-safe filenames (never overwrites an existing note)
+    - One fsync pass and one directory fsync per batch
+    - Optional background thread fed by a bounded queue, or explicit
+      batches (``batch()``) on the calling thread
+    """
+
+    def __init__(self, background: bool = False, max_queue: int = 1000,
+                 batch_size: int = 100, fsync: bool = True):
+        """
+        Initialize the writer.
+
+        Args:
+            background: Perform writes on a background thread
+            max_queue: Bound on queued writes; submit() blocks when full
+            batch_size: Maximum writes grouped into one batch
+            fsync: Fsync files and folders before reporting success
+        """
+        self.background = background
+        self.batch_size = batch_size
+        self.fsync = fsync
+
+        self._reserved = set()
+        self._reserve_lock = threading.Lock()
+        self._append_lock = threading.Lock()  # one in-place header rewrite at a time
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._local = threading.local()  # .pending: requests of an open batch()
+        self._thread = None
+        self._closed = False
+
+        if background:
+            self._thread = threading.Thread(target=self._writer_loop, name='VaultWriter', daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    # ------------------------------------------------------------ public API
+
+    def write(self, folder: Path, filename: str, content: Content) -> Path:
+        """
+        Write one file synchronously.
+
+        Returns:
+            Final path (may carry a collision suffix)
+        """
+        request = _WriteRequest(folder, filename, content=content)
+        self._write_batch([request])
+        return request.future.result()
+
+    def write_many(self, items: List[Tuple[Path, str, Content]]) -> List[Path]:
+        """Write several files synchronously as a single batch."""
+        requests = [_WriteRequest(folder, name, content=content) for folder, name, content in items]
+        for start in range(0, len(requests), self.batch_size):
+            self._write_batch(requests[start:start + self.batch_size])
+        return [r.future.result() for r in requests]
+
+    def copy_file(self, source: Path, folder: Path, filename: str = None) -> Path:
+        """Atomically copy ``source`` into ``folder`` (streamed, not read into memory)."""
+        request = _WriteRequest(folder, filename or Path(source).name, source=Path(source))
+        if self.background:
+            self._enqueue(request)
+        else:
+            self._write_batch([request])
+        return request.future.result()
+
+    def submit(self, folder: Path, filename: str, content: Content) -> Path:
+        """
+        Queue a write and return the path it will be published at.
+
+        The name is reserved immediately; in the rare case another process
+        claims it first the file gets the next free suffix (see the request's
+        future / the log). Inside ``batch()`` the write waits for the end of
+        the block; otherwise, when not in background mode, it is written
+        synchronously.
+        """
+        pending = getattr(self._local, 'pending', None)
+        if not self.background and pending is None:
+            return self.write(folder, filename, content)
+        request = _WriteRequest(folder, filename, content=content)
+        request.filename = self._reserve(request.folder, filename)
+        if pending is not None:
+            pending.append(request)
+            if len(pending) >= self.batch_size:
+                self._write_pending()
+        else:
+            self._enqueue(request)
+        return request.folder / request.filename
+
+    @contextmanager
+    def batch(self):
+        """
+        Group the submit() calls made on this thread inside the block into
+        one batch (one fsync pass, one fsync per folder), written when the
+        block exits. Nested blocks join the outer one; in background mode
+        the writer thread batches already and this does nothing.
+        """
+        if self.background or getattr(self._local, 'pending', None) is not None:
+            yield
+            return
+        self._local.pending = []
+        try:
+            yield
+        finally:
+            try:
+                self._write_pending()
+            finally:
+                self._local.pending = None
+
+    def update_fields(self, path: Path, updates: Dict[str, Any], remove: Iterable[str] = (),
+                      dest: Path = None, append: str = '', slack: int = 0) -> Path:
+        """
+        ``frontmatter.update_fields`` made durable: the rewritten note is
+        fsynced before it replaces the old one, then its folder is fsynced.
+
+        Returns:
+            The path written
+        """
+        written = update_fields(path, updates, remove, dest=dest, append=append, fsync=self.fsync,
+                                slack=slack)
+        if self.fsync:
+            self._fsync_dir(written.parent)
+        return written
+
+    def append(self, path: Path, text: str, updates: Dict[str, Any] = None,
+               remove: Iterable[str] = ()) -> Path:
+        """
+        Append ``text`` to a note and apply frontmatter changes in place
+        (``frontmatter.append_note``, fsynced; the header is replaced by
+        one write of the whole block). A header that has outgrown its
+        padding is rewritten once through ``update_fields``, with at least
+        HEADER_SLACK bytes of fresh room. Appends through this writer run
+        one at a time.
+
+        Returns:
+            The note's path
+        """
+        with self._append_lock:
+            if append_note(path, text, updates, remove, fsync=self.fsync):
+                return Path(path)
+            return self.update_fields(path, updates or {}, remove, append=text, slack=HEADER_SLACK)
+
+    def flush(self):
+        """Block until every queued (or batched) write has been published."""
+        self._write_pending()
+        if self.background:
+            self._queue.join()
+
+    def close(self):
+        """Flush and stop the background thread."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    # -------------------------------------------------------------- internals
+
+    def _write_pending(self):
+        """Write the requests of this thread's open batch() so far."""
+        pending = getattr(self._local, 'pending', None)
+        if not pending:
+            return
+        requests = list(pending)
+        pending.clear()
+        for start in range(0, len(requests), self.batch_size):
+            self._write_batch(requests[start:start + self.batch_size])
+
+    def _enqueue(self, request: _WriteRequest):
+        if self._closed:
+            raise RuntimeError('Vault writer is closed')
+        self._queue.put(request)
+
+    def _reserve(self, folder: Path, filename: str) -> str:
+        """Pick a name that neither exists on disk nor is queued."""
+        stem, suffix = os.path.splitext(filename)
+        with self._reserve_lock:
+            candidate, n = filename, 0
+            while (folder / candidate) in self._reserved or (folder / candidate).exists():
+                n += 1
+                candidate = f'{stem}_{n}{suffix}'
+            self._reserved.add(folder / candidate)
+        return candidate
+
+    def _release(self, path: Path):
+        with self._reserve_lock:
+            self._reserved.discard(path)
+
+    def _writer_loop(self):
+        while True:
+            request = self._queue.get()
+            if request is None:
+                self._queue.task_done()
+                return
+            batch = [request]
+            stop = False
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            try:
+                self._write_batch(batch)
+            finally:
+                for _ in range(len(batch) + stop):
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def _write_batch(self, batch: List[_WriteRequest]):
+        """Write temps, fsync them together, publish, then fsync each folder once."""
+        pending = []
+        for request in batch:
+            try:
+                request.folder.mkdir(parents=True, exist_ok=True)
+                request.tmp_path = request.folder / f'.{request.filename}.{os.getpid()}.{id(request)}.tmp'
+                if request.source is not None:
+                    shutil.copy2(request.source, request.tmp_path)
+                else:
+                    data = request.content.encode('utf-8') if isinstance(request.content, str) else request.content
+                    with open(request.tmp_path, 'wb') as f:
+                        f.write(data)
+                pending.append(request)
+            except Exception as e:
+                self._fail(request, e)
+
+        if self.fsync:
+            for request in list(pending):
+                try:
+                    fd = os.open(str(request.tmp_path), os.O_RDONLY)
+                    try:
+                        os.fsync(fd)
+                    finally:
+                        os.close(fd)
+                except OSError as e:
+                    pending.remove(request)
+                    self._fail(request, e)
+
+        folders = set()
+        for request in pending:
+            try:
+                final = self._publish(request)
+                folders.add(request.folder)
+                request.future.set_result(final)
+            except Exception as e:
+                self._fail(request, e)
+            finally:
+                self._release(request.folder / request.filename)
+
+        if self.fsync:
+            for folder in folders:
+                self._fsync_dir(folder)
+
+    def _publish(self, request: _WriteRequest) -> Path:
+        """Move the temp file to a free name without ever clobbering an existing file."""
+        stem, suffix = os.path.splitext(request.filename)
+        n = 0
+        while True:
+            name = request.filename if n == 0 else f'{stem}_{n}{suffix}'
+            dest = request.folder / name
+            try:
+                os.link(request.tmp_path, dest)
+                os.unlink(request.tmp_path)
+            except FileExistsError:
+                n += 1
+                continue
+            except (AttributeError, NotImplementedError, OSError):
+                # Filesystems without hard links: best-effort check-then-rename
+                if dest.exists():
+                    n += 1
+                    continue
+                os.replace(request.tmp_path, dest)
+            if n:
+                logger.info(f'{request.filename} already existed; wrote {name}')
+            return dest
+
+    def _fail(self, request: _WriteRequest, error: Exception):
+        logger.error(f'Failed to write {request.filename}: {error}')
+        if request.tmp_path is not None:
+            try:
+                request.tmp_path.unlink()
+            except OSError:
+                pass
+        self._release(request.folder / request.filename)
+        if not request.future.done():
+            request.future.set_exception(error)
+
+    @staticmethod
+    def _fsync_dir(folder: Path):
+        if os.name == 'nt':
+            return
+        try:
+            fd = os.open(str(folder), os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        except OSError as e:
+            logger.warning(f'Could not fsync {folder}: {e}')
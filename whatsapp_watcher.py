@@ -5,65 +5,163 @@ WhatsApp Watcher - Monitor WhatsApp Web for urgent messages.
 This script:
 1. Connects to WhatsApp Web via Playwright browser automation
 2. Monitors for new unread messages
-3. Filters by keywords (urgent, asap, invoice, payment, help)
+3. Scores previews against the urgency rules (urgency.py)
 4. Creates markdown files in Needs_Action/ for each message
-5. Maintains browser session for continuous monitoring
+5. Maintains browser session for continuous monitoring, in a lean headless
+   Chromium once logged in (browser_profile.py)
+6. Optionally reacts to chat-list changes as they happen (--push): an
+   in-page MutationObserver reports them through a Playwright binding,
+   with a slow poll kept as a safety net
 
 Setup:
 1. Install playwright: pip install playwright
 2. Run: python3 -m playwright install
 3. Create .env with WHATSAPP_SESSION_PATH
-4. First run will open browser for manual QR code scan
+4. First run (--setup) opens a visible browser for manual QR code scan
 5. Session saved for future automated runs
 
 Usage:
 python whatsapp_watcher.py --vault ./AI_Employee_Vault --demo
 python whatsapp_watcher.py --vault ./AI_Employee_Vault  # Run continuously
+python whatsapp_watcher.py --vault ./AI_Employee_Vault --push  # Event-driven
 
 """
 
 import os
 import sys
 import json
+import time
+import hashlib
 import argparse
 import logging
 from datetime import datetime
 from pathlib import Path
 from typing import List, Dict, Optional
-from base_watcher import BaseWatcher
-
-# Playwright imports
-try:
-    from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
-except ImportError:
-    print("ERROR: Playwright not installed.")
-    print("Install with: pip install playwright")
-    print("Then run: python3 -m playwright install")
-    sys.exit(1)
-
-# Load environment
-from dotenv import load_dotenv
-load_dotenv()
-
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('whatsapp_watcher.log'),
-        logging.StreamHandler()
-    ]
-)
+from base_watcher import BaseWatcher, configure_logging, load_environment
+from scheduling import SchedulePolicy, AdaptiveInterval, FixedInterval
+from frontmatter import render_note
+from metrics import start_metrics_export
+from urgency import UrgencyMatcher, load_matcher
+from browser_profile import BrowserProfile
+
 logger = logging.getLogger('WhatsAppWatcher')
 
+PLAYWRIGHT_INSTALL_HINT = 'Install with: pip install playwright && python3 -m playwright install'
+
+# Chat-list selectors, shared by both extraction paths
+CHAT_LIST_SELECTORS = {
+    'item': '[data-testid="chat-list-item-container"]',
+    'name': '[data-testid="chat-name"]',
+    'preview': '[data-testid="conversation-message-preview"]',
+    'badge': '[data-testid="unread-badge"]',
+    'time': '[data-testid="cell-frame-primary-detail"]',
+}
+
+WHATSAPP_URL = 'https://web.whatsapp.com'
+CHAT_LIST_CONTAINER = '[data-testid="chat-list"]'
+
+# bulk: one page.evaluate per cycle; elements: a DOM round trip per field
+EXTRACTION_MODES = ('bulk', 'elements')
+
+# Runs in the page: one compact row per chat, in a single round trip
+CHAT_LIST_SCRIPT = """
+({item, name, preview, badge, time, unreadOnly}) => {
+  const rows = [];
+  for (const el of document.querySelectorAll(item)) {
+    const badgeEl = el.querySelector(badge);
+    if (unreadOnly && !badgeEl) continue;
+    const nameEl = el.querySelector(name);
+    if (!nameEl) continue;
+    const previewEl = el.querySelector(preview);
+    const timeEl = el.querySelector(time);
+    rows.push({
+      chat: nameEl.textContent.trim(),
+      preview: previewEl ? previewEl.textContent : null,
+      unread_count: badgeEl ? (parseInt(badgeEl.textContent, 10) || 1) : 0,
+      last_ts: timeEl ? timeEl.textContent.trim() : null,
+      sent_at: timeEl ? timeEl.getAttribute('datetime') : null,
+    });
+  }
+  return rows;
+}
+"""
+
+# Per-chat cursors kept in .state/whatsapp.json; the chats changed longest
+# ago are dropped beyond this (the dedup store still knows their messages)
+MAX_CHAT_CURSORS = 1000
+
+# Push mode: chat-list changes wake the watcher (changes within the
+# coalescing window share one check); a slow poll reconciles anything missed
+DEFAULT_SAFETY_INTERVAL = 300
+DEFAULT_PUSH_COALESCE = 0.25
+PUSH_BINDING = 'aiEmployeeChatListChanged'
+
+# Playwright's sync API only delivers binding calls while the thread is
+# inside a Playwright call, so waits in push mode pump the page this often
+PUMP_INTERVAL_MS = 100
+
+# Installs the observer after a page load, and again when WhatsApp has
+# re-rendered the chat list (the observed node is replaced or detached);
+# returns true if it was (re)installed
+PUSH_OBSERVER_SCRIPT = """
+({container, binding}) => {
+  const target = document.querySelector(container) || document.body;
+  const current = window.__aiEmployeeObserver;
+  if (current && current.target === target && target.isConnected) return false;
+  if (current) current.observer.disconnect();
+  const observer = new MutationObserver(records => window[binding](records.length));
+  observer.observe(target, {childList: true, subtree: true, characterData: true});
+  window.__aiEmployeeObserver = {observer, target};
+  return true;
+}
+"""
+
+
+def preview_hash(text: str) -> str:
+    """Short digest of a message preview."""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def chat_cursor(chat: Dict, preview_digest: str) -> Dict:
+    """
+    What identifies the latest message in a chat-list row: its preview
+    digest, the unread count and the absolute send time if the page gives
+    one (WhatsApp Web usually does not). The displayed time is left out: it
+    is relative ("10:42", then "Yesterday", then a date) and changes while
+    the message does not.
+    """
+    return {'preview': preview_digest, 'unread': chat.get('unread_count') or 0,
+            'sent_at': chat.get('sent_at')}
+
+
+def same_message(stored: Dict, cursor: Dict) -> bool:
+    """True if a stored cursor (which also carries ``seq``) matches ``cursor``."""
+    return all(stored.get(key) == value for key, value in cursor.items())
+
+
+def stable_message_id(chat: str, cursor: Dict) -> str:
+    """
+    ID of the latest message in a chat: the chat's arrival sequence number
+    (``seq``, bumped every time its cursor changes) plus the message's
+    ``chat_cursor``. The same message seen again in a later cycle, or on a
+    later day, keeps its ID; the same text arriving again after the chat
+    was read gets a new one.
+    """
+    key = (f'{chat}\x1f{cursor.get("seq", 0)}\x1f{cursor["preview"]}\x1f{cursor["unread"]}'
+           f'\x1f{cursor["sent_at"] or ""}')
+    return 'whatsapp_' + hashlib.blake2b(key.encode('utf-8'), digest_size=10).hexdigest()
+
 
 class WhatsAppWatcher(BaseWatcher):
     """Monitor WhatsApp Web for urgent messages."""
 
-    # Keywords that trigger action items
-    URGENT_KEYWORDS = ['urgent', 'asap', 'invoice', 'payment', 'help', 'emergency', 'critical']
+    # Playwright's sync API must be driven from the thread that started it
+    thread_affine = True
 
-    def __init__(self, vault_path: str, session_path: str = None, check_interval: int = 30):
+    def __init__(self, vault_path: str, session_path: str = None, check_interval: int = 30,
+                 schedule: SchedulePolicy = None, extraction: str = None, push: bool = None,
+                 safety_interval: float = None, push_coalesce: float = None, url: str = None,
+                 urgency: UrgencyMatcher = None, profile: BrowserProfile = None, dry_run: bool = False):
         """
         Initialize WhatsApp watcher.
 
@@ -71,48 +169,94 @@ class WhatsAppWatcher(BaseWatcher):
             vault_path: Path to Obsidian vault
             session_path: Path to store browser session (default: ./whatsapp_session)
             check_interval: Seconds between checks (default 30)
+            schedule: Polling policy (default: fixed check_interval)
+            extraction: 'bulk' (read the chat list with one in-page script)
+                or 'elements' (one DOM round trip per field); default
+                $WHATSAPP_EXTRACTION, else 'bulk'
+            push: Check when the chat list changes instead of every
+                check_interval; default $WHATSAPP_PUSH, else off
+            safety_interval: Seconds between reconciliation polls in push
+                mode; default $WHATSAPP_SAFETY_INTERVAL, else 300
+            push_coalesce: Chat-list changes within this many seconds
+                share one check; default $WHATSAPP_PUSH_COALESCE, else 0.25
+            url: Page to open (default $WHATSAPP_URL, else WhatsApp Web;
+                point it at benchmarks/fixtures/whatsapp_chat_list.html to
+                test without WhatsApp)
+            urgency: Rules scoring message previews (default: from
+                $URGENCY_RULES or the vault's Company_Handbook.md)
+            profile: Browser launch settings (default: a lean
+                BrowserProfile on session_path, configured by $BROWSER_*)
+            dry_run: Check without saving chat cursors or dedup records
         """
-        super().__init__(vault_path, check_interval, watcher_name='WhatsApp')
+        extraction = extraction or os.getenv('WHATSAPP_EXTRACTION', 'bulk')
+        if extraction not in EXTRACTION_MODES:
+            raise ValueError(f'Unknown extraction mode: {extraction}')
+        super().__init__(vault_path, check_interval, watcher_name='WhatsApp', schedule=schedule,
+                         dry_run=dry_run)
+        self.extraction = extraction
         self.session_path = Path(session_path or os.getenv('WHATSAPP_SESSION_PATH', './whatsapp_session'))
+        self.url = url or os.getenv('WHATSAPP_URL', WHATSAPP_URL)
+        self.urgency = urgency or load_matcher(vault_path)
+        self.profile = profile or BrowserProfile(self.session_path)
+        self.playwright = None
         self.browser = None
         self.context = None
         self.page = None
-        self.processed_messages = set()
-        self._load_processed_messages()
-
-    def _load_processed_messages(self):
-        """Load previously processed message IDs."""
-        processed_file = Path(self.vault_path) / '.processed_whatsapp'
-        if processed_file.exists():
-            try:
-                with open(processed_file, 'r') as f:
-                    self.processed_messages = set(json.load(f))
-                logger.info(f"Loaded {len(self.processed_messages)} previously processed messages")
-            except Exception as e:
-                logger.warning(f"Could not load processed messages: {e}")
+        self.unread_gauge = self.metrics.gauge('whatsapp_unread_chats',
+                                               'Unread chats seen in the last poll (backlog)')
+
+        # Push mode: the observer is (re)installed by every check
+        if push is None:
+            push = os.getenv('WHATSAPP_PUSH', 'false').lower() == 'true'
+        self.push = push
+        self._binding_exposed = False
+        if push:
+            if safety_interval is None:
+                safety_interval = float(os.getenv('WHATSAPP_SAFETY_INTERVAL', DEFAULT_SAFETY_INTERVAL))
+            if push_coalesce is None:
+                push_coalesce = float(os.getenv('WHATSAPP_PUSH_COALESCE', DEFAULT_PUSH_COALESCE))
+            self.schedule = FixedInterval(safety_interval)
+            self.coalesce_seconds = push_coalesce
+        self.mutations = self.metrics.counter('whatsapp_chat_list_mutations_total',
+                                              'Chat-list DOM mutations reported by the page')
+        self.observer_installs = self.metrics.counter('whatsapp_observer_installs_total',
+                                                      'Chat-list observer (re)installs')
+
+        # Imports the old .processed_whatsapp JSON list on first run
+        self.processed_messages = self.open_dedup_store('whatsapp', legacy_file='.processed_whatsapp')
+
+        # Per-chat cursor: the last message seen in each chat (chat_cursor)
+        # and its arrival sequence; a chat is only looked at again once its
+        # last message changes, and its message is forgotten once it is read
+        self.sync_state = self.open_sync_state('whatsapp')
+        self.unchanged_chats = self.metrics.counter('whatsapp_unchanged_chats_total',
+                                                    'Unread chats skipped because their cursor is current')
 
     def _save_processed_messages(self):
-        """Save processed message IDs."""
-        processed_file = Path(self.vault_path) / '.processed_whatsapp'
+        """Fsync processed message IDs (each ID is appended as it is added)."""
         try:
-            with open(processed_file, 'w') as f:
-                json.dump(list(self.processed_messages), f)
+            self.processed_messages.flush()
         except Exception as e:
             logger.warning(f"Could not save processed messages: {e}")
 
-    def setup_browser(self) -> bool:
-        """Setup Playwright browser with WhatsApp Web."""
+    def setup_browser(self, headless: bool = None) -> bool:
+        """
+        Setup Playwright browser with WhatsApp Web.
+
+        Args:
+            headless: Override the profile (default: headless once a
+                session has been saved)
+        """
         try:
-            playwright = sync_playwright().start()
-            self.browser = playwright.chromium.launch_persistent_context(
-                str(self.session_path),
-                headless=False,
-                args=[
-                    '--no-sandbox',
-                    '--disable-setuid-sandbox'
-                ]
-            )
+            from playwright.sync_api import sync_playwright
+        except ImportError:
+            logger.error("Playwright not installed.")
+            logger.error(PLAYWRIGHT_INSTALL_HINT)
+            return False
 
+        try:
+            self.playwright = sync_playwright().start()
+            self.browser = self.profile.launch(self.playwright.chromium, headless)
             self.page = self.browser.pages[0] if self.browser.pages else self.browser.new_page()
 
             logger.info("Browser launched successfully")
@@ -122,84 +266,256 @@ class WhatsAppWatcher(BaseWatcher):
             logger.error(f"Browser setup failed: {e}")
             return False
 
+    def setup(self) -> bool:
+        """Launch the browser and load WhatsApp Web (used by the supervisor)."""
+        return self.setup_browser() and self.authenticate_whatsapp()
+
     def authenticate_whatsapp(self) -> bool:
         """Open WhatsApp Web for manual QR code scan."""
+        from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+
         try:
             logger.info("Opening WhatsApp Web...")
-            self.page.goto('https://web.whatsapp.com', wait_until='networkidle', timeout=30000)
+            self.page.goto(self.url, wait_until='networkidle', timeout=30000)
 
             # Wait for WhatsApp to load
             logger.info("Waiting for WhatsApp to load...")
-            self.page.wait_for_selector('[data-testid="chat-list"]', timeout=120000)
+            self.page.wait_for_selector(CHAT_LIST_CONTAINER, timeout=120000)
 
             logger.info("WhatsApp loaded successfully")
             return True
 
         except PlaywrightTimeoutError:
-            logger.error("Timeout waiting for WhatsApp to load - You may need to scan QR code manually")
+            logger.error("Timeout waiting for WhatsApp to load - You may need to scan QR code manually"
+                         " (run with --setup to open a visible browser)")
             return False
         except Exception as e:
             logger.error(f"WhatsApp authentication failed: {e}")
             return False
 
     def check_for_updates(self) -> List[Dict]:
-        """Check for new unread messages."""
+        """
+        Check for new unread messages.
+
+        Raises:
+            Exception: Any failure (after recording it in the metrics), so
+                the cycle counts as failed and the schedule backs off
+        """
         if not self.page:
             return []
 
         try:
-            # Find unread chat badges
-            unread_chats = self.page.query_selector_all('[data-testid="unread-badge"]')
-            logger.info(f"Found {len(unread_chats)} unread chats")
+            if self.push:
+                self._ensure_observer()
+            chats = self.read_chat_list()
+            self.unread_gauge.set(len(chats))
+            logger.info(f"Found {len(chats)} unread chats")
 
             messages = []
+            cursors = dict(self.sync_state.get('chats', {}))
+            changed = 0
+
+            for chat in chats:
+                chat_name = chat['chat']
+                message_text = chat['preview']
+                if message_text is None:
+                    message_text = "(message preview unavailable)"
+
+                # Nothing newer than the last message seen in this chat
+                cursor = chat_cursor(chat, preview_hash(message_text))
+                stored = cursors.pop(chat_name, {})  # reinserted: most recently changed last
+                if same_message(stored, cursor):
+                    cursors[chat_name] = stored
+                    self.unchanged_chats.inc()
+                    continue
+                cursor['seq'] = stored.get('seq', 0) + 1
+                cursors[chat_name] = cursor
+                changed += 1
 
-            for chat_element in unread_chats:
-                try:
-                    # Get chat name
-                    chat_item = chat_element.evaluate_handle('el => el.closest("[data-testid=chat-list-item-container]")')
-                    chat_name_element = chat_item.query_selector('[data-testid="chat-name"]')
-
-                    if not chat_name_element:
-                        continue
-
-                    chat_name = chat_name_element.text_content().strip()
-                    message_id = f"whatsapp_{chat_name}_{datetime.now().timestamp()}"
-
-                    # Skip if already processed
-                    if message_id in self.processed_messages:
-                        continue
-
-                    # Get last message preview
-                    message_element = chat_item.query_selector('[data-testid="conversation-message-preview"]')
-                    message_text = message_element.text_content() if message_element else "(message preview unavailable)"
-
-                    # Check if message contains urgent keywords
-                    is_urgent = any(kw in message_text.lower() for kw in self.URGENT_KEYWORDS)
-
-                    if is_urgent or len(self.processed_messages) < 5:  # Always get first few
-                        messages.append({
-                            'id': message_id,
-                            'from': chat_name,
-                            'preview': message_text[:200],
-                            'is_urgent': is_urgent,
-                            'timestamp': datetime.now().isoformat()
-                        })
-                        self.processed_messages.add(message_id)
-
-                except Exception as e:
-                    logger.warning(f"Error processing chat: {e}")
+                message_id = stable_message_id(chat_name, cursor)
+
+                # Skip if already processed
+                if message_id in self.processed_messages:
+                    self.metrics.dedup_hit()
                     continue
 
+                # Score the preview against the urgency rules
+                urgency = self.urgency.score(message_text)
+                is_urgent = urgency['priority'] == 'high'
+
+                if is_urgent or len(self.processed_messages) < 5:  # Always get first few
+                    messages.append({
+                        'id': message_id,
+                        'from': chat_name,
+                        'preview': message_text[:200],
+                        'is_urgent': is_urgent,
+                        'urgency_score': urgency['score'],
+                        'urgency_rules': urgency['matched'],
+                        'unread_count': chat['unread_count'],
+                        'last_ts': chat.get('sent_at') or chat['last_ts'],
+                        'timestamp': datetime.now().isoformat()
+                    })
+                    self.processed_messages.add(message_id)
+
+            # A chat that was read leaves the unread list: forget its message
+            # (keeping the sequence), so the same text arriving again is new
+            unread_chats = {chat['chat'] for chat in chats}
+            for chat_name, stored in cursors.items():
+                if chat_name not in unread_chats and 'preview' in stored:
+                    cursors[chat_name] = {'seq': stored.get('seq', 0)}
+                    changed += 1
+
+            if changed:
+                for stale in list(cursors)[:max(0, len(cursors) - MAX_CHAT_CURSORS)]:
+                    del cursors[stale]
+                self.sync_state.update(chats=cursors)
             if messages:
                 logger.info(f"Found {len(messages)} new unread messages")
                 self._save_processed_messages()
 
             return messages
 
-        except Exception as e:
-            logger.error(f"Error checking for messages: {e}")
-            return []
+        except Exception:
+            self.metrics.error('check_for_updates')
+            raise
+
+    def read_chat_list(self, unread_only: bool = True) -> List[Dict]:
+        """
+        Read the chat list as rows of ``{chat, preview, unread_count, last_ts,
+        sent_at}``: ``last_ts`` is the time label shown, ``sent_at`` the time
+        element's ``datetime`` attribute (None when the page has none).
+
+        Args:
+            unread_only: Only chats showing an unread badge
+
+        Returns:
+            One row per chat, in list order
+        """
+        if self.extraction == 'bulk':
+            rows = self.page.evaluate(CHAT_LIST_SCRIPT, dict(CHAT_LIST_SELECTORS, unreadOnly=unread_only))
+            self.metrics.api_call('dom.evaluate')
+            return rows
+        return self._read_chat_list_elements(unread_only)
+
+    def _read_chat_list_elements(self, unread_only: bool) -> List[Dict]:
+        """The chat list read one element handle at a time (a round trip per call)."""
+        selectors = CHAT_LIST_SELECTORS
+        if unread_only:
+            # Find unread chat badges, then walk up to their chats
+            badges = self.page.query_selector_all(selectors['badge'])
+            self.metrics.api_call('dom.query_selector_all')
+            items = []
+            for badge in badges:
+                items.append(badge.evaluate_handle(f"el => el.closest('{selectors['item']}')"))
+                self.metrics.api_call('dom.evaluate_handle')
+        else:
+            items = self.page.query_selector_all(selectors['item'])
+            self.metrics.api_call('dom.query_selector_all')
+
+        rows = []
+        for chat_item in items:
+            try:
+                fields, sent_at = {}, None
+                for field in ('name', 'preview', 'badge', 'time'):
+                    element = chat_item.query_selector(selectors[field]) if chat_item else None
+                    self.metrics.api_call('dom.query_selector')
+                    fields[field] = element.text_content() if element else None
+                    if element:
+                        self.metrics.api_call('dom.text_content')
+                    if element and field == 'time':
+                        sent_at = element.get_attribute('datetime')
+                        self.metrics.api_call('dom.get_attribute')
+
+                if fields['name'] is None:
+                    continue
+                badge = (fields['badge'] or '').strip()
+                rows.append({
+                    'chat': fields['name'].strip(),
+                    'preview': fields['preview'],
+                    'unread_count': (int(badge) if badge.isdigit() else 1) if fields['badge'] is not None else 0,
+                    'last_ts': fields['time'].strip() if fields['time'] is not None else None,
+                    'sent_at': sent_at,
+                })
+
+            except Exception as e:
+                logger.warning(f"Error processing chat: {e}")
+                self.metrics.error('chat')
+                continue
+        return rows
+
+    # ------------------------------------------------------------- push mode
+
+    def _ensure_observer(self):
+        """
+        Expose the binding once and (re)install the in-page observer after a
+        reload or a re-render of the chat list; runs on every check,
+        including the safety polls.
+        """
+        if not self._binding_exposed:
+            self.page.expose_binding(PUSH_BINDING, self.on_chat_list_change)
+            self.metrics.api_call('dom.expose_binding')
+            self._binding_exposed = True
+        installed = self.page.evaluate(PUSH_OBSERVER_SCRIPT,
+                                       {'container': CHAT_LIST_CONTAINER, 'binding': PUSH_BINDING})
+        self.metrics.api_call('dom.evaluate')
+        if installed:
+            self.observer_installs.inc()
+            logger.info("Watching the chat list for changes")
+
+    def on_chat_list_change(self, source, records: int = 1):
+        """Binding called by the page's MutationObserver: check again soon."""
+        self.mutations.inc(records)
+        self.request_poll()
+
+    def _wait_for_next_cycle(self, interval: float):
+        """
+        In push mode, wait inside Playwright (so binding calls are
+        delivered) until the interval passes or a change wakes the watcher,
+        then wait out the coalescing window the same way.
+        """
+        if not self.push or not self.page:
+            return super()._wait_for_next_cycle(interval)
+        self._pump(interval, until_woken=True)
+        if self._wake.is_set() and self.coalesce_seconds:
+            self._pump(self.coalesce_seconds, until_woken=False)
+        self._wake.clear()
+
+    def _pump(self, seconds: float, until_woken: bool):
+        deadline = time.monotonic() + seconds
+        while not self._stop.is_set() and not (until_woken and self._wake.is_set()):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                self.page.wait_for_timeout(min(PUMP_INTERVAL_MS, remaining * 1000))
+            except Exception as e:
+                # Page gone: fall back to a plain wait; the next check reports it
+                logger.warning(f"Page not responding while waiting: {e}")
+                self._stop.wait(remaining)
+                return
+
+    async def run_async(self, stop_event, executor=None):
+        """
+        In push mode the blocking run() loop runs on the watcher's own
+        thread, which must stay inside Playwright between checks.
+        """
+        if not self.push:
+            return await super().run_async(stop_event, executor)
+        import asyncio
+
+        if stop_event.is_set():
+            return
+        # Cleared here, not in run(): a stop() from the callback below can
+        # land before the executor thread enters run() and must not be lost
+        self._stop.clear()
+        self._wake.clear()
+        loop = asyncio.get_running_loop()
+        stopper = asyncio.ensure_future(stop_event.wait())
+        stopper.add_done_callback(lambda _: self.stop())
+        try:
+            await loop.run_in_executor(executor, self.run)
+        finally:
+            stopper.cancel()
 
     def create_action_file(self, message: Dict) -> Path:
         """Create markdown file for message in Needs_Action folder."""
@@ -209,17 +525,20 @@ class WhatsAppWatcher(BaseWatcher):
 
             priority = 'high' if message['is_urgent'] else 'normal'
 
-            content = f"""---
-type: whatsapp_message
-status: pending
-priority: {priority}
-from: {message['from']}
-received: {message['timestamp']}
-urgent: {message['is_urgent']}
-message_id: {message['id']}
----
-
-# WhatsApp from {message['from']}
+            frontmatter = {
+                'type': 'whatsapp_message',
+                'status': 'pending',
+                'priority': priority,
+                'from': message['from'],
+                'received': message['timestamp'],
+                'urgent': message['is_urgent'],
+                'urgency_score': message.get('urgency_score', 0),
+                'urgency_rules': message.get('urgency_rules', []),
+                'unread_count': message.get('unread_count'),
+                'last_message_time': message.get('last_ts'),
+                'message_id': message['id']
+            }
+            body = f"""# WhatsApp from {message['from']}
 
 ## Message Preview
 {message['preview']}
@@ -241,8 +560,7 @@ Write your response here before moving to approval.
 Add context or follow-up items here.
 """
 
-            filepath = self.needs_action / filename
-            filepath.write_text(content)
+            filepath = self.write_action_file(filename, render_note(frontmatter, body))
 
             # Log action
             self.log_action({
@@ -254,7 +572,7 @@ Add context or follow-up items here.
                 'file': str(filepath)
             })
 
-            logger.info(f"Created action file: {filename}")
+            logger.info(f"Created action file: {filepath.name}")
             return filepath
 
         except Exception as e:
@@ -268,7 +586,10 @@ Add context or follow-up items here.
                 self.page.close()
             if self.browser:
                 self.browser.close()
-            logger.info("Browser closed")
+            if self.playwright:
+                self.playwright.stop()
+            self.page = self.browser = self.playwright = None
+            logger.info(f"Browser closed ({self.profile.blocked} requests blocked)")
         except Exception as e:
             logger.warning(f"Error closing browser: {e}")
 
@@ -278,7 +599,7 @@ Add context or follow-up items here.
         logger.info("Please scan the QR code with your WhatsApp mobile device")
         logger.info("Session will be saved for future automated runs")
 
-        if not self.setup_browser():
+        if not self.setup_browser(headless=False):
             logger.error("Failed to setup browser")
             return
 
@@ -304,15 +625,41 @@ def main():
     parser = argparse.ArgumentParser(description='WhatsApp Watcher for AI Employee')
     parser.add_argument('--vault', required=True, help='Path to Obsidian vault')
     parser.add_argument('--session', default=None, help='Path to WhatsApp session')
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help='Serve Prometheus metrics on this port (default: $METRICS_PORT)')
     parser.add_argument('--demo', action='store_true', help='Demo mode (read-only)')
-    parser.add_argument('--test', action='store_true', help='Test connection')
+    parser.add_argument('--test', action='store_true', help='Test connection (read-only)')
     parser.add_argument('--setup', action='store_true', help='Interactive setup mode')
     parser.add_argument('--interval', type=int, default=30, help='Check interval in seconds')
+    parser.add_argument('--adaptive', action='store_true',
+                        help='Adapt the interval to traffic (faster during bursts, backs off when idle)')
+    parser.add_argument('--min-interval', type=float, default=None, help='Fastest adaptive interval in seconds')
+    parser.add_argument('--max-interval', type=float, default=None, help='Slowest adaptive interval in seconds')
+    parser.add_argument('--push', action='store_true', default=None,
+                        help='Check when the chat list changes instead of polling (keeps a safety-net poll)')
+    parser.add_argument('--safety-interval', type=float, default=None,
+                        help=f'Seconds between polls in push mode (default: $WHATSAPP_SAFETY_INTERVAL or {DEFAULT_SAFETY_INTERVAL})')
+    parser.add_argument('--push-coalesce', type=float, default=None,
+                        help=f'Changes within this many seconds share one check (default: $WHATSAPP_PUSH_COALESCE or {DEFAULT_PUSH_COALESCE})')
+    parser.add_argument('--url', default=None,
+                        help='Page to open (default: $WHATSAPP_URL or WhatsApp Web), e.g. the fixture page')
+    parser.add_argument('--extraction', choices=EXTRACTION_MODES, default=None,
+                        help='bulk: read the chat list with one in-page script per check (default); '
+                             'elements: one DOM round trip per field')
 
     args = parser.parse_args()
 
+    configure_logging('whatsapp_watcher.log')
+    load_environment()
+
     # Create watcher
-    watcher = WhatsAppWatcher(args.vault, args.session, args.interval)
+    schedule = None
+    if args.adaptive:
+        schedule = AdaptiveInterval(args.interval, args.min_interval, args.max_interval)
+    watcher = WhatsAppWatcher(args.vault, args.session, args.interval, schedule, extraction=args.extraction,
+                              push=args.push, safety_interval=args.safety_interval,
+                              push_coalesce=args.push_coalesce, url=args.url,
+                              dry_run=args.demo or args.test)
 
     if args.setup:
         watcher.run_interactive()
@@ -322,8 +669,11 @@ def main():
         logger.info("Testing WhatsApp connection...")
         if watcher.setup_browser() and watcher.authenticate_whatsapp():
             logger.info("✓ WhatsApp Web accessible")
-            items = watcher.check_for_updates()
-            logger.info(f"Found {len(items)} unread messages")
+            try:
+                items = watcher.check_for_updates()
+                logger.info(f"Found {len(items)} unread messages")
+            except Exception as e:
+                logger.error(f"Error checking for messages: {e}")
         else:
             logger.error("✗ WhatsApp Web not accessible")
         watcher.close()
@@ -333,15 +683,21 @@ def main():
         logger.info("Demo mode: Starting browser...")
         if watcher.setup_browser() and watcher.authenticate_whatsapp():
             logger.info("Checking for messages...")
-            items = watcher.check_for_updates()
-            logger.info(f"Would create {len(items)} action files:")
-            for item in items:
-                logger.info(f"  - {item['from']}: {item['preview'][:50]}...")
+            try:
+                items = watcher.check_for_updates()
+                logger.info(f"Would create {len(items)} action files:")
+                for item in items:
+                    logger.info(f"  - {item['from']}: {item['preview'][:50]}...")
+            except Exception as e:
+                logger.error(f"Error checking for messages: {e}")
         watcher.close()
         return
 
     # Run continuous watcher
-    logger.info(f"Starting WhatsApp watcher (checking every {args.interval}s)")
+    if watcher.push:
+        logger.info(f"Starting WhatsApp watcher (push, safety-net poll every {watcher.schedule.interval:g}s)")
+    else:
+        logger.info(f"Starting WhatsApp watcher (checking every {args.interval}s{', adaptive' if args.adaptive else ''})")
     logger.info(f"Vault: {args.vault}")
     logger.info("Press Ctrl+C to stop")
 
@@ -353,6 +709,8 @@ def main():
         logger.error("Failed to authenticate with WhatsApp")
         sys.exit(1)
 
+    start_metrics_export(watcher.logs, args.metrics_port)
+
     try:
         watcher.run()
     except KeyboardInterrupt: